@@ -82,14 +82,52 @@ def find_cross_points(y1, y2=None):
         y1 = np.array(y1)
     if isinstance(y2, list):
         y2 = np.array(y2)
+    above = np.asarray(y1) >= np.asarray(y2)
     cross_points = np.zeros(len(y1))
-    for ii in range(1, len(y1)):
-        if y1[ii - 1] >= y2[ii - 1] and y1[ii] < y2[ii]:
-            cross_points[ii] = -1
-        elif y1[ii - 1] < y2[ii - 1] and y1[ii] >= y2[ii]:
-            cross_points[ii] = 1
+    cross_points[1:][above[:-1] & ~above[1:]] = -1
+    cross_points[1:][~above[:-1] & above[1:]] = 1
     return cross_points
 
+def find_extreme_points(y, delta, look_for_max=True):
+    """find_extreme_points(y, delta, look_for_max=True) -> numpy.1darray
+    find extreme points of a data sequence with hysteresis.
+    An extreme maximum is signaled when y falls below its running maximum by more than delta, 
+    and then the search switches to an extreme minimum starting from that point, and vice versa.
+    The detection is sequential by nature, so it runs in a single pass 
+    over a list of floats with only scalar operations.
+    
+    Parameters
+    ----------
+    y            : list or numpy.1darray
+    delta        : float (>= 0)
+        hysteresis width
+    look_for_max : bool (default : True)
+        if True, then look for an extreme maximum first
+    
+    Returns
+    -------
+    extreme_points : numpy.1darray
+        +1 on extreme maxima, -1 on extreme minima and 0 otherwise
+    """
+    extreme_points = np.zeros(len(y))
+    current_max, current_min = -np.inf, np.inf
+    for ii, v in enumerate(np.asarray(y, dtype=float).tolist()):
+        if look_for_max:
+            if v > current_max:
+                current_max = v
+            elif v < current_max - delta:
+                extreme_points[ii] = 1.
+                current_min = v
+                look_for_max = False
+        else:
+            if v < current_min:
+                current_min = v
+            elif v > current_min + delta:
+                extreme_points[ii] = -1.
+                current_max = v
+                look_for_max = True
+    return extreme_points
+
 def symbolize(dataFrame, k):
     """symbolize(dataFrame, k) -> numpy.1darray
     binalize a k-length OHLC dataset and then convert the binary to decimal number.  
@@ -106,11 +144,14 @@ def symbolize(dataFrame, k):
     if k <= 0:
         raise ValueError("k must be >=1.")
     var_ = (dataFrame["close"] - dataFrame["open"]).values
+    bits = (var_ >= 0).astype(int)
     dec = np.zeros(len(var_), int)
-    
-    for ii in range(k-1, len(var_)):
-        ind_ = np.array(var_[ii-k+1:ii+1] >= 0, int)
-        dec[ii] = int("".join([str(i_) for i_ in ind_]), 2)
+    N = len(var_) - k + 1
+    if N <= 0:
+        return dec
+    # add the strided bits shifted by their weights
+    for kk in range(k):
+        dec[k-1:] |= bits[k-1-kk:k-1-kk+N] << kk
     return dec
 
 def peakdet(v, delta, x=None):
@@ -14,7 +14,6 @@ import os
 import json
 import pickle
 import glob
-import pybitflyer
 
 from PyQt5.QtWidgets import QMainWindow, QGridLayout, QMenu, QWidget, QLabel, QLineEdit, QTextEdit
 from PyQt5.QtWidgets import QCheckBox, QApplication, QTableWidget, QTableWidgetItem
@@ -25,9 +24,9 @@ from PyQt5.QtWidgets import QStyle, QGraphicsView
 from PyQt5.QtCore import pyqtSlot, QThread, QTimer, Qt, QMutex
 from PyQt5 import  QtGui, QtCore
 
-from utils import footprint
+from utils import as_client, footprint, MarketFeed, SessionAPI
 from utils import make_groupbox_and_grid, make_label, make_pushbutton
-from workers import GetTickerWorker, Bot3
+from workers import FeedWorker, Bot3
 from sub_guis import ChartWindow
 
 DEBUG = False
@@ -166,11 +165,12 @@ class OrderBoard(QMainWindow):
             except Exception as ex:
                 raise Exception(ex)
         
-        self._api = pybitflyer.API(
+        # the API is shared by the workers and the bots in the same request budget
+        self._api = as_client(SessionAPI(
             api_key=self._api_key, 
             api_secret=self._api_secret, 
             timeout=self._api_timeout
-        )
+        ))
         self.__API_ERROR = False
         try:
             endpoint = "/v1/markets"
@@ -569,6 +569,8 @@ class OrderBoard(QMainWindow):
         show an window of chart and analysis graphs
         """
         self._chart_window = ChartWindow(self)
+        # the feed makes the new bars of the chart, which are appended by ChartWindow.update
+        self._feed.adapter = self._chart_window.adapter
         self._chart_window.show()
         self._chart_window.raise_()
         self._chart_window.activateWindow()
@@ -600,6 +602,7 @@ class OrderBoard(QMainWindow):
         """
         if not self._timer_getData.isActive():
             # self.initData()
+            self._feed.start()
             self._timer_getData.start()
             self.btn_start_ticker.setText("Stop")
         else:
@@ -1171,12 +1174,18 @@ class OrderBoard(QMainWindow):
     @footprint
     def initGetDataProcess(self):
         """initGetDataProcess(self) -> None
+
+        The requests are issued concurrently by a MarketFeed on its own thread,
+        and the worker relays the latest snapshot to the GUI on each timeout.
         """
+        # the feed derives its interval from the request budget shared with the bots,
+        # and the timer only polls the latest snapshot
+        self._feed = MarketFeed(self._api, product_code=self._product_code, interval=None)
         self._timer_getData = QTimer()
         self._timer_getData.setInterval(int(self._get_data_interval*1000))
         self.stopTimer = False
         self._thread_getData = QThread()
-        self._worker_getData = GetTickerWorker(api=self._api, product_code=self._product_code)
+        self._worker_getData = FeedWorker(feed=self._feed)
         self._worker_getData.sleepInterval = self._get_data_worker_sleep_interval
         
         # Start.
@@ -1250,7 +1259,7 @@ class OrderBoard(QMainWindow):
                 self.tot_value.setText(str(collateral["require_collateral"]))
 
                 # CharWindow
-                self._chart_window.update(market_data)
+                self._chart_window.update(obj.get("dataset"))
                     
             except Exception as ex:
                 print(ex)
@@ -1263,6 +1272,7 @@ class OrderBoard(QMainWindow):
         """
         if self.stopTimer:
             self._timer_getData.stop()
+            self._feed.stop()
             # print("timer stopped.")
             self.stopTimer = False
             self.btn_start_ticker.setEnabled(True)
@@ -1384,6 +1394,7 @@ class OrderBoard(QMainWindow):
         """
         if self._timer_getData.isActive():
             self._timer_getData.stop()
+        self._feed.stop()
     
     @footprint
     def deleteTempExecutions(self):
@@ -8,7 +8,6 @@ This file offers the following items:
 * ChartWindow
 """
 
-import copy
 from datetime import datetime
 import numpy as np
 import pandas as pd
@@ -119,6 +118,7 @@ class ChartWindow(QDialog):
         self._thread_analysis = QThread()
         self._worker_analysis = AnalysisWorker()
         self._worker_analysis.do_something.connect(self.updateAdapterByWorker)
+        self._worker_analysis.progress.connect(self.updateAnalysisProgress)
         self._worker_analysis.moveToThread(self._thread_analysis)
 
         # start
@@ -317,32 +317,39 @@ class ChartWindow(QDialog):
         self.grid.setSpacing(5)
     
     @pyqtSlot()
-    def update(self):
-        """update(self) -> None
+    def update(self, new_bars=None):
+        """update(self, new_bars=None) -> None
 
         update the inner adapter and graphs
+
+        Parameters
+        ----------
+        new_bars : pandas.DataFrame (default : None)
+            bars closed since the last update
         """
         try:
-            self.updateInnerAdapter()
+            self.updateInnerAdapter(new_bars)
             self.updatePlots()
         except Exception as ex:
             _, _2, exc_tb = sys.exc_info()
             # fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             print("line {}: {}".format(exc_tb.tb_lineno, ex))
     
-    def updateInnerAdapter(self):
-        """updateInnerAdapter(self) -> None
+    def updateInnerAdapter(self, new_bars=None):
+        """updateInnerAdapter(self, new_bars=None) -> None
         
-        update the adapter
+        update the adapter.
+        The data are rebuilt only if the parameters are changed,
+        otherwise new bars are appended incrementally.
+        This is the only place where the bars made by a MarketFeed are appended.
         """
-        if self._adapter.N_ema1 != int(self.le_ema1.text()) or self._N_ema2 != int(self.le_ema2.text()):
-            self._adapter.N_ema1 = int(self.le_ema1.text())
-            self._adapter.N_ema2 = int(self.le_ema2.text())
-        if self._adapter.delta != float(self.le_delta.text()):
-            self._adapter.delta = float(self.le_delta.text())
+        # the setters mark the data to rebuild only if the values change
+        self._adapter.N_ema1 = int(self.le_ema1.text())
+        self._adapter.N_ema2 = int(self.le_ema2.text())
+        self._adapter.delta = float(self.le_delta.text())
         
-        # if need_update:
         self._adapter.initOHLCVData()
+        self._adapter.append_bars(new_bars)
         self.updateResults()
     
     def updateResults(self):
@@ -351,7 +358,7 @@ class ChartWindow(QDialog):
         update the results of trades
         """
         self.label_benefit_value.setText(str(self._adapter.jpy_list[-1]))
-        days = len(self._adapter.jpy_list) / 1440.
+        days = len(self._adapter.jpy_list) / self._adapter.bars_per_day
         self.label_days_value.setText("{0:.1f}".format(days))
         self.label_perday_value.setText("{0:.1f}".format(float(self._adapter.jpy_list[-1]) / days))
     
@@ -369,6 +376,16 @@ class ChartWindow(QDialog):
         self._adapter.analysis_results = obj
         self.drawAnalysisResults()
     
+    @pyqtSlot(object)
+    def updateAnalysisProgress(self, obj):
+        """updateAnalysisProgress(self, obj) -> None
+
+        draw the partial benefit map during the analysis
+        """
+        if self.DEBUG:
+            print("analysis: {0}/{1}".format(obj["done"], obj["total"]))
+        self.analysis_graphs.img_benefit.setImage(obj["benefit_map"])
+    
     def updatePlots(self):
         """updatePlots(self) -> None
 
@@ -391,7 +408,8 @@ class ChartWindow(QDialog):
         if not self._thread_analysis.isRunning():
             if self.DEBUG:
                 print("start thread.")
-            self._worker_analysis.adapter = copy.deepcopy(self._adapter)
+            # the worker analyzes a snapshot, so the adapter can be updated during the analysis
+            self._worker_analysis.adapter = self._adapter.snapshotAnalysisData()
             self._thread_analysis.start()
         else:
             if self.DEBUG:
@@ -406,6 +424,11 @@ class ChartWindow(QDialog):
         obj = self._adapter.dataset_for_analysis_graphs(self._adapter.N_ema1, self._adapter.N_ema2)
         self.analysis_graphs.updateGraphs(obj)
 
+    @property
+    def adapter(self):
+        """DataAdapter of this window, to which `update` appends new bars"""
+        return self._adapter
+
 def main():
     import glob
     file_list = glob.glob("../data/ohlcv/OHLCV*.csv")
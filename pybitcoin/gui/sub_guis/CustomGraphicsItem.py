@@ -21,12 +21,12 @@ class CandlestickItem(pg.GraphicsObject):
 
         Parameters
         ----------
-        data : list of tuples
+        data : list of tuples or numpy.2darray
             Each tuples has the following format:
             (timestamp, open, high, low, close)
         """
         pg.GraphicsObject.__init__(self)
-        self.data = np.array(data)
+        self.data = np.asarray(data, dtype=float)
         try:
             self.generatePicture()
         except Exception as ex:
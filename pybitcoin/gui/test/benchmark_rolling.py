@@ -0,0 +1,47 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+benchmark_rolling.py
+benchmarks of the rolling extrema, which scale linearly with the length of data
+and do not depend on the window size.
+
+Usage
+-----
+python benchmark_rolling.py
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from mathfunctions import rolling_max
+from StreamingIndicators import RollingExtremum
+
+def measure(func, *args, repeat=3):
+    elapsed = []
+    for _ in range(repeat):
+        st = time.time()
+        func(*args)
+        elapsed.append(time.time() - st)
+    return min(elapsed)
+
+def stream(x, N):
+    rolling = RollingExtremum(N)
+    for v in x.tolist():
+        rolling.update(v)
+
+def main():
+    rng = np.random.RandomState(0)
+    print("{:>9} {:>6} {:>12} {:>12}".format("length", "window", "batch [ms]", "stream [ms]"))
+    for length in [10**4, 10**5, 10**6]:
+        x = rng.randint(390000, 410000, length).astype(float)
+        for N in [14, 1440]:
+            t_batch = measure(rolling_max, x, N) * 1e3
+            t_stream = measure(stream, x, N, repeat=1) * 1e3
+            print("{:>9} {:>6} {:>12.2f} {:>12.2f}".format(length, N, t_batch, t_stream))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+conftest.py
+fixtures shared by the tests
+"""
+
+from datetime import datetime, timedelta
+import importlib
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+
+class FakeAPI(object):
+    """a fake of pybitflyer.API serving executions with monotone ids"""
+    def __init__(self, N=5000, seed=0, fail_before=None):
+        rng = np.random.RandomState(seed)
+        self.ids = 1000 + np.cumsum(rng.randint(1, 4, N))
+        t0 = datetime(2019, 1, 1)
+        seconds = np.cumsum(rng.rand(N) * 0.5)
+        self.results = [{
+            "id":int(id_), "side":["BUY", "SELL"][ii % 2], "price":400000. + ii % 37,
+            "size":0.01 * (1 + ii % 5),
+            "exec_date":(t0 + timedelta(seconds=float(sec))).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3],
+        } for ii, (id_, sec) in enumerate(zip(self.ids, seconds))]
+        self.fail_before = fail_before # requests with "before" under this value fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def executions(self, product_code="FX_BTC_JPY", count=100, before=None, after=None):
+        with self._lock:
+            self.calls += 1
+        if self.fail_before is not None and before is not None and before <= self.fail_before:
+            raise ConnectionError("fake error")
+        lo = 0 if after is None else np.searchsorted(self.ids, after, "right")
+        hi = len(self.ids) if before is None else np.searchsorted(self.ids, before, "left")
+        return self.results[max(lo, hi - count):hi][::-1]
+
+@pytest.fixture(name="FakeAPI")
+def fake_api():
+    """FakeAPI class"""
+    return FakeAPI
+
+@pytest.fixture(scope="session")
+def DataAdapter(tmp_path_factory):
+    """DataAdapter class"""
+    # footprint makes a directory of logs in the current directory at the import
+    cwd = os.getcwd()
+    os.chdir(str(tmp_path_factory.mktemp("log")))
+    try:
+        yield importlib.import_module("DataAdapter").DataAdapter
+    finally:
+        os.chdir(cwd)
+
+@pytest.fixture
+def make_ohlcv():
+    """function making random 1-minute bars from the unix time `t0`"""
+    def make_ohlcv_(t0, N, seed=0):
+        rng = np.random.RandomState(seed)
+        close = 400000 + np.cumsum(rng.randint(-300, 301, N))
+        id_end = 700000000 + np.cumsum(rng.randint(1, 100, N))
+        return pd.DataFrame({
+            "time":t0 + 60. * np.arange(N), "id_start":np.append(699999999, id_end[:-1]) + 1,
+            "id_end":id_end, "open":close + 10, "high":close + 100, "low":close - 100,
+            "close":close, "volume":rng.rand(N)
+        })
+    return make_ohlcv_
@@ -0,0 +1,62 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_analysis_results.py
+tests of AnalysisResults
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from AnalysisResults import AnalysisResults
+from OHLCVStore import OHLCVStore
+from StreamingIndicators import AwesomeOscillator, RMSError, UltimateOscillator, WPercentR
+
+def make_dataframe(N=300, seed=0):
+    rng = np.random.RandomState(seed)
+    close = 400000 + np.cumsum(rng.randint(-300, 301, N))
+    open_ = np.hstack((close[0] - 100, close[:-1]))
+    high = np.maximum(open_, close) + rng.randint(0, 200, N)
+    low = np.minimum(open_, close) - rng.randint(0, 200, N)
+    return pd.DataFrame({
+        "open":open_, "high":high, "low":low, "close":close, "volume":rng.rand(N)
+    }).astype(float)
+
+def test_from_ohlcv():
+    df = make_dataframe()
+    res = AnalysisResults.from_ohlcv(df, {"N_bb":10, "N_wpr":7})
+    assert list(res.df.columns) == res._properties
+    assert len(res) == len(df)
+    np.testing.assert_allclose(res.df["macd"], res.df["ema1"] - res.df["ema2"])
+    np.testing.assert_allclose(res.df["upper_band2"], df["close"] + 2. * res.df["std"])
+
+    # the same values as the ones of the streaming indicators
+    indicators = {
+        "std":RMSError(10), "w_percent_r":WPercentR(7),
+        "uo":UltimateOscillator(), "ao":AwesomeOscillator()
+    }
+    tohlc = np.hstack((np.arange(1, len(df) + 1)[:, None], df[["open", "high", "low", "close"]].values))
+    for key, indicator in indicators.items():
+        expected = [indicator.update(bar) for bar in tohlc.tolist()]
+        np.testing.assert_allclose(res.df[key], expected, atol=1e-6)
+
+def test_chunked_append():
+    expected = AnalysisResults.from_ohlcv(make_dataframe(50)).df
+    res = AnalysisResults(chunk_size=8)
+    for row in expected.values:
+        assert res.append(row)
+    assert len(res) == 50 and len(res._df) == 48
+    assert not res.append(np.zeros(3))
+    pd.testing.assert_frame_equal(res.df, expected.astype(float))
+    assert res._N_buffer == 0
+
+def test_from_store():
+    df = make_dataframe()
+    df["time"] = 1546300800. + 60. * np.arange(len(df))
+    with OHLCVStore.from_dataframe(df) as store:
+        res = AnalysisResults.from_ohlcv(store, {"N_bb":10})
+    pd.testing.assert_frame_equal(res.df, AnalysisResults.from_ohlcv(df, {"N_bb":10}).df)
@@ -0,0 +1,136 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_analyzer.py
+parity tests between Analyzer and VectorizedAnalyzer
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from Analyzer import Analyzer, VectorizedAnalyzer
+
+def make_tohlc(N=500, seed=0):
+    """make_tohlc(N=500, seed=0) -> numpy.2darray
+
+    make a random OHLC dataset with the shape of (N, 5)
+    """
+    rng = np.random.RandomState(seed)
+    close = 400000 + np.cumsum(rng.randint(-500, 501, N))
+    open_ = np.hstack((close[0] - 100, close[:-1]))
+    high = np.maximum(open_, close) + rng.randint(0, 300, N)
+    low = np.minimum(open_, close) - rng.randint(0, 300, N)
+    return np.vstack((np.arange(1, N + 1), open_, high, low, close)).T.astype(float)
+
+def loop_dec(oc_up_down, N_dec):
+    """the original loop of Analyzer.calcDec, as an independent reference"""
+    dec = []
+    for ii in range(len(oc_up_down)):
+        if ii < N_dec - 1:
+            dec.append(0)
+        else:
+            dec.append(int("".join([str(int(i_)) for i_ in oc_up_down[ii-N_dec+1:ii+1]]), 2))
+    return dec
+
+def loop_w_percent_r(tohlc, N):
+    """the original loop of Analyzer.calcWPercentR, as an independent reference"""
+    wpr = []
+    for ii in range(len(tohlc)):
+        if ii < N - 1:
+            wpr.append(-50.)
+        else:
+            highest = max([row[2] for row in tohlc[ii-N+1:ii+1]])
+            lowest = min([row[3] for row in tohlc[ii-N+1:ii+1]])
+            wpr.append((tohlc[ii][-1] - highest) / (highest - lowest) * 100.)
+    return wpr
+
+def assert_parity(expected, actual):
+    np.testing.assert_allclose(np.asarray(actual), np.asarray(expected, dtype=float), rtol=1e-10, atol=1e-8)
+
+def test_parity_of_ohlc_indicators():
+    tohlc = make_tohlc()
+    ohlc_list = [row for row in tohlc]
+    ana, vec = Analyzer(), VectorizedAnalyzer()
+
+    oc_up_down = ana.calcOcUpDown(ohlc_list)
+    assert_parity(oc_up_down, vec.calcOcUpDown(tohlc))
+    for N_dec in [1, 3, 5, 8]:
+        expected = loop_dec(oc_up_down, N_dec)
+        assert_parity(expected, ana.calcDec(oc_up_down, N_dec))
+        assert_parity(expected, vec.calcDec(oc_up_down, N_dec))
+
+    for name in ["calcBuyingPressure", "calcTrueRange", "calcDMPlus", "calcDMMinus"]:
+        assert_parity(getattr(ana, name)(ohlc_list), getattr(vec, name)(tohlc))
+    for name in ["calcMomentum", "calcROC1", "calcROC2"]:
+        for N in [1, 5, 14]:
+            assert_parity(getattr(ana, name)(ohlc_list, N), getattr(vec, name)(tohlc, N))
+    for N in [1, 5, 14]:
+        expected = loop_w_percent_r(ohlc_list, N)
+        assert_parity(expected, ana.calcWPercentR(ohlc_list, N))
+        assert_parity(expected, vec.calcWPercentR(tohlc, N))
+    for N1, N2 in [(5, 34), (3, 10)]:
+        assert_parity(ana.calcAwesomeOscillator(ohlc_list, N1, N2), vec.calcAwesomeOscillator(tohlc, N1, N2))
+
+    bp = ana.calcBuyingPressure(ohlc_list)
+    tr = ana.calcTrueRange(ohlc_list)
+    assert_parity(ana.calcUltimateOscillator(bp, tr), vec.calcUltimateOscillator(bp, tr))
+
+def test_parity_of_ema_indicators():
+    tohlc = make_tohlc()
+    ohlc_list = [row for row in tohlc]
+    close = list(tohlc[:, -1])
+    ana, vec = Analyzer(), VectorizedAnalyzer()
+
+    for N in [1, 2, 20, 100]:
+        alpha = 2. / (N + 1.)
+        assert_parity(ana.calcEMA(close, alpha), vec.calcEMA(close, alpha))
+        assert_parity(ana.calcSMA(close, N), vec.calcSMA(close, N))
+        assert_parity(ana.calcOCUpEMA(ohlc_list, alpha), vec.calcOCUpEMA(tohlc, alpha))
+        assert_parity(ana.calcOCDownEMA(ohlc_list, alpha), vec.calcOCDownEMA(tohlc, alpha))
+
+    ema1 = ana.calcEMA(close, 2. / 21.)
+    ema2 = ana.calcEMA(close, 2. / 22.)
+    macd = ana.calcMACD(ema1, ema2)
+    assert_parity(macd, vec.calcMACD(ema1, ema2))
+    assert_parity(ana.calcMACDSignal(macd, 2. / 15.), vec.calcMACDSignal(macd, 2. / 15.))
+    for N in [1, 5, 20]:
+        assert_parity(ana.calcRMSError(close, ema1, N), vec.calcRMSError(close, ema1, N))
+        for band, band_vec in zip(ana.calcBollingerBands(close, ema1, N), vec.calcBollingerBands(close, ema1, N)):
+            assert_parity(band, band_vec)
+
+    up = ana.calcOCUpEMA(ohlc_list, 2. / 15.)
+    down = ana.calcOCDownEMA(ohlc_list, 2. / 15.)
+    assert_parity(ana.calcRSI(down, up), vec.calcRSI(down, up))
+    assert_parity(ana.calcRatioOfDeviation(ema1, close), vec.calcRatioOfDeviation(ema1, close))
+
+    atr = ana.calcAverageTrueRange(ana.calcTrueRange(ohlc_list), 2. / 15.)
+    dmp = ana.calcDMPlusEMA(ana.calcDMPlus(ohlc_list), 2. / 15.)
+    dmm = ana.calcDMMinusEMA(ana.calcDMMinus(ohlc_list), 2. / 15.)
+    dip, dim = ana.calcDIPlus(dmp, atr), ana.calcDIMinus(dmm, atr)
+    assert_parity(dip, vec.calcDIPlus(dmp, atr))
+    assert_parity(dim, vec.calcDIMinus(dmm, atr))
+    dx = ana.calcDX(dip, dim)
+    assert_parity(dx, vec.calcDX(dip, dim))
+    assert_parity(ana.calcADX(dx, 2. / 15.), vec.calcADX(dx, 2. / 15.))
+
+def test_short_inputs():
+    tohlc = make_tohlc(3)
+    ohlc_list = [row for row in tohlc]
+    ana, vec = Analyzer(), VectorizedAnalyzer()
+    assert_parity(loop_w_percent_r(ohlc_list, 14), ana.calcWPercentR(ohlc_list, 14))
+    assert_parity(loop_w_percent_r(ohlc_list, 14), vec.calcWPercentR(tohlc, 14))
+    assert_parity(ana.calcSMA(list(tohlc[:, -1]), 14), vec.calcSMA(tohlc[:, -1], 14))
+    assert_parity(ana.calcMomentum(ohlc_list, 14), vec.calcMomentum(tohlc, 14))
+    assert len(vec.calcEMA([], 0.5)) == 0
+
+def test_invalid_shape():
+    vec = VectorizedAnalyzer()
+    tohlc = make_tohlc(10)
+    for invalid in [tohlc[:, 1:], tohlc.ravel(), tohlc.T]:
+        with pytest.raises(ValueError):
+            vec.calcTrueRange(invalid)
+    assert len(vec.calcTrueRange([])) == 0
@@ -0,0 +1,71 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_api_client.py
+tests of APIClient
+"""
+
+import os
+import pickle
+import sys
+import time
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from APIClient import APIClient, TokenBucket
+
+class FlakyAPI(object):
+    """an API failing `n_failures` times before every success"""
+    def __init__(self, n_failures=2):
+        self.n_failures = n_failures
+        self.calls = 0
+        self.timeout = 2.0
+
+    def _flaky(self, result):
+        self.calls += 1
+        if self.calls % (self.n_failures + 1) != 0:
+            raise ConnectionError("fake error")
+        return result
+
+    def ticker(self, product_code="FX_BTC_JPY"):
+        return self._flaky({"product_code":product_code, "ltp":400000})
+
+    def request(self, endpoint, method="GET", params=None):
+        return self._flaky([endpoint])
+
+    def sendchildorder(self, **params):
+        return self._flaky({"child_order_acceptance_id":"JRF0"})
+
+def test_retry_and_stats():
+    api = APIClient(FlakyAPI(2), rate=None, max_retries=2, base_delay=0.)
+    assert api.ticker(product_code="BTC_JPY")["product_code"] == "BTC_JPY"
+    assert api.request("/v1/markets") == ["/v1/markets"]
+    assert api.timeout == 2.0
+    stats = api.stats
+    assert stats["ticker"]["calls"] == 3 and stats["ticker"]["errors"] == 2
+    assert stats["/v1/markets"]["retries"] == 2
+
+    api = APIClient(FlakyAPI(3), rate=None, max_retries=2, base_delay=0.)
+    with pytest.raises(ConnectionError):
+        api.ticker()
+    assert api.api.calls == 3
+
+def test_no_retry_of_orders():
+    api = APIClient(FlakyAPI(5), rate=None, max_retries=5, base_delay=0.)
+    with pytest.raises(ConnectionError):
+        api.sendchildorder(side="BUY", size=0.01)
+    with pytest.raises(ConnectionError):
+        api.request("/v1/me/sendchildorder", "POST", {})
+    assert api.api.calls == 2
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=100., capacity=5)
+    st = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    elapsed = time.monotonic() - st
+    assert 0.08 < elapsed < 0.5
+
+    api = pickle.loads(pickle.dumps(APIClient(FlakyAPI(0), rate=10.)))
+    assert api.ticker()["ltp"] == 400000
@@ -0,0 +1,40 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_backtest.py
+tests of run_backtest
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from backtest import run_backtest
+
+@pytest.mark.parametrize("benefit_timing", ["worst", "mean", "open"])
+@pytest.mark.parametrize("use_patterns", [False, True])
+def test_parity_with_bar_loop(DataAdapter, make_ohlcv, benefit_timing, use_patterns):
+    df = make_ohlcv(1546300800, 1000, seed=3)
+    adapter = DataAdapter(df=df.iloc[:1], api=object(), N_ema1=5, N_ema2=12, delta=100., N_dec=3)
+    adapter.benefit_timing = benefit_timing
+    if use_patterns:
+        adapter._golden_patterns = np.array([0, 3, 5, 6])
+        adapter._dead_patterns = np.array([1, 2, 7])
+    adapter._df_initialized = True
+    adapter.initOHLCVData()
+    # judgeCrossPoint, judgeExtremePoint, updateExecutionState and orderProcess bar by bar
+    for ii in range(1, len(df)):
+        adapter.append_bars(df.iloc[ii:ii + 1])
+
+    results = run_backtest(
+        df[["open", "high", "low", "close"]].values, adapter.ema1, adapter.ema2, adapter.dec,
+        100., benefit_timing, adapter._golden_patterns, adapter._dead_patterns
+    )
+    assert np.count_nonzero(results["benefit_list"]) > 10
+    for key in ["cross_signal", "extreme_signal", "benefit_list", "jpy_list"]:
+        np.testing.assert_allclose(results[key], getattr(adapter, key), err_msg=key)
+    assert results["current_state"] == adapter.current_state
+    assert results["order_ltp"] == adapter.order_ltp
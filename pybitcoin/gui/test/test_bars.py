@@ -0,0 +1,81 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_bars.py
+tests of the bar builder
+"""
+
+from datetime import datetime, timedelta
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from bars import executions_to_ohlcv, parse_bar_size, parse_executions, split_closed_bars
+
+def ohlcv_by_pandas(executions, bar_seconds):
+    df = pd.DataFrame(executions)
+    grouped = df.groupby(np.floor_divide(df["time"], bar_seconds).astype(np.int64))
+    return pd.DataFrame({
+        "time":grouped["time"].first().index.values * bar_seconds,
+        "id_start":grouped["id"].first().values, "id_end":grouped["id"].last().values,
+        "open":grouped["price"].first().values, "high":grouped["price"].max().values,
+        "low":grouped["price"].min().values, "close":grouped["price"].last().values,
+        "volume":grouped["size"].sum().values,
+    })
+
+def test_parse_bar_size():
+    assert [parse_bar_size(bar) for bar in ["1s", "10s", "1m", "5m", "1h", 30]] == \
+           [1, 10, 60, 300, 3600, 30]
+    for bar in ["5x", "m", "0s"]:
+        with pytest.raises(ValueError):
+            parse_bar_size(bar)
+
+def test_parse_executions():
+    results = [
+        {"id":2, "exec_date":"2019-01-01T00:00:01.5", "price":1., "size":0.1, "side":"SELL"},
+        {"id":1, "exec_date":"2019-01-01T00:00:00", "price":2., "size":0.2, "side":"BUY"},
+    ]
+    executions = parse_executions(results)
+    np.testing.assert_array_equal(executions["id"], [1, 2])
+    np.testing.assert_allclose(executions["time"] - 1546300800., [0., 1.5])
+    np.testing.assert_array_equal(executions["side"], [1, -1])
+
+@pytest.mark.parametrize("bar", ["1s", "10s", "1m", "5m", "1h"])
+def test_executions_to_ohlcv(bar, FakeAPI):
+    executions = parse_executions(FakeAPI(N=20000, seed=2).results)
+    ohlcv = executions_to_ohlcv(executions, bar)
+    expected = ohlcv_by_pandas(executions, parse_bar_size(bar))
+    np.testing.assert_allclose(ohlcv.values.astype(float), expected.values.astype(float))
+
+def test_split_closed_bars(FakeAPI):
+    executions = parse_executions(FakeAPI(N=5000, seed=3).results)
+    bars, pending = [], executions[:0]
+    for page in np.array_split(executions, 17):
+        closed, pending = split_closed_bars(np.concatenate((pending, page)), "1m")
+        bars.append(closed)
+    bars.append(executions_to_ohlcv(pending, "1m"))
+    np.testing.assert_allclose(
+        pd.concat(bars).values.astype(float), executions_to_ohlcv(executions, "1m").values.astype(float)
+    )
+
+def test_get_ohlcv_until_newest(FakeAPI):
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "scripts"))
+    from get_ohlcv_from_executions import get_ohlcv
+    api = FakeAPI(N=3000, seed=4)
+    # a gap of ids below the newest execution
+    api.ids[1500:] += 5000
+    for result, id_ in zip(api.results, api.ids):
+        result["id"] = int(id_)
+    executions = parse_executions(api.results)
+    # the data end 30 minutes before te (in JST)
+    te = datetime(1970, 1, 1, 9) + timedelta(seconds=float(executions["time"][-1]) + 1800.)
+    ohlcv = get_ohlcv(datetime(2019, 1, 1, 9), te, api, id_start=int(api.ids[0]))
+    expected, _ = split_closed_bars(executions, 60)
+    assert api.calls < 50
+    assert len(ohlcv) == len(expected)
+    for key in ["id_start", "id_end", "open", "high", "low", "close", "volume"]:
+        np.testing.assert_allclose(ohlcv[key].values, expected[key].values)
@@ -0,0 +1,71 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_bot_sweep.py
+tests of functions in bot_sweep.py
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from bot_sweep import BOT_DEFAULTS, run_bot_backtest, sweep_bot_params
+
+def make_ltp(N=3000, seed=0):
+    rng = np.random.RandomState(seed)
+    return 400000. + np.cumsum(rng.randint(-300, 301, N)).astype(float)
+
+def process_bot2(ltp, size, spread, threshold, tick_count_order, tick_count_stop, profit_taking,
+                 loss_cutting, cutting_ratio, **kwargs):
+    """the same steps as BotBase._process of Bot2 for every ticker"""
+    ltp_list, pnl_list, benefits = [], [], []
+    side, tick_count, price = 0, 0, None
+    for ltp_ in ltp:
+        ltp_list.append(ltp_)
+        pnl_list.append(0. if side == 0 else (ltp_ - price) * size * side)
+        tick_count += 1
+        if side == 0 and tick_count >= tick_count_order:
+            diff = sum(ltp_list[-tick_count_order:]) - tick_count_order * ltp_list[-tick_count_order]
+            new_side = 1 if diff >= threshold else -1 if diff <= -threshold else 0
+            if new_side != 0:
+                side, tick_count, price = new_side, 0, ltp_ + new_side * spread / 2.
+        elif side != 0 and tick_count >= tick_count_stop:
+            sum_pnl = sum(pnl_list[-tick_count_stop:])
+            if sum_pnl >= profit_taking or sum_pnl <= -loss_cutting or pnl_list[-1] > cutting_ratio * profit_taking:
+                benefits.append(side * (ltp_ - side * spread / 2. - price) * size)
+                side, tick_count = 0, 0
+        if len(ltp_list) > 100:
+            ltp_list.pop(0)
+            pnl_list.pop(0)
+    if side != 0:
+        benefits.append(side * (ltp[-1] - price) * size)
+    return benefits
+
+def test_run_bot_backtest():
+    ltp = make_ltp()
+    for params in [dict(threshold=500., tick_count_order=10, profit_taking=10., loss_cutting=20.),
+                   dict(threshold=0., tick_count_order=4, profit_taking=0., loss_cutting=0.)]:
+        result = run_bot_backtest(ltp, "Bot2", size=0.01, spread=20., **params)
+        expected = process_bot2(ltp, 0.01, 20., **dict(BOT_DEFAULTS["Bot2"], **params))
+        np.testing.assert_allclose(result["benefits"], expected)
+        assert result["n_trades"] == len(expected)
+    with pytest.raises(ValueError):
+        run_bot_backtest(ltp, "Bot4")
+
+def test_sweep_bot_params():
+    ltp = make_ltp()
+    grid = {"ema_points":[10, 20], "profit_taking":[300., 1000., 3000.], "loss_cutting":[500., 1000.]}
+    serial = sweep_bot_params(ltp, "Bot3", grid, max_workers=1)
+    parallel = sweep_bot_params(ltp, "Bot3", grid, max_workers=2)
+    assert serial["axes"] == list(grid.items()) and serial["pnl"].shape == (2, 3, 2)
+    for key in ["pnl", "n_trades", "win_rate", "max_drawdown"]:
+        np.testing.assert_array_equal(serial[key], parallel[key])
+
+    index = np.unravel_index(np.nanargmax(serial["pnl"]), serial["pnl"].shape)
+    assert serial["best"] == {key:values[ii] for (key, values), ii in zip(grid.items(), index)}
+    assert serial["pnl"][1, 2, 0] == pytest.approx(
+        run_bot_backtest(ltp, "Bot3", ema_points=20, profit_taking=3000., loss_cutting=500.)["pnl"]
+    )
@@ -0,0 +1,86 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_data_adapter.py
+tests of DataAdapter
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from bars import executions_to_ohlcv, parse_executions
+from ExchangeSimulator import ExchangeSimulator
+from MarketFeed import MarketFeed
+
+def make_adapter(DataAdapter, df, **kwargs):
+    kwargs = dict(dict(N_ema_min=5, N_ema_max=12, N_dec=3), **kwargs)
+    return DataAdapter(df=df, api=object(), **kwargs)
+
+def test_snapshot_keeps_store(DataAdapter, make_ohlcv):
+    df = make_ohlcv(1546300800, 600)
+    expected = make_adapter(DataAdapter, df.iloc[:500]).sweepAnalysisData(max_workers=1)
+
+    adapter = make_adapter(DataAdapter, df.iloc[:500])
+    snapshot = adapter.snapshotAnalysisData()
+    store = snapshot._store
+    # the new bars release the store of the adapter while the snapshot uses it
+    adapter.append_bars(df.iloc[500:])
+    assert len(adapter.data) == 600 and adapter.store is not store
+    assert store._shm is not None
+    np.testing.assert_array_equal(store["close"], df["close"].values[:500])
+
+    results = snapshot.sweepAnalysisData(max_workers=1)
+    np.testing.assert_array_equal(results["benefit_map"], expected["benefit_map"])
+    assert store._shm is None
+    assert adapter._store_users == {} and adapter._retired_stores == {}
+    with pytest.raises(ValueError):
+        snapshot.sweepAnalysisData(max_workers=1)
+
+def test_feed_bars_appended_once(DataAdapter, FakeAPI):
+    executions = parse_executions(FakeAPI(N=5000).results)
+    api = ExchangeSimulator(executions, start=executions["time"][1000])
+    adapter = DataAdapter(api=api)
+    feed = MarketFeed(api, adapter)
+    for ii in range(12):
+        api.advance(37.)
+        feed.put(feed.fetch_once())
+        if ii % 3 == 2:
+            # as ChartWindow.update, which takes the latest snapshot
+            snapshot = feed.get(timeout=0.)
+            adapter.initOHLCVData()
+            adapter.append_bars(snapshot["dataset"])
+            adapter.append_bars(snapshot["dataset"]) # appended twice by mistake
+    assert feed.dropped == 8
+
+    data = adapter.data
+    expected = executions_to_ohlcv(executions[executions["id"] >= data["id_start"].values[0]])
+    assert len(data) > 5
+    for key in ["time", "open", "high", "low", "close", "volume"]:
+        np.testing.assert_allclose(data[key].values, expected[key].values[:len(data)])
+
+def test_append_bars_matches_rebuild(DataAdapter, make_ohlcv):
+    keys = ["jpy_list", "benefit_list", "cross_signal", "extreme_signal", "dec", "ema1", "ema2",
+            "ohlc_list", "timestamp", "volume_list", "close_list"]
+    for seed in range(6):
+        rng = np.random.RandomState(seed)
+        df = make_ohlcv(1546300800, int(rng.randint(100, 800)), seed=seed)
+        kwargs = dict(N_ema1=int(rng.randint(2, 8)), N_ema2=int(rng.randint(9, 20)),
+                      delta=float(rng.choice([30., 100., 300.])), N_dec=int(rng.randint(1, 6)))
+        full = make_adapter(DataAdapter, df, **kwargs)
+        k = int(rng.randint(1, len(df) - 1))
+        adapter = make_adapter(DataAdapter, df.iloc[:k], **kwargs)
+        while k < len(df):
+            m = int(rng.randint(1, 50))
+            adapter.append_bars(df.iloc[k:k + m])
+            k += m
+        for key in keys:
+            np.testing.assert_allclose(
+                np.array(getattr(adapter, key), dtype=float), np.array(getattr(full, key), dtype=float),
+                err_msg=key
+            )
+        assert (adapter.current_state, adapter.order_ltp) == (full.current_state, full.order_ltp)
+        assert len(adapter.data) == len(df)
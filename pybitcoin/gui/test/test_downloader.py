@@ -0,0 +1,68 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_downloader.py
+tests of ExecutionDownloader
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from bars import executions_to_ohlcv, parse_executions
+from ExecutionDownloader import ExecutionDownloader
+
+def test_download_and_resume(tmp_path, FakeAPI):
+    api = FakeAPI(fail_before=3000)
+    id_start, id_end = int(api.ids[100]), int(api.ids[-100])
+    downloader = ExecutionDownloader(api, str(tmp_path), count=100, segment_size=1000,
+                                     max_workers=3, rate=None, max_retries=1, base_delay=0.)
+    with pytest.raises(ConnectionError):
+        downloader.download(id_start, id_end)
+    n_saved = len(os.listdir(str(tmp_path)))
+    assert n_saved > 0
+
+    api.fail_before = None
+    api.calls = 0
+    progress = []
+    executions = downloader.download(id_start, id_end, callback=lambda *args: progress.append(args))
+    expected = parse_executions(api.results[100:-99])
+    np.testing.assert_array_equal(executions, expected)
+    assert progress[0] == (n_saved, len(downloader.segments(id_start, id_end)))
+    assert api.calls < 0.6 * len(expected) / 100
+
+    ohlcv = executions_to_ohlcv(executions)
+    assert ohlcv["volume"].sum() == pytest.approx(expected["size"].sum())
+    assert np.all(np.diff(ohlcv["time"].values) > 0)
+    assert ohlcv["id_start"].values[0] == id_start and ohlcv["id_end"].values[-1] == id_end
+    for _, bar in ohlcv.iloc[[0, len(ohlcv) // 2]].iterrows():
+        price = expected["price"][(expected["id"] >= bar["id_start"]) & (expected["id"] <= bar["id_end"])]
+        assert (bar["open"], bar["high"], bar["low"], bar["close"]) == \
+               (price[0], price.max(), price.min(), price[-1])
+
+def test_overlapping_segments(tmp_path, FakeAPI):
+    api = FakeAPI()
+    downloader = ExecutionDownloader(api, str(tmp_path), count=100, segment_size=1000, rate=None)
+    ids = [int(id_) for id_ in api.ids]
+    downloader.download(ids[0], ids[2000])
+    executions = downloader.download(ids[500], ids[2500])
+    np.testing.assert_array_equal(executions, parse_executions(api.results[500:2501]))
+    np.testing.assert_array_equal(downloader.load(ids[0], ids[2500]), parse_executions(api.results[:2501]))
+
+def test_segment_beyond_newest(tmp_path, FakeAPI):
+    grown = FakeAPI(N=4000)
+    api = FakeAPI(N=4000)
+    api.ids, api.results = grown.ids[:3000], grown.results[:3000]
+    downloader = ExecutionDownloader(api, str(tmp_path), count=100, segment_size=2000, rate=None)
+    id_start, id_end = int(api.ids[0]), int(api.ids[-1]) + 500
+    np.testing.assert_array_equal(downloader.download(id_start, id_end), parse_executions(api.results))
+
+    # the segment beyond the newest execution is downloaded again
+    api.ids, api.results = grown.ids, grown.results
+    expected = parse_executions([result for result in grown.results if result["id"] <= id_end])
+    assert len(expected) > 3000
+    np.testing.assert_array_equal(downloader.download(id_start, id_end), expected)
+    assert not any(fname.startswith("partial_") for fname in os.listdir(str(tmp_path)))
@@ -0,0 +1,104 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_exchange_simulator.py
+tests of ExchangeSimulator
+"""
+
+from datetime import datetime
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from APIClient import as_client
+from bars import parse_executions
+from ExchangeSimulator import ExchangeSimulator, SimulatedError
+from ExecutionDownloader import ExecutionDownloader
+from SessionAPI import SessionAPI
+
+def make_simulator(FakeAPI, **kwargs):
+    fake = FakeAPI(N=2000)
+    return fake, ExchangeSimulator(parse_executions(fake.results), **kwargs)
+
+def test_executions_paging(tmp_path, FakeAPI):
+    fake, api = make_simulator(FakeAPI)
+    for params in [dict(count=100), dict(count=50, before=int(fake.ids[500])),
+                   dict(count=500, before=int(fake.ids[300]), after=int(fake.ids[100]))]:
+        results = api.executions(product_code="FX_BTC_JPY", **params)
+        assert [{key:result[key] for key in expected} for result, expected
+                in zip(results, fake.executions(**params))] == fake.executions(**params)
+
+    # the data paths run against the simulator as against bitFlyer
+    downloader = ExecutionDownloader(api, str(tmp_path), count=100, segment_size=500, rate=None)
+    executions = downloader.download(int(fake.ids[10]), int(fake.ids[-10]))
+    np.testing.assert_array_equal(executions, parse_executions(fake.results[10:-9]))
+
+def test_clock(FakeAPI):
+    fake, api = make_simulator(FakeAPI, start=datetime(2019, 1, 1, 0, 1), step=1.)
+    assert api.ticker(product_code="FX_BTC_JPY")["timestamp"] == "2019-01-01T00:01:01.000"
+    latest = api.executions(product_code="FX_BTC_JPY", count=1)[0]
+    assert "2019-01-01T00:01:01.000" < latest["exec_date"] <= "2019-01-01T00:01:02.000"
+    assert latest["price"] == api.ltp
+    assert api.getboardstate(product_code="FX_BTC_JPY") == {"health":"NORMAL", "state":"RUNNING"}
+
+def test_orders_and_positions(FakeAPI):
+    fake, api = make_simulator(FakeAPI, start=datetime(2019, 1, 1, 0, 1), spread=2.)
+    ltp = api.ltp
+    id_ = api.sendchildorder(product_code="FX_BTC_JPY", child_order_type="MARKET", side="BUY",
+                             size=0.1)["child_order_acceptance_id"]
+    order = api.getchildorders(product_code="FX_BTC_JPY", child_order_acceptance_id=id_)[0]
+    assert order["child_order_state"] == "COMPLETED" and order["average_price"] == ltp + 1.
+    assert order["price"] == 0. # as bitFlyer reports a MARKET order
+    position = api.getpositions(product_code="FX_BTC_JPY")[0]
+    assert position["side"] == "BUY" and position["size"] == pytest.approx(0.1)
+    assert api.getcollateral()["open_position_pnl"] == pytest.approx(-0.1)
+
+    # a limit order is filled when an execution reaches its price
+    price = 400036. # the highest price of FakeAPI
+    id_ = api.sendchildorder(product_code="FX_BTC_JPY", child_order_type="LIMIT", side="SELL",
+                             price=price, size=0.1)["child_order_acceptance_id"]
+    assert api.getchildorders(product_code="FX_BTC_JPY", child_order_state="ACTIVE")[0]["price"] == price
+    api.advance(60.)
+    assert api.getchildorders(product_code="FX_BTC_JPY",
+                              child_order_acceptance_id=id_)[0]["child_order_state"] == "COMPLETED"
+    assert api.getpositions(product_code="FX_BTC_JPY") == []
+    assert api.getcollateral()["collateral"] == pytest.approx(1000000. + 0.1 * (price - ltp - 1.))
+    assert len(api.getexecutions(product_code="FX_BTC_JPY")) == 2
+
+    id_ = api.sendchildorder(product_code="FX_BTC_JPY", child_order_type="LIMIT", side="BUY",
+                             price=1., size=0.1)["child_order_acceptance_id"]
+    api.cancelallchildorders(product_code="FX_BTC_JPY")
+    assert api.getchildorders(product_code="FX_BTC_JPY",
+                              child_order_acceptance_id=id_)[0]["child_order_state"] == "CANCELED"
+
+def test_error_injection(FakeAPI):
+    fake, api = make_simulator(FakeAPI, error_rate=0.5, seed=1)
+    n_errors = 0
+    for _ in range(20):
+        try:
+            api.ticker(product_code="FX_BTC_JPY")
+        except SimulatedError:
+            n_errors += 1
+    assert 0 < n_errors < 20
+
+    client = as_client(api, rate=None, max_retries=20, base_delay=0.)
+    assert client.ticker(product_code="FX_BTC_JPY")["ltp"] == api.ltp
+
+def test_http(FakeAPI):
+    fake, api = make_simulator(FakeAPI, start=datetime(2019, 1, 1, 0, 1))
+    server, url = api.serve()
+    try:
+        remote = SessionAPI(api_key="key", api_secret="secret", timeout=2.)
+        remote.api_url = url
+        assert remote.executions(product_code="FX_BTC_JPY", count=10) == \
+            api.executions(product_code="FX_BTC_JPY", count=10)
+        id_ = remote.sendchildorder(product_code="FX_BTC_JPY", child_order_type="MARKET", side="SELL",
+                                    size=0.01)["child_order_acceptance_id"]
+        assert api.getchildorders(product_code="FX_BTC_JPY")[0]["child_order_acceptance_id"] == id_
+        assert remote.getpositions(product_code="FX_BTC_JPY")[0]["side"] == "SELL"
+    finally:
+        server.shutdown()
+        server.server_close()
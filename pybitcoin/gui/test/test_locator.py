@@ -0,0 +1,51 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_locator.py
+tests of ExecutionLocator
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from bars import parse_executions
+from ExecutionLocator import ExecutionLocator
+
+def test_locate(tmp_path, FakeAPI):
+    api = FakeAPI(N=100000, seed=1)
+    executions = parse_executions(api.results)
+    times = executions["time"]
+    index_path = str(tmp_path / "id_index.npy")
+    rng = np.random.RandomState(0)
+    targets = np.concatenate((
+        rng.uniform(times[0], times[-1], 20),
+        [times[0] - 10., times[0], times[1000], times[-1], times[-1] + 10.]
+    ))
+    requests = []
+    for t in targets:
+        locator = ExecutionLocator(api, index_path)
+        k = np.searchsorted(times, t, "left")
+        expected = executions["id"][k - 1] + 1 if k > 0 else executions["id"][0]
+        assert locator.locate(t) == expected
+        requests.append(locator.requests)
+    # much less than the linear search with about 200 pages
+    assert max(requests[:5]) <= 12
+    assert np.mean(requests[5:]) <= 3 # the saved index narrows the search
+    assert len(ExecutionLocator(api, index_path).index) > 10
+
+def test_locate_over_gap(FakeAPI):
+    # no ids between the two halves
+    api = FakeAPI(N=3000, seed=2)
+    api.ids[1500:] += 100000
+    for result, id_ in zip(api.results, api.ids):
+        result["id"] = int(id_)
+    executions = parse_executions(api.results)
+    times = executions["time"]
+    for t in [(times[1499] + times[1500]) / 2., times[1500], times[1499], times[100], times[2900]]:
+        k = np.searchsorted(times, t, "left")
+        locator = ExecutionLocator(api)
+        assert locator.locate(t) == executions["id"][k - 1] + 1
+        assert locator.requests <= 12
@@ -0,0 +1,76 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_market_feed.py
+tests of MarketFeed
+"""
+
+import os
+import sys
+import threading
+import time
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from APIClient import APIClient
+from MarketFeed import MarketFeed
+
+class SlowAPI(object):
+    """a fake of pybitflyer.API whose requests take `latency` seconds"""
+    def __init__(self, latency=0.1):
+        self.latency = latency
+        self.threads = set()
+
+    def _wait(self):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.latency)
+
+    def ticker(self, product_code="FX_BTC_JPY"):
+        self._wait()
+        return {"product_code":product_code, "ltp":400000.}
+
+    def getcollateral(self):
+        self._wait()
+        return {"collateral":100000.}
+
+    def getboardstate(self):
+        self._wait()
+        raise ConnectionError("fake error")
+
+def test_fetch_concurrently():
+    api = SlowAPI(0.1)
+    st = time.time()
+    snapshot = MarketFeed(api).fetch_once()
+    assert time.time() - st < 0.25 # not the sum of the three requests
+    assert snapshot["market_data"]["ltp"] == 400000.
+    assert snapshot["collateral"]["collateral"] == 100000.
+    assert snapshot["health"] is None and isinstance(snapshot["errors"]["health"], ConnectionError)
+    assert len(api.threads) == 3
+
+def test_start_and_stop():
+    feed = MarketFeed(SlowAPI(0.01), interval=0.02)
+    feed.start()
+    snapshots = [feed.get(timeout=1.) for _ in range(5)]
+    feed.stop(timeout=1.)
+    assert not feed.is_running()
+    assert all(snapshot is not None for snapshot in snapshots)
+    assert all(s1["time"] < s2["time"] for s1, s2 in zip(snapshots[:-1], snapshots[1:]))
+
+    # only the latest snapshot is kept for a slow consumer
+    time.sleep(0.1)
+    feed.start()
+    time.sleep(0.2)
+    feed.stop(timeout=1.)
+    assert feed.dropped > 0
+    assert feed.get(timeout=0.) is not None and feed.get(timeout=0.) is None
+
+def test_interval_within_budget():
+    api = APIClient(SlowAPI(0.), rate=500./300.)
+    with pytest.warns(UserWarning):
+        feed = MarketFeed(api, interval=0.5)
+    # four requests per tick within a half of 500 requests per 5 minutes
+    assert feed.interval == pytest.approx(4.8)
+    assert MarketFeed(api, interval=None, share=0.8).interval == pytest.approx(3.)
+    assert MarketFeed(api, interval=10.).interval == 10.
+    assert MarketFeed(SlowAPI(0.), interval=0.02).interval == 0.02
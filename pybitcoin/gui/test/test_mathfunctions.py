@@ -0,0 +1,120 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_mathfunctions.py
+tests of functions in mathfunctions.py
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from mathfunctions import ema_kernel, ema_kernel_batch, find_cross_points, find_extreme_points, encode_patterns, roll_pattern, rolling_max, rolling_min, peakdet
+
+def calc_EMA_by_loop(x, alpha):
+    ema = []
+    for ii in range(len(x)):
+        if ii == 0:
+            ema.append(1 * x[0])
+        else:
+            ema.append((1. - alpha) * ema[-1] + alpha * x[ii])
+    return np.array(ema, dtype=float)
+
+def test_ema_kernel():
+    x = np.random.RandomState(0).randint(390000, 410000, 1000).astype(float)
+    for N in [1, 5, 20, 100]:
+        alpha = 2. / (N + 1.)
+        np.testing.assert_array_equal(ema_kernel(x, alpha), calc_EMA_by_loop(x, alpha))
+
+        # continue from the last state
+        ema = ema_kernel(x[:600], alpha)
+        np.testing.assert_allclose(
+            np.hstack((ema, ema_kernel(x[600:], alpha, ema[-1]))), 
+            calc_EMA_by_loop(x, alpha), rtol=1e-12
+        )
+    assert len(ema_kernel([], 0.5)) == 0
+
+def test_ema_kernel_batch():
+    x = np.random.RandomState(1).randint(390000, 410000, 1000).astype(float)
+    alphas = 2. / (np.arange(1, 31) + 1.)
+    ema = ema_kernel_batch(x, alphas)
+    assert ema.shape == (len(alphas), len(x))
+    for ii, alpha in enumerate(alphas):
+        np.testing.assert_array_equal(ema[ii], ema_kernel(x, alpha))
+
+def find_cross_points_by_loop(y1, y2):
+    cross_points = np.zeros(len(y1))
+    for ii in range(1, len(y1)):
+        if y1[ii - 1] >= y2[ii - 1] and y1[ii] < y2[ii]:
+            cross_points[ii] = -1
+        elif y1[ii - 1] < y2[ii - 1] and y1[ii] >= y2[ii]:
+            cross_points[ii] = 1
+    return cross_points
+
+def find_extreme_points_by_loop(y, delta, look_for_max=True):
+    extreme_points = np.zeros(len(y))
+    current_max, current_min = -np.inf, np.inf
+    for ii, v in enumerate(y):
+        current_max = max(v, current_max)
+        current_min = min(v, current_min)
+        if look_for_max and v < current_max - delta:
+            extreme_points[ii] = 1.
+            look_for_max = False
+            current_min = v
+        elif (not look_for_max) and v > current_min + delta:
+            extreme_points[ii] = -1.
+            look_for_max = True
+            current_max = v
+    return extreme_points
+
+def test_find_cross_points():
+    x = np.random.RandomState(2).randint(390000, 410000, 5000).astype(float)
+    ema1 = ema_kernel(x, 2. / 6.)
+    ema2 = ema_kernel(x, 2. / 13.)
+    np.testing.assert_array_equal(find_cross_points(ema1, ema2), find_cross_points_by_loop(ema1, ema2))
+    np.testing.assert_array_equal(find_cross_points(list(ema1 - ema2)), find_cross_points_by_loop(ema1 - ema2, np.zeros(len(x))))
+
+def test_find_extreme_points():
+    x = np.cumsum(np.random.RandomState(3).randint(-300, 301, 5000)).astype(float)
+    for delta in [0., 10., 300., 3000.]:
+        for look_for_max in [True, False]:
+            np.testing.assert_array_equal(
+                find_extreme_points(x, delta, look_for_max), 
+                find_extreme_points_by_loop(x, delta, look_for_max)
+            )
+
+def test_encode_patterns():
+    bits = np.random.RandomState(0).randint(0, 2, 1000)
+    for N_dec in [1, 3, 5, 40]:
+        expected = np.zeros(len(bits), dtype=int)
+        for ii in range(N_dec - 1, len(bits)):
+            expected[ii] = int("".join([str(b) for b in bits[ii-N_dec+1:ii+1]]), 2)
+        np.testing.assert_array_equal(encode_patterns(bits, N_dec), expected)
+
+        # streaming update with a rolling bitmask
+        dec, rolled = 0, []
+        for bit in bits:
+            dec = roll_pattern(dec, bit, N_dec)
+            rolled.append(dec)
+        np.testing.assert_array_equal(np.array(rolled)[N_dec-1:], expected[N_dec-1:])
+    assert len(encode_patterns(bits[:3], 5)) == 3
+
+def test_rolling_extrema():
+    x = np.random.RandomState(0).randint(-1000, 1000, 500).astype(float)
+    for N in [1, 2, 7, 64, 1000]:
+        expected_max = [x[max(0, ii-N+1):ii+1].max() for ii in range(len(x))]
+        expected_min = [x[max(0, ii-N+1):ii+1].min() for ii in range(len(x))]
+        np.testing.assert_array_equal(rolling_max(x, N), expected_max)
+        np.testing.assert_array_equal(rolling_min(x, N), expected_min)
+    assert len(rolling_max([], 5)) == 0
+
+def test_peakdet():
+    v = np.cumsum(np.random.RandomState(1).randint(-10, 11, 1000))
+    maxtab, mintab = peakdet(v, 30)
+    ext = find_extreme_points(v, 30)
+    # each peak is reported when the extreme point of the hysteresis is found
+    assert len(maxtab) == (ext == 1).sum()
+    assert len(mintab) == (ext == -1).sum()
+    np.testing.assert_array_equal(maxtab[:, 1], v[maxtab[:, 0].astype(int)])
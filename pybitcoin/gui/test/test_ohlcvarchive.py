@@ -0,0 +1,36 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_ohlcvarchive.py
+tests of OHLCVArchive
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from OHLCVArchive import OHLCVArchive
+
+def test_append_and_search(tmp_path, make_ohlcv):
+    fpath = str(tmp_path / "OHLCV.bin")
+    t0 = 1546300800
+    df = make_ohlcv(t0, 1000)
+    archive = OHLCVArchive(fpath)
+    assert len(archive) == 0 and len(archive.read()) == 0
+    assert archive.append(df.iloc[:600]) == 600
+    assert archive.append(df.iloc[500:]) == 400
+    assert archive.append(df) == 0
+
+    archive = OHLCVArchive(fpath)
+    np.testing.assert_array_equal(archive.read()[df.columns].values, df.values)
+
+    start, end = t0 + 100 * 60 + 1, t0 + 200 * 60
+    expected = df[(df["time"] >= start) & (df["time"] < end)]
+    np.testing.assert_array_equal(archive.read(start, end)[df.columns].values, expected.values)
+
+    id_ = df["id_start"].values[300] + 1
+    assert archive.search_id(id_) == 300
+    actual = archive.read_ids(id_, df["id_end"].values[310])
+    np.testing.assert_array_equal(actual["time"].values, df["time"].values[300:311])
@@ -0,0 +1,42 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_ohlcvstore.py
+tests of OHLCVStore
+"""
+
+import os
+import pickle
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from OHLCVStore import OHLCVStore
+
+def make_df(N=100):
+    rng = np.random.RandomState(0)
+    close = 400000 + np.cumsum(rng.randint(-300, 301, N))
+    return pd.DataFrame({
+        "time":np.arange(N) * 60., "open":close - 10, "high":close + 100,
+        "low":close - 100, "close":close, "volume":rng.uniform(0, 10, N)
+    })
+
+def test_attach_without_copy():
+    df = make_df()
+    with OHLCVStore.from_dataframe(df) as store:
+        other = pickle.loads(pickle.dumps(store.handle)).attach()
+        np.testing.assert_array_equal(other.ohlc, df[["open", "high", "low", "close"]].values)
+        store["close"][0] = 0.
+        assert other["close"][0] == 0.
+        other.close()
+
+def test_pickle_and_dataframe():
+    df = make_df()
+    with OHLCVStore.from_dataframe(df) as store:
+        copied = pickle.loads(pickle.dumps(store))
+        assert copied.handle.name != store.handle.name
+        pd.testing.assert_frame_equal(copied.to_dataframe(), store.to_dataframe())
+        np.testing.assert_array_equal(store.to_dataframe()["volume"].values, df["volume"].values)
+        copied.close()
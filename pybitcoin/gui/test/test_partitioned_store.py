@@ -0,0 +1,34 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_partitioned_store.py
+tests of PartitionedStore
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from PartitionedStore import PartitionedStore
+
+def test_write_and_read(tmp_path, make_ohlcv):
+    store = PartitionedStore(str(tmp_path))
+    t0 = 1546300800 # 2019-01-01T00:00:00Z
+    df = make_ohlcv(t0, 3 * 1440)
+    store.write(df.iloc[:2000])
+    store.write(df.iloc[1500:])
+    assert store.partitions == ["20190101", "20190102", "20190103"]
+    assert store.columns == list(df.columns)
+
+    actual = store.read()
+    assert actual["id_start"].dtype == np.int64 and actual["close"].dtype == np.float64
+    np.testing.assert_array_equal(actual.values, df.values)
+
+    start, end = t0 + 1000 * 60, t0 + 1500 * 60
+    actual = store.read(["time", "close"], start, end)
+    expected = df[(df["time"] >= start) & (df["time"] < end)]
+    assert list(actual.columns) == ["time", "close"]
+    np.testing.assert_array_equal(actual.values, expected[["time", "close"]].values)
+    assert len(store.read(start=t0 + 10 * 86400)) == 0
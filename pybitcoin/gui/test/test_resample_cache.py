@@ -0,0 +1,51 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_resample_cache.py
+tests of ResampleCache
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from bars import resample_ohlcv
+from ResampleCache import ResampleCache
+
+def resample_by_pandas(df, rule):
+    indexed = df.set_index(pd.to_datetime(df["time"], unit="s"))
+    resampled = indexed.resample(rule).agg({
+        "time":"first", "id_start":"first", "id_end":"last", "open":"first",
+        "high":"max", "low":"min", "close":"last", "volume":"sum",
+    }).dropna()
+    resampled["time"] = resampled.index.values.astype("datetime64[s]").astype(np.int64)
+    return resampled.reset_index(drop=True)
+
+@pytest.mark.parametrize("bar, rule", [("5m", "5min"), ("15m", "15min"), ("1h", "1h"), ("1d", "1D")])
+def test_resample_ohlcv(bar, rule, make_ohlcv):
+    df = make_ohlcv(1546300800 + 37 * 60, 3 * 1440)
+    df = df.drop(np.arange(100, 400)).reset_index(drop=True) # a gap
+    np.testing.assert_allclose(
+        resample_ohlcv(df, bar).values.astype(float), resample_by_pandas(df, rule).values.astype(float)
+    )
+
+def test_extend_cache(tmp_path, make_ohlcv):
+    df = make_ohlcv(1546300800 + 7 * 60, 2 * 1440)
+    cache = ResampleCache(str(tmp_path))
+    N = 1000
+    for end in [N, N, N + 3, N + 100, len(df)]:
+        resampled = cache.get(df.iloc[:end], "1h")
+        np.testing.assert_allclose(
+            resampled.values.astype(float), resample_ohlcv(df.iloc[:end], "1h").values.astype(float)
+        )
+    assert cache.hits == 4
+    assert len(os.listdir(str(tmp_path))) == 1 # the old ranges are replaced
+
+    # another source range does not use the cache
+    cache.get(df.iloc[10:], "1h")
+    assert cache.hits == 4
+    assert len(os.listdir(str(tmp_path))) == 2
@@ -0,0 +1,56 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_streaming_indicators.py
+parity tests between TemporalAnalyzer and the streaming indicators
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from Analyzer import TemporalAnalyzer
+from StreamingIndicators import EMA, IndicatorRegistry, RollingExtremum
+
+def make_tohlc(N=300, seed=0):
+    rng = np.random.RandomState(seed)
+    close = 400000 + np.cumsum(rng.randint(-500, 501, N))
+    open_ = np.hstack((close[0] - 100, close[:-1]))
+    high = np.maximum(open_, close) + rng.randint(1, 300, N)
+    low = np.minimum(open_, close) - rng.randint(1, 300, N)
+    return np.vstack((np.arange(1, N + 1), open_, high, low, close)).T.astype(float)
+
+def test_parity_with_temporal_analyzer():
+    tohlc = make_tohlc()
+    ana = TemporalAnalyzer()
+    registry = IndicatorRegistry()
+    registry.subscribe("sma", "SMA", N=10)
+    registry.subscribe("ema", "EMA", alpha=2. / 11.)
+    registry.subscribe("rms", "RMSError", n=10, base=EMA(2. / 11.))
+    registry.subscribe("wpr", "WPercentR", n=14)
+    registry.subscribe("uo", "UltimateOscillator")
+    registry.subscribe("ao", "AwesomeOscillator")
+
+    history, close, ema, bp, tr = [], [], [], [], []
+    for bar in tohlc:
+        values = registry.update(bar)
+        history.append(bar)
+        close.append(bar[-1])
+        ema.append(ana.calcEMA(ema, close, 2. / 11.))
+        bp.append(ana.calcBuyingPressure(history))
+        tr.append(ana.calcTrueRange(history))
+        np.testing.assert_allclose(values["sma"], ana.calcSMA(close, 10), rtol=1e-12)
+        np.testing.assert_allclose(values["ema"], ema[-1], rtol=1e-12)
+        np.testing.assert_allclose(values["rms"], ana.calcRMSError(close, ema, 10), rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(values["wpr"], ana.calcWPercentR(history, 14), rtol=1e-12)
+        np.testing.assert_allclose(values["uo"], ana.calcUltimateOscillator(bp, tr), rtol=1e-12)
+        np.testing.assert_allclose(values["ao"], ana.calcAwesomeOscillator(history), rtol=1e-9, atol=1e-6)
+
+def test_rolling_extremum():
+    x = np.random.RandomState(1).randint(0, 100, 500)
+    highest, lowest = RollingExtremum(7, True), RollingExtremum(7, False)
+    for ii in range(len(x)):
+        assert highest.update(x[ii]) == x[max(0, ii-6):ii+1].max()
+        assert lowest.update(x[ii]) == x[max(0, ii-6):ii+1].min()
@@ -0,0 +1,70 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_sweep.py
+tests of functions in sweep.py
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from mathfunctions import dataset_for_boxplot, ema_kernel_batch
+from OHLCVStore import OHLCVStore
+from sweep import distribute_benefits, sweep_ema_pairs
+
+def make_dataset(N=1000, N_dec=3, seed=0):
+    rng = np.random.RandomState(seed)
+    close = 400000 + np.cumsum(rng.randint(-300, 301, N))
+    open_ = np.hstack((close[0] - 100, close[:-1]))
+    high = np.maximum(open_, close) + rng.randint(0, 200, N)
+    low = np.minimum(open_, close) - rng.randint(0, 200, N)
+    ohlc = np.vstack((open_, high, low, close)).T.astype(float)
+    dec = rng.randint(0, 2**N_dec, N)
+    return ohlc, dec
+
+def test_sweep_in_processes():
+    ohlc, dec = make_dataset()
+    ema_matrix = ema_kernel_batch(ohlc[:, -1], [2. / (N + 1.) for N in range(3, 9)])
+    progress = []
+    serial = sweep_ema_pairs(ohlc, dec, ema_matrix, 3, 3, 30., max_workers=1)
+    parallel = sweep_ema_pairs(ohlc, dec, ema_matrix, 3, 3, 30., max_workers=2, callback=progress.append)
+
+    np.testing.assert_array_equal(serial["benefit_map"], parallel["benefit_map"])
+    for key in ["stat_dead_list", "stat_golden_list"]:
+        np.testing.assert_array_equal(np.array(serial[key]), np.array(parallel[key]))
+    for key in ["dec_dead_list", "dec_golden_list"]:
+        for row1, row2 in zip(serial[key], parallel[key]):
+            for arr1, arr2 in zip(row1, row2):
+                np.testing.assert_array_equal(arr1, arr2)
+    assert progress[-1]["done"] == progress[-1]["total"] == 15
+    np.testing.assert_array_equal(progress[-1]["benefit_map"], serial["benefit_map"])
+
+def test_sweep_with_store():
+    ohlc, dec = make_dataset()
+    ema_matrix = ema_kernel_batch(ohlc[:, -1], [2. / (N + 1.) for N in range(3, 9)])
+    expected = sweep_ema_pairs(ohlc, dec, ema_matrix, 3, 3, 30., max_workers=1)
+    with OHLCVStore.from_arrays(np.arange(len(ohlc)), *ohlc.T, np.ones(len(ohlc))) as store:
+        actual = sweep_ema_pairs(store, dec, ema_matrix, 3, 3, 30., max_workers=2)
+    np.testing.assert_array_equal(expected["benefit_map"], actual["benefit_map"])
+    np.testing.assert_array_equal(np.array(expected["stat_dead_list"]), np.array(actual["stat_dead_list"]))
+
+def test_distribute_benefits():
+    rng = np.random.RandomState(0)
+    dec = rng.randint(0, 8, 300)
+    values = np.round(rng.standard_t(2, 300) * 3000)
+    values[:5] = 200000
+    dec_list, box_list, stat = distribute_benefits(dec, values, 3)
+    for jj in range(8):
+        arr = values[dec == jj]
+        expected = dataset_for_boxplot(arr, jj)
+        assert box_list[jj][0] == expected[0]
+        np.testing.assert_array_equal(box_list[jj][1], expected[1])
+        np.testing.assert_allclose(box_list[jj][2:], expected[2:])
+        arr = arr[np.abs(arr) <= 100000]
+        np.testing.assert_array_equal(dec_list[jj], arr)
+        if len(arr) != 0:
+            expected = [arr.max(), arr.min(), arr.mean(), arr.std(), np.median(arr)]
+            np.testing.assert_allclose(stat[jj], expected)
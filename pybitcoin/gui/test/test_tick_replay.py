@@ -0,0 +1,89 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+test_tick_replay.py
+tests of TickReplay
+"""
+
+from datetime import datetime, timedelta
+import json
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from TickReplay import TickReplay, load_tickers
+
+class MomentumBot(object):
+    """a bot with the same interface as BotBase, which does not need Qt"""
+    def __init__(self, name="", parent=None, api=None, product_code="FX_BTC_JPY", size=0.01,
+                 loss_cutting=0.0, profit_taking=0.0, threshold=0.0, DEBUG=False):
+        self._api = api
+        self._product_code = product_code
+        self.btc_size = size
+        self._threshold = threshold
+        self._tick_count_order = 4
+        self._side = "WAIT"
+        self._ltp_list = []
+        self.data = None
+
+    def _process(self):
+        self._ltp_list.append(self.data["market_data"]["ltp"])
+        print("ltp:", self._ltp_list[-1])
+        if len(self._ltp_list) < self._tick_count_order:
+            return
+        diff = self._ltp_list[-1] - self._ltp_list[-self._tick_count_order]
+        side = "BUY" if diff >= self._threshold else "SELL" if diff <= -self._threshold else "WAIT"
+        if side != "WAIT" and side != self._side:
+            size = self.btc_size if self._side == "WAIT" else 2 * self.btc_size
+            self._api.sendchildorder(product_code=self._product_code, child_order_type="MARKET",
+                                     side=side, size=size, minute_to_expire=10)
+            self._side = side
+
+def make_tickers(N=600):
+    t0 = datetime(2019, 1, 1)
+    ltp = 400000. + np.round(2000. * np.sin(np.arange(N) / 30.))
+    return [{
+        "product_code":"FX_BTC_JPY", "tick_id":ii + 1, "ltp":float(ltp[ii]),
+        "best_bid":float(ltp[ii]) - 50., "best_ask":float(ltp[ii]) + 50.,
+        "timestamp":(t0 + timedelta(seconds=ii)).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3],
+    } for ii in range(N)]
+
+def test_load_tickers(tmp_path):
+    tickers = make_tickers(100)
+    for name, part in [("data_2.json", tickers[50:]), ("data_1.json", tickers[:50] + [{"status":-1}])]:
+        with open(str(tmp_path / name), "w") as ff:
+            json.dump(dict(tickers=part), ff)
+    assert load_tickers(str(tmp_path / "data_*.json")) == tickers
+
+def test_run(capsys):
+    tickers = make_tickers()
+    replay = TickReplay(tickers)
+    result = replay.run(MomentumBot, size=0.1, threshold=100., tick_count_order=10)
+    assert capsys.readouterr().out == ""
+    trades = result["trades"]
+    assert len(trades) > 2 and len(result["pnl_list"]) == len(tickers)
+
+    # the profit and loss agrees with the trades filled at the recorded quotes
+    ltp = {ticker["timestamp"]:ticker["ltp"] for ticker in tickers}
+    sign = np.where(trades["side"] == "BUY", 1, -1)
+    np.testing.assert_array_equal(trades["price"], [ltp[t] + 50. * s for t, s in zip(trades["exec_date"], sign)])
+    position = (sign * trades["size"]).sum()
+    expected = -(sign * trades["size"] * trades["price"]).sum() + position * tickers[-1]["ltp"]
+    assert result["pnl"] == pytest.approx(expected)
+    assert result["max_drawdown"] >= 0.
+
+    # the simulator is reset for every run
+    assert replay.run(MomentumBot, size=0.1, threshold=100., tick_count_order=10)["pnl"] == result["pnl"]
+    with pytest.raises(ValueError):
+        replay.run(MomentumBot, unknown=1)
+
+def test_run_many():
+    replay = TickReplay(make_tickers())
+    params_list = [{"threshold":th, "tick_count_order":n} for th in [50., 200.] for n in [5, 20]]
+    results = replay.run_many(MomentumBot, params_list, max_workers=2)
+    assert [result["params"] for result in results] == params_list
+    for params, result in zip(params_list, results):
+        assert result["pnl"] == pytest.approx(replay.run(MomentumBot, **params)["pnl"])
@@ -0,0 +1,216 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+APIClient.py
+This file offers the following items:
+
+* APIClient
+* TokenBucket
+* as_client : function
+"""
+
+import random
+import threading
+import time
+
+# methods which must not be retried because the first try may have been accepted
+NO_RETRY_METHODS = (
+    "sendchildorder", "sendparentorder", "cancelchildorder", 
+    "cancelparentorder", "cancelallchildorders",
+)
+
+class TokenBucket(object):
+    """TokenBucket(object)
+
+    This class offers a token bucket shared by threads.
+    Tokens are refilled at `rate` per second up to `capacity`,
+    and `acquire` blocks until a token is available.
+    """
+    def __init__(self, rate, capacity=None):
+        """__init__(self, rate, capacity=None) -> None
+
+        Parameters
+        ----------
+        rate     : float
+            tokens refilled per second
+        capacity : float (default : None)
+            the maximum number of tokens, i.e. the size of bursts. if None, `rate`.
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.):
+        """acquire(self, tokens=1.) -> float
+
+        take tokens, waiting for them if necessary, and return the waiting time
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait_time = max(0., -self._tokens / self.rate)
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+class APIClient(object):
+    """APIClient(object)
+
+    This class wraps an API instance of pybitflyer for all the call sites.
+    Every method of the API is called
+    - after taking a token from the shared request budget (TokenBucket),
+    - with bounded retries and exponential backoff with full jitter on exceptions,
+    - with counting calls, errors and latency per endpoint.
+    Orders (NO_RETRY_METHODS and POST requests) and KeyboardInterrupt are never retried.
+
+    Examples
+    --------
+    >>> api = APIClient(pybitflyer.API(api_key=key, api_secret=secret, timeout=2.0))
+    >>> ticker = api.ticker(product_code="FX_BTC_JPY")
+    >>> api.stats["ticker"]["mean_latency"]
+    """
+    def __init__(self, api, rate=500./300., capacity=100, max_retries=5,
+                 base_delay=0.5, max_delay=30., retry_on=(Exception,)):
+        """__init__(self, api, rate=500./300., capacity=100, max_retries=5,
+                    base_delay=0.5, max_delay=30., retry_on=(Exception,)) -> None
+
+        initialize this class
+
+        Parameters
+        ----------
+        api         : API class in pybitflyer
+            an API instance to wrap
+        rate        : float (default : 500 / 300)
+            requests per second permitted in the long run. if None, no limit.
+            The default is the limit of bitFlyer (500 requests per 5 minutes).
+        capacity    : float (default : 100)
+            the maximum number of requests in a burst
+        max_retries : int (default : 5)
+            the maximum number of retries of a request
+        base_delay  : float (default : 0.5)
+            the first backoff in seconds, which is doubled for every retry
+        max_delay   : float (default : 30.0)
+            the maximum backoff in seconds
+        retry_on    : tuple of exception classes (default : (Exception,))
+            exceptions to retry
+        """
+        self._api = api
+        self._bucket = None if rate is None else TokenBucket(rate, capacity)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def call(self, name, *args, **kwargs):
+        """call(self, name, *args, **kwargs) -> object
+
+        call a method of the API with the budget, retries and counters
+
+        Parameters
+        ----------
+        name   : str
+            name of the method (e.g. "ticker", "executions", "request")
+        args   : arguments of the method
+        kwargs : keyword arguments of the method
+        """
+        method = getattr(self._api, name)
+        endpoint = args[0] if name == "request" and len(args) != 0 else name
+        is_post = name == "request" and kwargs.get("method", args[1] if len(args) > 1 else "GET") == "POST"
+        max_retries = 0 if name in NO_RETRY_METHODS or is_post else self.max_retries
+        for ii in range(max_retries + 1):
+            if self._bucket is not None:
+                self._bucket.acquire()
+            st = time.monotonic()
+            try:
+                result = method(*args, **kwargs)
+                self._count(endpoint, time.monotonic() - st, False, ii)
+                return result
+            except self.retry_on:
+                self._count(endpoint, time.monotonic() - st, True, ii)
+                if ii == max_retries:
+                    raise
+                time.sleep(self.backoff(ii))
+
+    def backoff(self, retry):
+        """backoff(self, retry) -> float
+
+        return the waiting time before the `retry`-th retry (from 0) with full jitter
+        """
+        return random.uniform(0., min(self.max_delay, self.base_delay * 2 ** retry))
+
+    def _count(self, endpoint, latency, is_error, retry):
+        with self._lock:
+            stat = self._stats.setdefault(endpoint, {
+                "calls":0, "errors":0, "retries":0, "total_latency":0., "max_latency":0.
+            })
+            stat["calls"] += 1
+            stat["errors"] += int(is_error)
+            stat["retries"] += int(retry > 0)
+            stat["total_latency"] += latency
+            stat["max_latency"] = max(stat["max_latency"], latency)
+
+    @property
+    def stats(self):
+        """calls, errors, retries, mean and max latency per endpoint"""
+        with self._lock:
+            return {
+                endpoint:dict(stat, mean_latency=stat["total_latency"] / stat["calls"])
+                for endpoint, stat in self._stats.items()
+            }
+
+    @property
+    def rate(self):
+        """requests per second permitted in the long run, or None if unlimited"""
+        return None if self._bucket is None else self._bucket.rate
+
+    @property
+    def api(self):
+        return self._api
+
+    def __getattr__(self, name):
+        # called only for the attributes not defined in this class
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._api, name)
+        if not callable(attr):
+            return attr
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+def as_client(api, **kwargs):
+    """as_client(api, **kwargs) -> APIClient
+
+    wrap an API instance with APIClient unless it is already wrapped
+
+    Parameters
+    ----------
+    api    : API class in pybitflyer or APIClient
+    kwargs : options of APIClient used only when `api` is wrapped newly
+    """
+    if isinstance(api, APIClient):
+        return api
+    return APIClient(api, **kwargs)
@@ -11,9 +11,27 @@ This file offers the following items:
 """
 
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import warnings
 
+try:
+    from .Analyzer import VectorizedAnalyzer
+    from .OHLCVStore import OHLCVStore
+except ImportError:
+    import sys
+    sys.path.append("../utils/")
+    from Analyzer import VectorizedAnalyzer
+    from OHLCVStore import OHLCVStore
+
+# default parameters used in AnalysisResults.from_ohlcv
+DEFAULT_PARAMS = {
+    "N_dec":5, "N_ema1":20, "N_ema2":21, "N_ema3":30, "N_macd":14,
+    "N_atr":14, "N_dm":14, "N_adx":14, "th_dx":30., "N_bb":20,
+    "N_momentum":10, "N_roc":10, "N_rsi":14, "N_wpr":14,
+    "N_avg1":7, "N_avg2":14, "N_avg3":28, "N_ao1":5, "N_ao2":34,
+}
+
 def define_property(self, name, field_level, value=None, readable=True, writable=True):
     """define_property(self, name, value=None, readable=True, writable=True) -> None
     
@@ -80,17 +98,20 @@ class AnalysisResults(object):
     >>> import numpy as np
     >>> res.append(np.random.randint(0, 100, len(res.df.columns)))
     >>> res.save()
+    >>> res = AnalysisResults.from_ohlcv(df, {"N_ema1":10, "N_ema2":11})
     """
-    def __init__(self, results=None):
-        """__init__(self, results=None) -> None
+    def __init__(self, results=None, chunk_size=1024):
+        """__init__(self, results=None, chunk_size=1024) -> None
         
         initialize this class
 
         Parameters
         ----------
-        results : str or pandas.DataFrame (default : None)
+        results    : str or pandas.DataFrame (default : None)
             if str then a path of results of analysis
             elif DataFrame then retuls of analysis
+        chunk_size : int (default : 1024)
+            the number of rows buffered by `append` before flushing them to the DataFrame
         """
 
         # set properties
@@ -102,6 +123,9 @@ class AnalysisResults(object):
             "momentum", "roc1", "roc2", "ema_oc_up", "ema_oc_down", "rsi", "w_percent_r", "uo", "ao"
         ]
         self._save_datetime_fmt = "%Y%m%d%H%M%S"
+        self._chunk_size = chunk_size
+        self._buffer = np.empty((chunk_size, len(self._properties)))
+        self._N_buffer = 0 # the number of rows waiting for flush
         if results is not None:
             is_success = self.loadData(results)
             if not is_success:
@@ -110,10 +134,100 @@ class AnalysisResults(object):
             is_success = self.initParameters()
             if not is_success:
                 raise InitializeError("Some error occurs in initialization.")
-        
-        # define properties
-        define_property(self, "df", "internal", self._df, True, False)
-        
+
+    @classmethod
+    def from_ohlcv(cls, df, params=None, chunk_size=1024):
+        """from_ohlcv(cls, df, params=None, chunk_size=1024) -> AnalysisResults
+
+        calculate all the indicators for an OHLCV dataset.
+        Each indicator is calculated over the whole history at once with VectorizedAnalyzer
+        and the DataFrame is built only once from the columns.
+
+        Parameters
+        ----------
+        df         : pandas.DataFrame or OHLCVStore
+            OHLCV dataset. The "time" column of a DataFrame is used as the timestamp if it exists,
+            and the timestamp of an OHLCVStore is always used.
+        params     : dict (default : None)
+            parameters of the indicators overriding DEFAULT_PARAMS
+        chunk_size : int (default : 1024)
+            see `__init__`
+
+        Returns
+        -------
+        res : AnalysisResults
+        """
+        p = dict(DEFAULT_PARAMS)
+        if params is not None:
+            unknown = set(params) - set(p)
+            if len(unknown) != 0:
+                raise KeyError("unknown parameters: {}".format(sorted(unknown)))
+            p.update(params)
+        tohlc = np.empty((len(df["close"]), 5))
+        if isinstance(df, OHLCVStore):
+            tohlc[:, 0] = df.timestamp
+            tohlc[:, 1:] = df.ohlc
+        else:
+            tohlc[:, 0] = df["time"] if "time" in df else np.arange(1, len(tohlc) + 1)
+            for ii, key in enumerate(["open", "high", "low", "close"]):
+                tohlc[:, ii + 1] = df[key]
+        close = tohlc[:, -1]
+        alpha = lambda N: 2. / (N + 1.)
+
+        analyzer = VectorizedAnalyzer()
+        col = {}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            col["oc_up_down"] = analyzer.calcOcUpDown(tohlc)
+            col["dec"] = analyzer.calcDec(col["oc_up_down"], p["N_dec"])
+            for key in ["ema1", "ema2", "ema3"]:
+                col[key] = analyzer.calcEMA(close, alpha(p["N_" + key]))
+            col["macd"] = analyzer.calcMACD(col["ema1"], col["ema2"])
+            col["macd_signal"] = analyzer.calcEMA(col["macd"], alpha(p["N_macd"]))
+
+            col["buying_pressure"] = analyzer.calcBuyingPressure(tohlc)
+            col["true_range"] = analyzer.calcTrueRange(tohlc)
+            col["atr"] = analyzer.calcEMA(col["true_range"], alpha(p["N_atr"]))
+
+            col["dm_plus"] = analyzer.calcDMPlus(tohlc)
+            col["dm_minus"] = analyzer.calcDMMinus(tohlc)
+            col["dm_plus_ema"] = analyzer.calcEMA(col["dm_plus"], alpha(p["N_dm"]))
+            col["dm_minus_ema"] = analyzer.calcEMA(col["dm_minus"], alpha(p["N_dm"]))
+            col["di_plus"] = analyzer.calcDIPlus(col["dm_plus_ema"], col["atr"])
+            col["di_minus"] = analyzer.calcDIMinus(col["dm_minus_ema"], col["atr"])
+            col["dx"] = analyzer.calcDX(col["di_plus"], col["di_minus"], p["th_dx"])
+            col["adx"] = analyzer.calcEMA(col["dx"], alpha(p["N_adx"]))
+
+            # the bands are derived from std instead of calling calcBollingerBands,
+            # which would calculate std again
+            base = analyzer.calcEMA(close, alpha(p["N_bb"]))
+            col["std"] = analyzer.calcRMSError(close, base, p["N_bb"])
+            for k in [1, 2, 3]:
+                col["upper_band{}".format(k)] = close + k * col["std"]
+                col["lower_band{}".format(k)] = close - k * col["std"]
+
+            col["momentum"] = analyzer.calcMomentum(tohlc, p["N_momentum"])
+            col["roc1"] = analyzer.calcROC1(tohlc, p["N_roc"])
+            col["roc2"] = analyzer.calcROC2(tohlc, p["N_roc"])
+            col["ema_oc_up"] = analyzer.calcOCUpEMA(tohlc, alpha(p["N_rsi"]))
+            col["ema_oc_down"] = analyzer.calcOCDownEMA(tohlc, alpha(p["N_rsi"]))
+            col["rsi"] = analyzer.calcRSI(col["ema_oc_down"], col["ema_oc_up"])
+            col["w_percent_r"] = analyzer.calcWPercentR(tohlc, p["N_wpr"])
+            col["uo"] = analyzer.calcUltimateOscillator(
+                col["buying_pressure"], col["true_range"], p["N_avg1"], p["N_avg2"], p["N_avg3"]
+            )
+            col["ao"] = analyzer.calcAwesomeOscillator(tohlc, p["N_ao1"], p["N_ao2"])
+        obj = cls(chunk_size=chunk_size)
+        obj._df = pd.DataFrame(col, columns=obj._properties)
+        return obj
+
+    @property
+    def df(self):
+        self.flush()
+        return self._df
+
+    def __len__(self):
+        return len(self._df) + self._N_buffer
+
     def initParameters(self):
         """initParameters(self) -> bool
 
@@ -161,12 +275,16 @@ class AnalysisResults(object):
             if sorted(list(buff.columns)) == sorted(self._properties):
                 self._df = buff
                 is_success = True
+        if is_success:
+            self._N_buffer = 0
         return is_success
     
     def append(self, ary):
         """append(self, ary) -> bool
 
-        append an array of results to the inner data
+        append an array of results to the inner data.
+        The array is stored in a buffer, which is flushed to the DataFrame 
+        when it is full or the DataFrame is referred.
 
         Parameters
         ----------
@@ -175,13 +293,33 @@ class AnalysisResults(object):
         """
         is_success = False
         try:
-            self._df.loc[len(self._df)] = ary
+            ary = np.asarray(ary, dtype=float)
+            if ary.shape != (len(self._properties),):
+                raise ValueError("cannot set a row with mismatched columns")
+            self._buffer[self._N_buffer] = ary
+            self._N_buffer += 1
+            if self._N_buffer == self._chunk_size:
+                self.flush()
             is_success = True
         except ValueError as ex:
             print(ex)
         
         return is_success
     
+    def flush(self):
+        """flush(self) -> None
+
+        flush the rows in the buffer to the DataFrame
+        """
+        if self._N_buffer == 0:
+            return
+        chunk = pd.DataFrame(self._buffer[:self._N_buffer].copy(), columns=self._properties)
+        if len(self._df) == 0:
+            self._df = chunk
+        else:
+            self._df = pd.concat([self._df, chunk], ignore_index=True)
+        self._N_buffer = 0
+    
     def save(self, fpath=None):
         """save(self, fpath=None) -> bool
 
@@ -202,7 +340,7 @@ class AnalysisResults(object):
             if fpath is None:
                 fpath = "./{}".format(datetime.now().strftime(self._save_datetime_fmt))
                 warnings.warn("'fpath' is not assigned. save the results to '{}'.",format(fpath))
-            self._df.to_csv(fpath)
+            self.df.to_csv(fpath)
             is_success = True
         except Exception as ex:
             print(ex)
@@ -1,8 +1,16 @@
 #-*- coding: utf-8 -*-
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 # import pandas as pd
 
+try:
+    from .mathfunctions import ema_kernel, encode_patterns, rolling_max, rolling_min
+except ImportError:
+    import sys
+    sys.path.append("../utils/")
+    from mathfunctions import ema_kernel, encode_patterns, rolling_max, rolling_min
+
 class TemporalAnalyzer(object):
     """TemporalAnalyzer(object)
     
@@ -70,10 +78,10 @@ class TemporalAnalyzer(object):
         -------
         a decimal corresponding to a pattern (int)
         """
-        if len(oc_up_down) > N_dec:
+        if len(oc_up_down) < N_dec:
             return 0
         else:
-            return int("".join([str(i_) for i_ in oc_up_down[-N_dec:]]), 2)
+            return int(encode_patterns(oc_up_down[-N_dec:], N_dec)[-1])
 
     def calcSMA(self, base, N, ii=-1):
         """calcSMA(self, base, alpha, ii=-1) -> float
@@ -514,6 +522,8 @@ class TemporalAnalyzer(object):
         Returns
         -------
         the current William's %R (flaoat)
+
+        See also StreamingIndicators.WPercentR, which updates the value in O(1) per bar.
         """
         if len(tohlc) < n:
             return -50.
@@ -681,14 +691,7 @@ class Analyzer(object):
         dec : list
             list of decimals corresponding to each pattern
         """
-        dec = []
-        for ii in range(len(oc_up_down)):
-            if ii < N_dec - 1:
-                dec.append(0)
-            else:
-                dec.append(int("".join([str(i_) for i_ in oc_up_down[ii-N_dec+1:ii+1]]), 2))
-        
-        return dec
+        return encode_patterns(oc_up_down, N_dec).tolist()
 
     def calcSMA(self, base, N):
         """calcSMA(self, base, alpha) -> list
@@ -736,14 +739,7 @@ class Analyzer(object):
         ema : list
             list of EMA values
         """
-        ema = []
-        for ii in range(len(base)):
-            if ii == 0:
-                ema.append(1 * base[0])
-            else:
-                ema.append((1. - alpha) * ema[-1] + alpha * base[ii])
-        
-        return ema
+        return list(ema_kernel(base, alpha))
 
     def calcMACD(self, ema1, ema2):
         """calcMACD(self, ema1, ema2) -> list
@@ -1106,18 +1102,14 @@ class Analyzer(object):
         oc_down_ema : list
             list of EMA for OC-down patterns
         """
-        oc_down_ema = []
-        for ii in range(len(tohlc)):
-            if tohlc[ii][1] > tohlc[ii][-1]:
-                w = tohlc[ii][1] - tohlc[ii][-1]
-            else:
-                w = 0.
-            if ii == 0:
-                oc_down_ema.append(w)
+        w = []
+        for row in tohlc:
+            if row[1] > row[-1]:
+                w.append(row[1] - row[-1])
             else:
-                oc_down_ema.append((1. - alpha) * oc_down_ema[-1] + alpha * w)
+                w.append(0.)
         
-        return oc_down_ema
+        return self.calcEMA(w, alpha)
     
     def calcOCUpEMA(self, tohlc, alpha):
         """calcOCDownEMA(self, tohlc, alpha) -> list
@@ -1136,18 +1128,14 @@ class Analyzer(object):
         oc_up_ema : list
             list of EMA for OC-up patterns
         """
-        oc_up_ema = []
-        for ii in range(len(tohlc)):
-            if tohlc[ii][1] < tohlc[ii][-1]:
-                w = tohlc[ii][-1] - tohlc[ii][1]
-            else:
-                w = 0.
-            if ii == 0:
-                oc_up_ema.append(w)
+        w = []
+        for row in tohlc:
+            if row[1] < row[-1]:
+                w.append(row[-1] - row[1])
             else:
-                oc_up_ema.append((1. - alpha) * oc_up_ema[-1] + alpha * w)
+                w.append(0.)
         
-        return oc_up_ema
+        return self.calcEMA(w, alpha)
 
     def calcRSI(self, oc_down_ema, oc_up_ema):
         """calcRSI(self, oc_down_ema, oc_up_ema) -> list
@@ -1184,14 +1172,14 @@ class Analyzer(object):
         wpr : list
         list of William's %R
         """
+        highest = rolling_max([row[2] for row in tohlc], N)
+        lowest = rolling_min([row[3] for row in tohlc], N)
         wpr = []
         for ii in range(len(tohlc)):
             if ii < N - 1:
                 wpr.append(-50.)
             else:
-                highest = max([row[2] for row in tohlc[ii-N+1:ii+1]])
-                lowest = min([row[3] for row in tohlc[ii-N+1:ii+1]])
-                wpr.append((tohlc[ii][-1] - highest) / (highest - lowest) * 100.)
+                wpr.append((tohlc[ii][-1] - highest[ii]) / (highest[ii] - lowest[ii]) * 100.)
         
         return wpr
         
@@ -1277,6 +1265,534 @@ class Analyzer(object):
         second = self.calcSMA(base, N2)
         return [f - s for f, s in zip(first, second)]
 
+class VectorizedAnalyzer(Analyzer):
+    """VectorizedAnalyzer(Analyzer)
+    
+    This class offers the same functions as `Analyzer` in an array-native mode.
+    Each function accepts array-like inputs and returns numpy.ndarray.
+    The indicators are calculated over the whole history at once 
+    with strided windows and lfilter instead of loops over rows.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> analyzer = VectorizedAnalyzer()
+    >>> tohlc = np.zeros((100, 5))
+    >>> tohlc[:, 0] = np.arange(1, 101)
+    >>> tohlc[:, 1:] = np.random.randint(100, 150, (100, 4))
+    >>> N = 3
+    >>> alpha = 2. / (1. + N)
+    >>> ema = analyzer.calcEMA(tohlc[:, -1], alpha)
+    >>> wpr = analyzer.calcWPercentR(tohlc, 14)
+    """
+    def __init__(self):
+        super().__init__()
+    
+    def calcOcUpDown(self, tohlc):
+        """calcOcUpDown(self, tohlc) -> numpy.1darray
+
+        calculate values to specify up/down of close
+
+        Parameters
+        ----------
+        tohlc : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+            
+        Returns
+        -------
+        oc_up_down : numpy.1darray
+            if close > open then 1, otherwise 0.
+        """
+        tohlc = _as_tohlc(tohlc)
+        return (tohlc[:, -1] > tohlc[:, 2]).astype(int)
+    
+    def calcDec(self, oc_up_down, N_dec=5):
+        """calcDec(self, oc_up_down, N_dec=5) -> numpy.1darray
+
+        calculate the decimal value for the corresponding pattern
+
+        Parameters
+        ----------
+        oc_up_down : array-like
+            array of 0-or-1 values
+        N_dec      : int (default : int)
+            the number of values to convert altogher into a decimal
+        
+        Returns
+        -------
+        dec : numpy.1darray
+            decimals corresponding to each pattern
+        """
+        return encode_patterns(oc_up_down, N_dec)
+
+    def calcSMA(self, base, N):
+        """calcSMA(self, base, N) -> numpy.1darray
+
+        calculate the SMA values
+
+        Parameters
+        ----------
+        base  : array-like
+            historical values
+        N : int
+            the number of periods
+        
+        Returns
+        -------
+        sma : numpy.1darray
+            SMA values
+        """
+        base = np.asarray(base, dtype=float)
+        if N == 1:
+            return base.copy()
+        return np.nanmean(_trailing_windows(base, N), axis=1)
+
+    def calcEMA(self, base, alpha):
+        """calcEMA(self, base, alpha) -> numpy.1darray
+
+        calculate the EMA values
+
+        Parameters
+        ----------
+        base  : array-like
+            historical values
+        alpha : float
+            alpha parameter of EMA calculation
+        
+        Returns
+        -------
+        ema : numpy.1darray
+            EMA values
+        """
+        return ema_kernel(base, alpha)
+
+    def calcMACD(self, ema1, ema2):
+        """calcMACD(self, ema1, ema2) -> numpy.1darray
+
+        calculate the MACD value
+
+        Parameters
+        ----------
+        ema1 : array-like
+            the first EMA
+        ema2 : array-like
+            the second EMA
+        
+        Returns
+        -------
+        MACD values (numpy.1darray)
+        """
+        return np.asarray(ema1, dtype=float) - np.asarray(ema2, dtype=float)
+    
+    def calcBuyingPressure(self, tohlc):
+        """calcBuyingPressure(self, tohlc) -> numpy.1darray
+
+        calculate buying pressure
+
+        Parameters
+        ----------
+        tohlc : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+
+        Returns
+        -------
+        bp : numpy.1darray
+            buynig pressure
+        """
+        tohlc = _as_tohlc(tohlc)
+        low, close = tohlc[:, 3], tohlc[:, -1]
+        bp = close - low
+        bp[1:] = close[1:] - np.minimum(low[1:], close[:-1])
+        return bp
+        
+    def calcTrueRange(self, tohlc):
+        """calcTrueRange(self, tohlc) -> numpy.1darray
+
+        calculate true range
+
+        Parameters
+        ----------
+        tohlc : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+
+        Returns
+        -------
+        tr : numpy.1darray
+            true range
+        """
+        tohlc = _as_tohlc(tohlc)
+        high, low, close = tohlc[:, 2], tohlc[:, 3], tohlc[:, -1]
+        tr = high - low
+        tr[1:] = np.maximum.reduce([
+            high[1:] - low[1:], 
+            high[1:] - close[:-1], 
+            close[:-1] - low[1:]
+        ])
+        return tr
+    
+    def calcDMPlus(self, tohlc):
+        """calcDMPlus(self, tohlc) -> numpy.1darray
+
+        calculate DM+
+
+        Parameters
+        ----------
+        tohlc : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+
+        Returns
+        -------
+        dmp : numpy.1darray
+            DM+
+        """
+        tohlc = _as_tohlc(tohlc)
+        high, low = tohlc[:, 2], tohlc[:, 3]
+        HM = high[1:] - high[:-1]
+        LM = low[:-1] - low[1:]
+        dmp = np.zeros(len(tohlc))
+        dmp[1:] = np.where((HM > LM) & (HM > 0), HM, 0.)
+        return dmp
+    
+    def calcDMMinus(self, tohlc):
+        """calcDMMinus(self, tohlc) -> numpy.1darray
+
+        calculate DM-
+
+        Parameters
+        ----------
+        tohlc : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+
+        Returns
+        -------
+        dmm : numpy.1darray
+            DM-
+        """
+        tohlc = _as_tohlc(tohlc)
+        high, low = tohlc[:, 2], tohlc[:, 3]
+        HM = high[1:] - high[:-1]
+        LM = low[:-1] - low[1:]
+        dmm = np.zeros(len(tohlc))
+        dmm[1:] = np.where((HM < LM) & (LM > 0), LM, 0.)
+        return dmm
+
+    def calcDIPlus(self, DMPlusEMA, ATR):
+        """calcDIPlus(self, DMPlusEMA, ATR) -> numpy.1darray
+        """
+        return np.asarray(DMPlusEMA, dtype=float) / np.asarray(ATR, dtype=float) * 100.
+    
+    def calcDIMinus(self, DMMinusEMA, ATR):
+        """calcDIMinus(self, DMMinusEMA, ATR) -> numpy.1darray
+        """
+        return np.asarray(DMMinusEMA, dtype=float) / np.asarray(ATR, dtype=float) * 100.
+    
+    def calcDX(self, DIPlus, DIMinus, threshold=30.):
+        """calcDX(self. DIPlus, DIMinus, threshold=30.) > numpy.1darray
+        """
+        DIPlus = np.asarray(DIPlus, dtype=float)
+        DIMinus = np.asarray(DIMinus, dtype=float)
+        total = DIPlus + DIMinus
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dx = np.abs(DIPlus - DIMinus) / total * 100.
+        dx[total == 0.] = threshold
+        return dx
+    
+    def calcRMSError(self, close, base, N=1):
+        """calcRMSError(self, close, base, N=1) -> numpy.1darray
+
+        calculate rms of error between `close` and `base`.
+
+        Parameters
+        ----------
+        close : array-like
+            close values
+        base  : array-like
+            base values (e.g. SMA, EMA)
+        N     : int (default : 1)
+            the number of days to consider
+        
+        Returns
+        -------
+        rms : numpy.1darray
+            rms of error
+        """
+        diff = np.asarray(close, dtype=float) - np.asarray(base, dtype=float)
+        return np.nanstd(_trailing_windows(diff, N), axis=1)
+
+    def calcBollingerBands(self, close, base, N=1):
+        """calcBollingerBands(self, close, base, N=1) -> 7 numpy.1darrays
+
+        calculate Bollinger bands
+
+        Parameters
+        ----------
+        close : array-like
+            close values
+        base  : array-like
+            base values (e.g. SMA, EMA)
+        N     : int (default : 1)
+            the number of days to consider
+        
+        Returns
+        -------
+        Bollinger bands
+        """
+        close = np.asarray(close, dtype=float)
+        sigma = self.calcRMSError(close, base, N)
+        return close - 3. * sigma, close - 2. * sigma, close - sigma, close, \
+               close + sigma, close + 2. * sigma, close + 3. * sigma
+    
+    def calcMomentum(self, tohlc, N=1):
+        """calcMomentum(self, tohlc, N=1) -> numpy.1darray
+
+        calculate momenta
+
+        Parameters
+        ----------
+        tohlc : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+        N     : int (default : 1)
+            the number of days to go back
+        
+        Returns
+        -------
+        M : numpy.1darray
+            momenta
+        """
+        close = _as_tohlc(tohlc)[:, -1]
+        M = np.zeros(len(close))
+        M[N:] = (close[N:] - close[:-N]) / N
+        return M
+
+    def calcROC1(self, tohlc, N=1):
+        """calcROC1(self, tohlc, N=1) -> numpy.1darray
+
+        calculate ROC Type.I
+
+        Parameters
+        ----------
+        tohlc : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+        N     : int (default : 1)
+            the number of days to go back
+        
+        Returns
+        -------
+        roc : numpy.1darray
+            ROC Type.I
+        """
+        close = _as_tohlc(tohlc)[:, -1]
+        roc = np.zeros(len(close))
+        roc[N:] = (close[N:] - close[:-N]) / close[N:] * 100.
+        return roc
+    
+    def calcROC2(self, tohlc, N=1):
+        """calcROC2(self, tohlc, N=1) -> numpy.1darray
+
+        calculate ROC Type.II
+
+        Parameters
+        ----------
+        tohlc : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+        N     : int (default : 1)
+            the number of days to go back
+        
+        Returns
+        -------
+        roc : numpy.1darray
+            ROC Type.II
+        """
+        close = _as_tohlc(tohlc)[:, -1]
+        roc = np.zeros(len(close))
+        roc[N:] = (close[N:] - close[:-N]) / close[:-N] * 100.
+        return roc
+    
+    def calcOCDownEMA(self, tohlc, alpha):
+        """calcOCDownEMA(self, tohlc, alpha) -> numpy.1darray
+
+        calculate the EMA value for OC-down patterns
+
+        Parameters
+        ----------
+        tohlc  : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+        alpha : float
+            alpha parameter of EMA calculation
+        
+        Returns
+        -------
+        EMA for OC-down patterns (numpy.1darray)
+        """
+        tohlc = _as_tohlc(tohlc)
+        open_, close = tohlc[:, 1], tohlc[:, -1]
+        return self.calcEMA(np.where(open_ > close, open_ - close, 0.), alpha)
+    
+    def calcOCUpEMA(self, tohlc, alpha):
+        """calcOCUpEMA(self, tohlc, alpha) -> numpy.1darray
+
+        calculate the EMA value for OC-up patterns
+
+        Parameters
+        ----------
+        tohlc  : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+        alpha : float
+            alpha parameter of EMA calculation
+        
+        Returns
+        -------
+        EMA for OC-up patterns (numpy.1darray)
+        """
+        tohlc = _as_tohlc(tohlc)
+        open_, close = tohlc[:, 1], tohlc[:, -1]
+        return self.calcEMA(np.where(open_ < close, close - open_, 0.), alpha)
+
+    def calcRSI(self, oc_down_ema, oc_up_ema):
+        """calcRSI(self, oc_down_ema, oc_up_ema) -> numpy.1darray
+
+        calculate RSI
+
+        Parameters
+        ----------
+        oc_down_ema : array-like
+            EMA of OC-downs
+        oc_up_ema   : array-like
+            EMA of OC-ups
+        
+        Returns
+        -------
+        RSI (numpy.1darray)
+        """
+        oc_down_ema = np.asarray(oc_down_ema, dtype=float)
+        oc_up_ema = np.asarray(oc_up_ema, dtype=float)
+        return oc_up_ema / (oc_up_ema + oc_down_ema) * 100.
+    
+    def calcWPercentR(self, tohlc, N=1):
+        """calcWPercentR(self, tohlc, N=1) -> numpy.1darray
+
+        calculate William's %R.
+
+        Parameters
+        ----------
+        tohlc : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+        N     : int (default : 1)
+            the number of days to consider
+        
+        Returns
+        -------
+        wpr : numpy.1darray
+            William's %R
+        """
+        tohlc = _as_tohlc(tohlc)
+        high, low, close = tohlc[:, 2], tohlc[:, 3], tohlc[:, -1]
+        wpr = np.full(len(tohlc), -50.)
+        if len(tohlc) >= N:
+            highest = rolling_max(high, N)[N-1:]
+            lowest = rolling_min(low, N)[N-1:]
+            wpr[N-1:] = (close[N-1:] - highest) / (highest - lowest) * 100.
+        return wpr
+        
+    def calcRatioOfDeviation(self, target, base, ii=-1):
+        """calcRatioOfDeviation(self, target, base, ii=-1) -> numpy.1darray
+
+        calculate the ratio of deviation of `target` from `base`
+
+        Parameters
+        ----------
+        target : array-like
+            target values
+        base  : array-like
+            base values (e.g. close)
+
+        Returns
+        -------
+        ratio of deviation (%)
+        """
+        target = np.asarray(target, dtype=float)
+        base = np.asarray(base, dtype=float)
+        return (target - base) / base * 100.
+    
+    def calcUltimateOscillator(self, buying_pressure, true_range, N1=7, N2=14, N3=28):
+        """calcUltimateOscillator(self, buying_pressure, true_range, N1=7, N2=14, N3=28) -> numpy.1darray
+
+        calculate ultimate oscillator (UO)
+
+        Parameters
+        ----------
+        buying_pressure : array-like
+            buying pressure
+        true_range      : array-like
+            true range
+        N1              : int (default : 7)
+            the first period
+        N2              : int (default : 14)
+            the second period
+        N3              : int (default : 28)
+            the third period
+        
+        Returns
+        -------
+        UO (numpy.1darray)
+        """
+        assert len(buying_pressure) == len(true_range), ValueError("no match length")
+        buying_pressure = np.asarray(buying_pressure, dtype=float)
+        true_range = np.asarray(true_range, dtype=float)
+        uo = np.zeros(len(buying_pressure))
+        for N in [N1, N2, N3]:
+            avg = np.full(len(buying_pressure), 0.5)
+            if len(buying_pressure) >= N:
+                avg[N-1:] = sliding_window_view(buying_pressure, N).sum(axis=1) \
+                            / sliding_window_view(true_range, N).sum(axis=1)
+            uo += N * avg
+        return uo / (N1 + N2 + N3) * 100.
+    
+    def calcAwesomeOscillator(self, tohlc, N1=5, N2=34):
+        """calcAwesomeOscillator(self, tohlc, N1=5, N2=34) -> numpy.1darray
+
+        calculate awesome oscillator (AO)
+
+        Parameters
+        ----------
+        tohlc : array-like
+            2-dimensional array of (timestamp, open, high, low, close)
+        N1    : int (default : 5)
+            the first period
+        N2    : int (default : 34)
+            the second period
+        
+        Returns
+        -------
+        AO (numpy.1darray)
+        """
+        tohlc = _as_tohlc(tohlc)
+        base = (tohlc[:, 2] + tohlc[:, 3]) / 2.
+        return self.calcSMA(base, N1) - self.calcSMA(base, N2)
+
+def _as_tohlc(tohlc):
+    """_as_tohlc(tohlc) -> numpy.2darray
+
+    convert `tohlc` into a float array with the shape of (N, 5)
+    """
+    tohlc = np.asarray(tohlc, dtype=float)
+    if tohlc.size == 0:
+        return tohlc.reshape(0, 5)
+    if tohlc.ndim != 2 or tohlc.shape[1] != 5:
+        raise ValueError("tohlc must have the shape of (N, 5), not {}.".format(tohlc.shape))
+    return tohlc
+
+def _trailing_windows(x, N):
+    """_trailing_windows(x, N) -> numpy.2darray
+
+    return the trailing windows with the length of `N` for each value in `x`.
+    The first `N - 1` windows are padded with NaN at their heads 
+    so that NaN-aware reductions give the values for the expanding windows.
+    """
+    if len(x) == 0:
+        return np.empty((0, N))
+    return sliding_window_view(np.concatenate((np.full(N - 1, np.nan), x)), N)
+
 def main():
     for line in TemporalAnalyzer.__doc__.split("\n"):
         print(line)
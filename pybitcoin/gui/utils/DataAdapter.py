@@ -5,36 +5,130 @@
 DataAdapter.py
 This file offers the following items:
 
+* AnalysisSnapshot
 * DataAdapter
 """
 
-import copy
 from datetime import datetime, timedelta
+from copy import deepcopy
 from itertools import combinations
 import numpy as np
 import pandas as pd
 import pickle
 import sys
+import threading
 import pybitflyer
 
 try:
-    from .Analyzer import TemporalAnalyzer
+    from .Analyzer import TemporalAnalyzer, VectorizedAnalyzer
+    from .APIClient import as_client
+    from .backtest import run_backtest
+    from .bars import EXECUTION_DTYPE, parse_bar_size, parse_executions, split_closed_bars
+    from .decorators import synchronized
     from .footprint import footprint
     from .init_api import init_api
-    from .mathfunctions import symbolize, dataset_for_boxplot
+    from .OHLCVStore import OHLCVStore
+    from .StreamingIndicators import IndicatorRegistry
+    from .mathfunctions import symbolize, ema_kernel, ema_kernel_batch, encode_patterns, roll_pattern
+    from .sweep import sweep_ema_pairs
 except ImportError:
     sys.path.append("../utils/")
-    from Analyzer import TemporalAnalyzer, Analyzer
+    from Analyzer import TemporalAnalyzer, VectorizedAnalyzer
+    from APIClient import as_client
+    from backtest import run_backtest
+    from bars import EXECUTION_DTYPE, parse_bar_size, parse_executions, split_closed_bars
+    from decorators import synchronized
     from footprint import footprint
     from init_api import init_api
-    from mathfunctions import symbolize, dataset_for_boxplot
+    from OHLCVStore import OHLCVStore
+    from StreamingIndicators import IndicatorRegistry
+    from mathfunctions import symbolize, ema_kernel, ema_kernel_batch, encode_patterns, roll_pattern
+    from sweep import sweep_ema_pairs
+
+class AnalysisSnapshot(object):
+    """AnalysisSnapshot(object)
+
+    This class offers a snapshot of the inputs of DataAdapter.sweepAnalysisData.
+    The snapshot holds the OHLCVStore of the adapter, which is not closed until
+    the snapshot is closed, and copies of the OHLC patterns and the parameters,
+    so the analysis can run on another thread while the adapter is updated.
+
+    Examples
+    --------
+    >>> snapshot = adapter.snapshotAnalysisData()
+    >>> results = snapshot.sweepAnalysisData(max_workers=4) # the snapshot is closed after the sweep
+    """
+    def __init__(self, adapter):
+        """__init__(self, adapter) -> None
+
+        Parameters
+        ----------
+        adapter : DataAdapter
+            adapter of the OHLCV dataset to analyze
+        """
+        with adapter._lock:
+            self._adapter = adapter
+            self._store = adapter.acquireStore()
+            self._dec = np.array(adapter._dec, dtype=int)
+            self._dec.setflags(write=False)
+            self.N_ema_min = adapter.N_ema_min
+            self.N_ema_max = adapter.N_ema_max
+            self.N_dec = adapter.N_dec
+            self.delta = adapter.delta
+            self.benefit_timing = adapter.benefit_timing
+            self.golden_patterns = deepcopy(adapter._golden_patterns)
+            self.dead_patterns = deepcopy(adapter._dead_patterns)
+
+    def sweepAnalysisData(self, max_workers=None, callback=None):
+        """sweepAnalysisData(self, max_workers=None, callback=None) -> dict
+
+        calculate statistics and benefits for each pair (N_ema1, N_ema2)
+        with N_ema_min <= N_ema1 < N_ema2 <= N_ema_max (see DataAdapter.sweepAnalysisData).
+        This snapshot is closed after the sweep.
+        """
+        if self._store is None:
+            raise ValueError("the snapshot has been closed or has no dataset.")
+        try:
+            alphas = [2. / (N + 1.) for N in range(self.N_ema_min, self.N_ema_max + 1)]
+            return sweep_ema_pairs(
+                self._store, self._dec, ema_kernel_batch(self._store["close"], alphas), self.N_ema_min,
+                self.N_dec, self.delta, self.benefit_timing,
+                self.golden_patterns, self.dead_patterns,
+                max_workers=max_workers, callback=callback
+            )
+        finally:
+            self.close()
+
+    def close(self):
+        """close(self) -> None
+
+        release the OHLCVStore of the adapter
+        """
+        if self._store is not None:
+            store, self._store = self._store, None
+            self._adapter.releaseStoreUse(store)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
 
 class DataAdapter(object):
     """DataAdapter(object)
 
     This class offers an adapter of OHLCV and related data used in pybitcoin.
+    The dataset and the OHLCVStore are guarded by a lock, and a store in use by
+    an AnalysisSnapshot is closed only after the snapshot is closed.
     """
-    def __init__(self, df=None, analysis_results=None, N_ema1=20, N_ema2=21, 
+    def __init__(self, df=None, analysis_results=None, 
+                 N_ema_min=10, N_ema_max=30, N_ema1=20, N_ema2=21, 
                  delta=10., N_dec=5, th_dec=0., **kwargs):
         """__init__(self, df=None, analysis_results=None, 
                     N_ema_min=10, N_ema_max=30, N_ema1=20, N_ema2=21, 
@@ -44,7 +138,7 @@ class DataAdapter(object):
 
         Parameters
         ----------
-        df               : pandas.DataFrame (default : None)
+        df               : pandas.DataFrame or OHLCVStore (default : None)
             OHLCV dataset
         analysis_results : dict (default : None)
             results of analysis
@@ -64,18 +158,31 @@ class DataAdapter(object):
             threshold to average benefits on each pattern
         kwargs           : options
             api             : API class in pybitflyer
-                an API instance
+                an API instance, which is wrapped with APIClient
             product_code    : str (default : "FX_BTC_JPY")
                 product code
             order_condition : str (default : "MARKET")
                 market type
             size            : float (default : 1.0)
                 size of BTC to order
+            bar_size        : int or str (default : "1m")
+                size of the bars of `df` and the bars made from executions
+                (e.g. "10s", "1m", "5m", "1h"). The live bars of any size are made
+                directly from executions, while `df` of another size than 1m
+                can be made from 1m bars by ResampleCache beforehand.
         """
         # initialize analyzers
-        self._analyzer = Analyzer()
+        self._analyzer = VectorizedAnalyzer()
         self._tmp_analyzer = TemporalAnalyzer()
 
+        self._lock = threading.RLock()
+        self._store = None
+        self._store_owned = False
+        self._store_users = {} # id of OHLCVStore -> the number of snapshots using it
+        self._retired_stores = {} # id of OHLCVStore -> store released while in use
+        if isinstance(df, OHLCVStore):
+            self._store = df
+            df = df.to_dataframe()
         self._data_frame = df
         self._analysis_results = analysis_results
 
@@ -98,10 +205,12 @@ class DataAdapter(object):
         self._api = kwargs.get("api")
         if self._api is None:
             self._api = init_api()
+        self._api = as_client(self._api)
         self._product_code = kwargs.get("product_code", "FX_BTC_JPY")
         self._order_condition = kwargs.get("order_condition", "MARKET")
         self._size = kwargs.get("size", 1.0)
         self._count = 500
+        self._bar_seconds = parse_bar_size(kwargs.get("bar_size", "1m"))
         self._params_buy = {
             "product_code":self._product_code,
             "child_order_type":self._order_condition,
@@ -116,8 +225,6 @@ class DataAdapter(object):
             "size":self._size,
             "minute_to_expire":10
         }
-        self._datetimeFmt = "%Y-%m-%dT%H:%M:%S.%f"
-        self._datetimeFmt2 = "%Y-%m-%dT%H:%M:%S"
 
         # initialize inner data
         self._dead_patterns = None
@@ -126,6 +233,8 @@ class DataAdapter(object):
         self._ema_update = True
         self._delta_update = True
         self._benefit_timing = "worst" # in ["worst", "mean", "open"]
+        self._ema_cache = {} # N -> EMA curve of close
+        self._new_bars = [] # bars appended by append_bars and not merged into the dataset yet
         self.updateAlpha()
         self.initOHLCVData()
         self.initOHLCVTmpData()
@@ -133,6 +242,7 @@ class DataAdapter(object):
 
         # Analyzer
         self.analyzer = TemporalAnalyzer()
+        self._indicators = IndicatorRegistry() # streaming indicators for the live data
 
         if self._analysis_results is not None:
             self._ana_set = True
@@ -140,30 +250,50 @@ class DataAdapter(object):
             self._ana_set = False
         self._ana_update = False
         self.initAnalysisData()
-    
+
+    @classmethod
+    def from_archive(cls, archive, start=None, end=None, **kwargs):
+        """from_archive(cls, archive, start=None, end=None, **kwargs) -> DataAdapter
+
+        make an adapter over the bars of an OHLCVArchive in the time range of [start, end).
+        Only the bars in the range are read from the archive.
+
+        Parameters
+        ----------
+        archive : OHLCVArchive
+            archive of OHLCV
+        start   : datetime or float (default : None)
+            the first time (unix time if float). if None, from the first bar.
+        end     : datetime or float (default : None)
+            the end of time, which is excluded. if None, to the last bar.
+        kwargs  : options
+            parameters of `__init__`
+        """
+        return cls(df=archive.read(start, end), **kwargs)
+
     @footprint
+    @synchronized
     def initOHLCVData(self):
         """initInnerData(self) -> None
 
-        initialize the inner data for OHLCV
+        initialize the inner data for OHLCV.
+        The data are rebuilt only if the dataset, N_ema1, N_ema2 or delta has been changed.
         """
-        if not hasattr(self, "_tmp_target"):
-            self._tmp_target = [
-                "N_ema1", "N_ema2", "ltp", "timestamp", "ohlc_list", 
-                "oc_up_down", "dec", "volume_list", "close", 
-                "ema1", "ema2", "cross_signal", "extreme_signal", 
-                "current_max", "current_min", "look_for_max", "jpy_list", "benefit_list", 
-                "current_state", "order_ltp", "stop_by_cross", 
-            ]
-        if self._df_initialized or self._ema_update or self._delta_update:
+        self.flushBars()
+        rebuild = self._df_initialized or self._ema_update or self._delta_update
+        if self._df_initialized:
+            self._ema_cache = {}
+        if rebuild:
             # OHLCV
             self._ltp = []
             self._timestamp = []
-            self._ohlc_list = []
+            self._ohlc_array = np.empty((0, 5)) # buffer of (timestamp, open, high, low, close)
+            self._N_ohlc = 0 # the number of valid rows in the buffer
             self._oc_up_down = []
             self._dec = []
             self._latest_id = None
             self._volume_list = []
+            self._dec_code = 0 # the code of the latest pattern, which is not masked unlike _dec
             self._close = []
 
             # technical indices
@@ -236,39 +366,184 @@ class DataAdapter(object):
             if isinstance(self._data_frame, pd.DataFrame):
                 if self._df_initialized or self._ema_update or self._delta_update:
                     self._data_ = self._data_frame[["open", "high", "low", "close"]].values
-                    volume_ = self._data_frame["volume"].values
-                    for ii, row in enumerate(self._data_):
-                        self._ii = ii
-                        # print(ii)
-                        buff = np.zeros(5)
-                        buff[0] = ii + 1
-                        buff[1:] = row.copy()
-                    
-                        self._timestamp.append(ii + 1)
-                        self._volume_list.append(volume_[ii])
-                        self._ohlc_list.append(buff.copy())
-                        self._close.append(row[-1])
-                        self._oc_up_down.append(int(row[-1] > row[0]))
-                        self._dec.append(self.calcDec())
-                        # self._ema1.append(self.calcEMA(self._ema1, self._alpha1))
-                        # self._ema2.append(self.calcEMA(self._ema2, self._alpha2))
-                        self._macd.append(self.calcMACD(self._ema1, self._ema2))
-                        # self._macd_signal.append(self.calcMACDSignal(self._macd, self._alpha_macd))
-                        self._cross_signal.append(self.judgeCrossPoint())
-                        self._extreme_signal.append(self.judgeExtremePoint())
-                        self.updateExecutionState()
-                        self.orderProcess()
-                    self._dec = np.array(self._dec, dtype=int)
+                    N = len(self._data_)
+                    self._ii = N - 1
+                    self._timestamp = np.arange(1, N + 1)
+                    self._volume_list = self._data_frame["volume"].values
+                    self._ohlc_array = np.empty((N, 5))
+                    self._ohlc_array[:, 0] = self._timestamp
+                    self._ohlc_array[:, 1:] = self._data_
+                    self._N_ohlc = N
+                    self._close = self._data_[:, -1]
+                    self._oc_up_down = (self._data_[:, -1] > self._data_[:, 0]).astype(int)
+                    self._dec = self._analyzer.calcDec(self._oc_up_down, self.N_dec)
+                    self._dec[:self.N_dec] = 0
+                    for bit in self._oc_up_down[-self.N_dec:]:
+                        self._dec_code = roll_pattern(self._dec_code, bit, self.N_dec)
+                    self._ema1, self._ema2 = self.calcEMAMatrix([self._N_ema1, self._N_ema2])
+                    self._macd = self._analyzer.calcMACD(self._ema1, self._ema2)
+                    # self._macd_signal = self._analyzer.calcMACDSignal(self._macd, self._alpha_macd)
+
+                    # backtest
+                    results = run_backtest(
+                        self._data_, self._ema1, self._ema2, self._dec, self._delta,
+                        self._benefit_timing, self._golden_patterns, self._dead_patterns
+                    )
+                    self._cross_signal = results["cross_signal"]
+                    self._extreme_signal = results["extreme_signal"]
+                    self._benefit_list = results["benefit_list"]
+                    self._jpy_list = results["jpy_list"]
+                    self._current_state = results["current_state"]
+                    self._order_ltp = results["order_ltp"]
+                    self._current_max = results["current_max"]
+                    self._current_min = results["current_min"]
+                    self._look_for_max = results["look_for_max"]
+                    self._stop_by_cross = results["stop_by_cross"]
                     # self._latest = 
                 else:
                     pass
             else:
                 raise TypeError('df must be a pandas.DataFrame object.')
-        self._benefit_list = np.array(self._benefit_list)
+        if rebuild:
+            self._benefit_list = np.array(self._benefit_list)
         self._df_initialized = False
         self._ema_update = False
         self._delta_update = False
     
+    def calcEMAMatrix(self, N_list):
+        """calcEMAMatrix(self, N_list) -> numpy.2darray
+
+        calculate EMA curves of close for the given N numbers.
+        Each curve is calculated only once for the current dataset and cached, 
+        and the missing curves are calculated altogether.
+
+        Parameters
+        ----------
+        N_list : array-like
+            N numbers for EMA lines
+
+        Returns
+        -------
+        ema : numpy.2darray with the shape of (len(N_list), # of bars)
+            the i-th row is the EMA curve for N_list[i]
+        """
+        missing = [N for N in N_list if N not in self._ema_cache]
+        if len(missing) != 0:
+            alphas = [2. / (N + 1.) for N in missing]
+            ema = ema_kernel_batch(self._data_frame["close"].values, alphas)
+            for N, row in zip(missing, ema):
+                self._ema_cache[N] = row
+        return np.array([self._ema_cache[N] for N in N_list])
+    
+    def appendOHLC(self, rows):
+        """appendOHLC(self, rows) -> None
+
+        append rows of (timestamp, open, high, low, close) to the OHLC buffer.
+        The capacity of the buffer is doubled when it is full,
+        so the cost of appending one row is amortized to O(1).
+
+        Parameters
+        ----------
+        rows : array-like with the shape of (5,) or (# of rows, 5)
+            rows to append
+        """
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))
+        N_new = self._N_ohlc + len(rows)
+        if N_new > len(self._ohlc_array):
+            buff = np.empty((max(N_new, 2 * len(self._ohlc_array), 16), 5))
+            buff[:self._N_ohlc] = self._ohlc_array[:self._N_ohlc]
+            self._ohlc_array = buff
+        self._ohlc_array[self._N_ohlc:N_new] = rows
+        self._N_ohlc = N_new
+    
+    @synchronized
+    def append_bars(self, new_bars):
+        """append_bars(self, new_bars) -> None
+
+        append new bars and extend EMAs, signals, the state of orders and jpy_list
+        from the latest state, which costs O(# of new bars) independently of the history.
+        All the data are rebuilt by initOHLCVData instead
+        only if no dataset is set or N_ema1, N_ema2 or delta has been changed.
+        Bars which are not newer than the latest bar are skipped.
+
+        Parameters
+        ----------
+        new_bars : pandas.DataFrame
+            bars with the same columns as the dataset
+        """
+        if new_bars is None or len(new_bars) == 0:
+            return
+        if not isinstance(new_bars, pd.DataFrame):
+            raise TypeError('new_bars must be a pandas.DataFrame object.')
+        latest = self._new_bars[-1] if len(self._new_bars) != 0 else self._data_frame
+        if latest is not None and len(latest) != 0 and "time" in new_bars and "time" in latest:
+            new_bars = new_bars[new_bars["time"].values > latest["time"].values[-1]]
+            if len(new_bars) == 0:
+                return
+        if self._data_frame is None:
+            self._data_frame = new_bars.reset_index(drop=True)
+            self._df_initialized = True
+            self.initOHLCVData()
+            return
+        self._new_bars.append(new_bars)
+        if self._df_initialized or self._ema_update or self._delta_update or self._N_ohlc == 0:
+            self.initOHLCVData()
+            return
+
+        # the curves in the cache do not cover the new bars
+        self._ema_cache = {}
+        self.toLiveLists()
+        ohlc = new_bars[["open", "high", "low", "close"]].values.astype(float)
+        volume = new_bars["volume"].values.tolist()
+        ema1 = ema_kernel(ohlc[:, -1], self._alpha1, self._ema1[-1]).tolist()
+        ema2 = ema_kernel(ohlc[:, -1], self._alpha2, self._ema2[-1]).tolist()
+        for jj, row in enumerate(ohlc):
+            # the order decided on the latest bar is executed with the new bar
+            self.executeOrder(row)
+
+            self.appendOHLC(np.append(self._N_ohlc + 1, row))
+            self._ii = self._N_ohlc - 1
+            self._timestamp.append(self._N_ohlc)
+            self._volume_list.append(volume[jj])
+            self._close.append(row[-1])
+            bit = int(row[-1] > row[0])
+            self._oc_up_down.append(bit)
+            self._dec_code = roll_pattern(self._dec_code, bit, self.N_dec)
+            self._dec.append(self._dec_code if self._ii >= self.N_dec else 0)
+            self._ema1.append(ema1[jj])
+            self._ema2.append(ema2[jj])
+            self._macd.append(self.calcMACD(self._ema1, self._ema2))
+            self._cross_signal.append(self.judgeCrossPoint())
+            self._extreme_signal.append(self.judgeExtremePoint())
+            self.updateExecutionState()
+            self.orderProcess()
+    
+    @synchronized
+    def flushBars(self):
+        """flushBars(self) -> None
+
+        merge the bars appended by append_bars into the dataset
+        """
+        if len(self._new_bars) == 0:
+            return
+        self._data_frame = pd.concat([self._data_frame] + self._new_bars, ignore_index=True)
+        self._new_bars = []
+        # the store does not have the new bars
+        self.releaseStore()
+    
+    def toLiveLists(self):
+        """toLiveLists(self) -> None
+
+        convert the arrays made by initOHLCVData into lists,
+        to which the values of new bars are appended in O(1)
+        """
+        for name in ["_timestamp", "_volume_list", "_close", "_oc_up_down", "_dec",
+                     "_ema1", "_ema2", "_macd", "_cross_signal", "_extreme_signal",
+                     "_jpy_list", "_benefit_list"]:
+            value = getattr(self, name)
+            if isinstance(value, np.ndarray):
+                setattr(self, name, value.tolist())
+    
     def calcDec(self):
         """calcDec(self) -> int
 
@@ -277,7 +552,7 @@ class DataAdapter(object):
         if len(self._dec) < self.N_dec:
             return 0
         else:
-            return int("".join([str(i_) for i_ in self._oc_up_down[-self.N_dec:]]), 2)
+            return int(encode_patterns(self._oc_up_down[-self.N_dec:], self.N_dec)[-1])
     
     # def calcEMA(self, ema_list, alpha):
     #     """calcEMA(self, ema_list, alpha) -> float
@@ -568,11 +843,21 @@ class DataAdapter(object):
         else:
             self._jpy_list.append(self._jpy_list[-1])
         self._benefit_list.append(0)
-        # <debug>
-        if self._ii == len(self._data_frame) - 1:
+        if self._ii == self._N_ohlc - 1:
+            # the order is executed when the next bar comes (see append_bars)
             return
-        row = self._data_[self._ii + 1]
-        # </debug>
+        self.executeOrder(self._ohlc_array[self._ii + 1, 1:])
+    
+    def executeOrder(self, row):
+        """executeOrder(self, row) -> None
+
+        execute the order decided on the latest bar with the next bar
+
+        Parameters
+        ----------
+        row : array-like
+            (open, high, low, close) of the next bar
+        """
         if self._benefit_timing == "worst":
             ltp_max = max([row[0], row[-1]])
             ltp_min = min([row[0], row[-1]])
@@ -653,6 +938,7 @@ class DataAdapter(object):
         self._ltp = np.empty(0, dtype=int)
         self._tmp_ltp = np.empty(0, dtype=int) # for temporal stock
         self._tmp_volume = np.empty(0, dtype=float)
+        self._tmp_executions = np.empty(0, dtype=EXECUTION_DTYPE) # executions of the open bar
         self._t_start = None
         self._t_next = None
         self._t_end = None
@@ -683,108 +969,14 @@ class DataAdapter(object):
                 else:
                     raise TypeError('analysis_results must be a dict object.')
             elif self._ana_update:
-                self._benefit_map = np.zeros((self.N_ema_max + 1, self.N_ema_max + 1), dtype=int)
-                self._stat_dead_list = []
-                self._stat_golden_list = []
-                self._dec_dead_box_list = []
-                self._dec_golden_box_list = []
-                self._dec_dead_list = []
-                self._dec_golden_list = []
-                # reserve the current dataset temporaly
-                for s in self._tmp_target:
-                    exec("tmp_{0} = copy.deepcopy(self._{0})".format(s))
-                
-                # calculate statistics and benefits for each pair (N_ema1, N_ema2)
-                for ii, kk in combinations(np.arange(0, self.N_ema_max - self.N_ema_min + 1), 2):
-                # for ii in range(self.N_ema_min, self.N_ema_max):
-                #     for kk in range(ii, self.N_ema_max):
-                    # calculate a dataset of signals
-                    self._N_ema1 = self.N_ema_min + ii
-                    self._N_ema2 = self.N_ema_min + kk
-                    self._ema_update = True
-                    self.updateAlpha()
-                    self.initOHLCVData()
-                    self._benefit_map[ii + 1, kk + 1] = 1*self._jpy_list[-1]
-
-                    # distribute temporal benefits to patterns
-                    dec_dead = [np.empty(0)] * 2**self.N_dec
-                    dec_golden = [np.empty(0)] * 2**self.N_dec
-                    for jj in range(len(self._cross_signal)):
-                        if self._cross_signal[jj] == 1: # golden case
-                            buff = self._benefit_list[jj:]
-                            # buff2 = np.array(self._extreme_signal[jj:], dtype=float)
-                            # v = buff[np.where(buff2 == 1.)[0][0] + 1]
-                            ind = buff != 0
-                            if ind.sum() != 0:
-                                v = buff[buff != 0][0]
-                            else:
-                                v = 0
-                            dec_golden[self._dec[jj]] = \
-                                np.append(dec_golden[self._dec[jj]], v)
-                        elif self._cross_signal[jj] == -1: # dead case
-                            buff = self._benefit_list[jj:]
-                            # buff2 = np.array(self._extreme_signal[jj:], dtype=float)
-                            # v = buff[np.where(buff2 == -1.)[0][0] + 1]
-                            ind = buff != 0
-                            if ind.sum() != 0:
-                                v = buff[buff != 0][0]
-                            else:
-                                v = 0
-                            dec_dead[self._dec[jj]] = \
-                                np.append(dec_dead[self._dec[jj]], v)
-                    
-                    # make datasets for boxplot
-                    dec_dead_box = []
-                    dec_golden_box = []
-                    for jj in range(2**self.N_dec):
-                        dec_dead_box.append(
-                            dataset_for_boxplot(dec_dead[jj], jj)
-                        )
-                        dec_golden_box.append(
-                            dataset_for_boxplot(dec_golden[jj], jj)
-                        )
-                    
-                    # calculate statistics
-                    stat_dead = np.zeros((2**self.N_dec, 5), dtype=float)
-                    stat_golden = np.zeros((2**self.N_dec, 5), dtype=float)
-                    for jj in range(2**self.N_dec):
-                        # golden case
-                        arr = dec_golden[jj]
-                        if len(arr) != 0:
-                            ind = np.abs(arr) <=100000
-                            dec_golden[jj] = arr[ind]
-                            stat_golden[jj] = np.array([
-                                arr[ind].max(), 
-                                arr[ind].min(), 
-                                arr[ind].mean(), 
-                                arr[ind].std(), 
-                                np.median(arr[ind])
-                            ])
-                        # dead case
-                        arr = dec_dead[jj]
-                        if len(arr) != 0:
-                            ind = np.abs(arr) <=100000
-                            dec_dead[jj] = arr[ind]
-                            stat_dead[jj] = np.array([
-                                arr[ind].max(), 
-                                arr[ind].min(), 
-                                arr[ind].mean(), 
-                                arr[ind].std(), 
-                                np.median(arr[ind])
-                            ])
-                        
-                    # append
-                    self._dec_golden_list.append(dec_golden)
-                    self._dec_dead_list.append(dec_dead)
-                    self._dec_golden_box_list.append(dec_golden_box)
-                    self._dec_dead_box_list.append(dec_dead_box)
-                    self._stat_golden_list.append(stat_golden)
-                    self._stat_dead_list.append(stat_dead)
-                
-                # set the preserved dataset to the inner parameters
-                for s in self._tmp_target:
-                    exec("self._{0} = copy.deepcopy(tmp_{0})".format(s))
-                self.updateAlpha()
+                results = self.sweepAnalysisData()
+                self._benefit_map = results["benefit_map"]
+                self._stat_dead_list = results["stat_dead_list"]
+                self._stat_golden_list = results["stat_golden_list"]
+                self._dec_dead_box_list = results["dec_dead_box_list"]
+                self._dec_golden_box_list = results["dec_golden_box_list"]
+                self._dec_dead_list = results["dec_dead_list"]
+                self._dec_golden_list = results["dec_golden_list"]
             self._ana_set = False
             self._ana_update = False
         except Exception as ex:
@@ -792,6 +984,43 @@ class DataAdapter(object):
             # fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             print("line {}: {}".format(exc_tb.tb_lineno, ex))
     
+    def sweepAnalysisData(self, max_workers=None, callback=None):
+        """sweepAnalysisData(self, max_workers=None, callback=None) -> dict
+
+        calculate statistics and benefits for each pair (N_ema1, N_ema2)
+        with N_ema_min <= N_ema1 < N_ema2 <= N_ema_max.
+        To analyze on another thread, call sweepAnalysisData of a snapshot
+        made by snapshotAnalysisData on the thread updating this instance.
+
+        Parameters
+        ----------
+        max_workers : int (default : None)
+            the number of worker processes (see sweep_ema_pairs)
+        callback    : callable (default : None)
+            function called with the progress and the partial benefit map
+
+        Returns
+        -------
+        obj : dict
+            obj has the following key-value pairs:
+                benefit_map         : numpy.2darray
+                stat_dead_list      : list
+                stat_golden_list    : list
+                dec_dead_box_list   : list
+                dec_golden_box_list : list
+                dec_dead_list       : list
+                dec_golden_list     : list
+        """
+        return self.snapshotAnalysisData().sweepAnalysisData(max_workers=max_workers, callback=callback)
+
+    def snapshotAnalysisData(self):
+        """snapshotAnalysisData(self) -> AnalysisSnapshot
+
+        return a snapshot of the inputs of sweepAnalysisData,
+        whose OHLCVStore is kept open until the snapshot is closed
+        """
+        return AnalysisSnapshot(self)
+
     def updateAlpha(self):
         """updateAlpha(self) -> None
 
@@ -802,74 +1031,46 @@ class DataAdapter(object):
         self._alpha_macd = 2. / (self._N_macd + 1.)
     
     def updateOHLCVData(self):
-        """updateOHLCVData(self) -> None
+        """updateOHLCVData(self) -> pandas.DataFrame or None
 
-        update OHLCV data
+        make the bars closed by the next page of executions.
+        The page is parsed at once and every bar closed by the page is made
+        by grouped reductions (see bars.split_closed_bars).
+        The new bars are returned and not appended to the dataset,
+        so the consumer of the bars (e.g. ChartWindow.update) appends them by append_bars.
         """
         params = {
             "product_code":self._product_code,
             "count":self._count,
-            "before":self._id_next + self._count + 1,
         }
+        if self._id_next is not None:
+            params["before"] = self._id_next + self._count
+            params["after"] = self._id_next - 1
         ## get executions
-        is_success = False
-        fault_count = 0
-        while not is_success:
-            try:
-                results = self._api.executions(**params)[::-1]
-                is_success = True
-            except:
-                fault_count += 1
-                continue
-        
-        ## extract
-        ids_ = np.array([_res["id"] for _res in results], dtype=int)
-        ltps_ = np.array([_res["price"] for _res in results], dtype=int)
-        volumes_ = np.array([_res["size"] for _res in results], dtype=float)
-        datetimes_ = []
-        for _res in results:
-            try:
-                datetimes_.append(datetime.strptime(_res["exec_date"], self._datetimeFmt))
-            except ValueError:
-                datetimes_.append(datetime.strptime(_res["exec_date"], self._datetimeFmt2))
-        datetimes_ = np.array(datetimes_)
-
-        ## find valid indices & extract
-        ind_id = ids_ >= self._id_next
-        ind_now = (datetimes_ >= self._t_start) & (datetimes_ < self._t_next)
-        ind_next = datetimes_ >= self._t_next
-        self._ltp = np.hstack((self._ltp, ltps_[ind_id&ind_now]))
-        self._tmp_ltp = np.hstack((self._tmp_ltp, ltps_[ind_id&ind_now]))
-        self._tmp_volume = np.hstack((self._tmp_volume, volumes_[ind_id&ind_now]))
-        
-        ## processing for next step
-        # if (ind_id&ind_now).sum() == 0:
-        #     id_start_ = 
-        #     continue
-        if ind_next.sum() == 0:
-            self._id_next = 1*(ids_[ind_id&ind_now])[-1]
-        else:
-            timestamp_ = self._t_start.timestamp()
-            id_end_ = 1*(ids_[ind_id&ind_next])[0] - 1
-            self._tmp_ohlc.append([
-                timestamp_, 
-                self._id_start, 
-                self._id_end, 
-                self._tmp_ltp[0], 
-                self._tmp_ltp.max(), 
-                self._tmp_ltp.min(), 
-                self._tmp_ltp[-1], 
-                self._tmp_volume.sum()
-            ])
-            self._id_start = id_end_ + 1
-            self._id_next = 1*(ids_[ind_id&ind_next])[-1]
-            self._tmp_ltp = np.empty(0, dtype=int)
-            self._tmp_ltp = np.hstack((self._tmp_ltp, ltps_[ind_id&ind_next]))
-            self._tmp_volume = np.empty(0, dtype=float)
-            self._tmp_volume = np.hstack((self._tmp_volume, volumes_[ind_id&ind_next]))
-            self._t_start += timedelta(minutes=1)
-            self._t_next += timedelta(minutes=1)
-            print("next id:{}, datetime:{}".format(self._id_start, self._t_start.strftime("%Y-%m-%dT%H:%M:%S")))
+        executions = parse_executions(self._api.executions(**params))
+        if self._t_start is not None:
+            t_start = (self._t_start - datetime(1970, 1, 1)).total_seconds()
+            executions = executions[executions["time"] >= t_start]
+        if len(executions) == 0:
+            return None
+        self._ltp = np.hstack((self._ltp, executions["price"]))
+        self._id_next = int(executions["id"][-1]) + 1
+
+        ## make the closed bars
+        self._tmp_executions = np.concatenate((self._tmp_executions, executions))
+        ohlcv, self._tmp_executions = split_closed_bars(self._tmp_executions, self._bar_seconds)
+        self._tmp_ltp = self._tmp_executions["price"]
+        self._tmp_volume = self._tmp_executions["size"]
+        if len(ohlcv) == 0:
+            return None
+        for row in ohlcv.values.tolist():
+            self._tmp_ohlc.append(row)
+            self._indicators.update(row[:1] + row[3:7])
+        self._id_start = int(self._tmp_executions["id"][0])
+        self._t_start = datetime(1970, 1, 1) + timedelta(seconds=int(ohlcv["time"].values[-1]) + self._bar_seconds)
+        self._t_next = self._t_start + timedelta(seconds=self._bar_seconds)
+        print("next id:{}, datetime:{}".format(self._id_start, self._t_start.strftime("%Y-%m-%dT%H:%M:%S")))
+        return ohlcv
     
     @footprint
     def save(self, fpath):
@@ -899,15 +1100,91 @@ class DataAdapter(object):
         return obj
     
     @property
+    @synchronized
     def data(self):
+        self.flushBars()
         return self._data_frame
     
     @data.setter
+    @synchronized
     def data(self, df):
+        self.releaseStore()
+        self._new_bars = []
+        if isinstance(df, OHLCVStore):
+            self._store = df
+            df = df.to_dataframe()
         self._data_frame = df
         self._df_initialized = True
         self.initOHLCVData()
     
+    @property
+    @synchronized
+    def store(self):
+        """OHLCVStore of the dataset, which is made at the first access"""
+        self.flushBars()
+        if self._store is None and isinstance(self._data_frame, pd.DataFrame):
+            self._store = OHLCVStore.from_dataframe(self._data_frame)
+            self._store_owned = True
+        return self._store
+    
+    @synchronized
+    def releaseStore(self):
+        """releaseStore(self) -> None
+
+        release the OHLCVStore made by this instance.
+        The store is closed after the snapshots using it are closed.
+        """
+        if self._store is not None and self._store_owned:
+            if id(self._store) in self._store_users:
+                self._retired_stores[id(self._store)] = self._store
+            else:
+                self._store.close()
+        self._store = None
+        self._store_owned = False
+    
+    @synchronized
+    def acquireStore(self):
+        """acquireStore(self) -> OHLCVStore or None
+
+        return the OHLCVStore of the dataset, which is not closed
+        until releaseStoreUse is called with it
+        """
+        store = self.store
+        if store is not None:
+            self._store_users[id(store)] = self._store_users.get(id(store), 0) + 1
+        return store
+    
+    @synchronized
+    def releaseStoreUse(self, store):
+        """releaseStoreUse(self, store) -> None
+
+        release the OHLCVStore taken by acquireStore,
+        and close it if it has been released by this instance and has no other users
+        """
+        key = id(store)
+        self._store_users[key] -= 1
+        if self._store_users[key] > 0:
+            return
+        del self._store_users[key]
+        if key in self._retired_stores:
+            self._retired_stores.pop(key).close()
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_store_users"] = {}
+        state["_retired_stores"] = {}
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+    
+    @property
+    def indicators(self):
+        """IndicatorRegistry updated with each new bar of the live data"""
+        return self._indicators
+    
     @property
     def analysis_results(self):
         return self._analysis_results
@@ -925,6 +1202,8 @@ class DataAdapter(object):
     
     @N_ema1.setter
     def N_ema1(self, N):
+        if N == self._N_ema1:
+            return
         self._N_ema1 = N
         self._alpha1 = 2./(self._N_ema1 + 1.)
         self._ema_update = True
@@ -935,6 +1214,8 @@ class DataAdapter(object):
     
     @N_ema2.setter
     def N_ema2(self, N):
+        if N == self._N_ema2:
+            return
         self._N_ema2 = N
         self._alpha2 = 2./(self._N_ema2 + 1.)
         self._ema_update = True
@@ -945,6 +1226,8 @@ class DataAdapter(object):
     
     @delta.setter
     def delta(self, v):
+        if v == self._delta:
+            return
         self._delta = v
         self._delta_update = True
     
@@ -960,13 +1243,19 @@ class DataAdapter(object):
     def timestamp(self):
         return self._timestamp
     
+    @property
+    def bars_per_day(self):
+        """the number of bars per day for the bar size"""
+        return 86400. / self._bar_seconds
+    
     @property
     def latest_ltp(self):
         return self._latest
     
     @property
     def ohlc_list(self):
-        return self._ohlc_list
+        """view of the OHLC buffer with the shape of (# of bars, 5)"""
+        return self._ohlc_array[:self._N_ohlc]
     
     @property
     def volume_list(self):
@@ -1115,7 +1404,7 @@ class DataAdapter(object):
             end = len(self._timestamp)
         obj = {
             "timestamp":self._timestamp[start:end], 
-            "ohlc":self._ohlc_list[start:end], 
+            "ohlc":self.ohlc_list[start:end], 
             "volume":self._volume_list[start:end], 
             "ema1":self._ema1[start:end], 
             "ema2":self._ema2[start:end], 
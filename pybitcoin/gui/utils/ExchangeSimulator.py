@@ -0,0 +1,505 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+ExchangeSimulator.py
+This file offers the following items:
+
+* ExchangeSimulator
+* SimulatedError
+"""
+
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+import urllib.parse
+import numpy as np
+import pybitflyer
+
+try:
+    from .bars import EXECUTION_DTYPE, parse_timestamps
+except ImportError:
+    import sys
+    sys.path.append("../utils/")
+    from bars import EXECUTION_DTYPE, parse_timestamps
+
+EPOCH = datetime(1970, 1, 1)
+
+class SimulatedError(ConnectionError):
+    """an error injected by ExchangeSimulator"""
+    pass
+
+class ExchangeSimulator(pybitflyer.API):
+    """ExchangeSimulator(pybitflyer.API)
+
+    This class offers a local exchange replaying executions, which has the same methods as pybitflyer.API.
+    `request` is answered in this process instead of bitFlyer,
+    or `serve` starts a local HTTP server for the real API classes.
+
+    The clock of the exchange starts at `start` and advances by `step` seconds for every request
+    (or by `advance`), and only the executions before the clock are visible.
+    Market orders are filled at the best bid / ask around the latest execution
+    and limit orders are filled when a visible execution reaches their prices,
+    so the results are deterministic for the same sequence of requests.
+    Latency and errors are injected with the given rate and seed.
+
+    Examples
+    --------
+    >>> api = ExchangeSimulator("../data/executions/executions_694426164_694446163.npy",
+    ...                         start=datetime(2019, 1, 1), step=0.5, latency=0.05, error_rate=0.01)
+    >>> api.ticker(product_code="FX_BTC_JPY")["ltp"]
+    >>> api.sendchildorder(product_code="FX_BTC_JPY", child_order_type="MARKET", side="BUY", size=0.01)
+    >>> server, url = api.serve() # pybitflyer.API().api_url = url
+    """
+    def __init__(self, executions, product_code="FX_BTC_JPY", start=None, step=0., spread=0.,
+                 collateral=1000000., leverage=4., latency=0., error_rate=0., seed=0, quotes=None):
+        """__init__(self, executions, product_code="FX_BTC_JPY", start=None, step=0., spread=0.,
+                    collateral=1000000., leverage=4., latency=0., error_rate=0., seed=0, quotes=None) -> None
+
+        initialize this class
+
+        Parameters
+        ----------
+        executions   : numpy.ndarray with EXECUTION_DTYPE or str
+            executions to replay or the path of a file saved by ExecutionDownloader
+        product_code : str (default : "FX_BTC_JPY")
+            product code of the executions
+        start        : datetime or float (default : None)
+            the first time of the clock (naive datetime in UTC or unix time).
+            if None, the time of the last execution, i.e. all the executions are visible.
+        step         : float (default : 0.0)
+            seconds advanced by every request
+        spread       : float (default : 0.0)
+            difference between the best ask and the best bid
+        collateral   : float (default : 1000000.0)
+            deposit in JPY
+        leverage     : float (default : 4.0)
+            leverage used for require_collateral
+        latency      : float or callable (default : 0.0)
+            seconds to wait for every request, or a function of numpy.random.RandomState returning it
+        error_rate   : float (default : 0.0)
+            probability that a request raises SimulatedError
+        seed         : int (default : 0)
+            seed of the latency and the errors
+        quotes       : numpy.2darray (default : None)
+            (best bid, best ask) at each execution, which are used instead of `spread`
+        """
+        super().__init__(api_key="simulator", api_secret="simulator", timeout=None)
+        self.api_url = "simulator://"
+        if isinstance(executions, str):
+            executions = np.load(executions)
+        executions = np.asarray(executions, dtype=EXECUTION_DTYPE)
+        order = np.argsort(executions["id"], kind="stable")
+        self._executions = executions[order]
+        self._quotes = None if quotes is None else np.asarray(quotes, dtype=float)[order]
+        if len(self._executions) == 0:
+            raise ValueError("executions must not be empty.")
+        # contiguous copies, since searchsorted copies fields of a structured array for every call
+        self._ids = np.ascontiguousarray(self._executions["id"])
+        self._times = np.ascontiguousarray(self._executions["time"])
+        self._prices = np.ascontiguousarray(self._executions["price"])
+        self._cum_size = np.append(0., np.cumsum(self._executions["size"]))
+        self._product_code = product_code
+        if start is None:
+            start = self._times[-1]
+        self._start = start if not isinstance(start, datetime) else (start - EPOCH).total_seconds()
+        self.step = step
+        self.spread = spread
+        self.collateral = collateral
+        self.leverage = leverage
+        self.latency = latency
+        self.error_rate = error_rate
+        self._seed = seed
+        self._lock = threading.Lock()
+        self._routes = self._make_routes()
+        self.reset()
+
+    def reset(self):
+        """reset(self) -> None
+
+        cancel everything done by requests and rewind the clock to the start
+        """
+        self._now = self._start
+        self._visible = int(np.searchsorted(self._times, self._now, "right"))
+        self._rng = np.random.RandomState(self._seed)
+        self._orders = [] # child orders from the oldest one
+        self._order_index = {} # child orders by child_order_id and child_order_acceptance_id
+        self._active = [] # active limit orders from the oldest one
+        self._fills = [] # executions of the child orders from the oldest one
+        self._lots = [] # open positions from the oldest one
+        self._realized = 0. # profit and loss of closed positions
+        self._n_orders = 0
+        self.calls = {} # the number of requests per endpoint
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"], state["_routes"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._routes = self._make_routes()
+
+    def _make_routes(self):
+        return {
+            "/v1/markets":self._markets,
+            "/v1/board":self._board,
+            "/v1/ticker":self._ticker,
+            "/v1/executions":self._public_executions,
+            "/v1/getboardstate":self._boardstate,
+            "/v1/gethealth":self._health,
+            "/v1/me/getpermissions":self._permissions,
+            "/v1/me/getcollateral":self._collateral,
+            "/v1/me/sendchildorder":self._sendchildorder,
+            "/v1/me/cancelchildorder":self._cancelchildorder,
+            "/v1/me/cancelallchildorders":self._cancelallchildorders,
+            "/v1/me/getchildorders":self._getchildorders,
+            "/v1/me/getexecutions":self._getexecutions,
+            "/v1/me/getpositions":self._getpositions,
+        }
+
+    @classmethod
+    def from_tickers(cls, tickers, **kwargs):
+        """from_tickers(cls, tickers, **kwargs) -> ExchangeSimulator
+
+        make a simulator replaying tickers recorded by `API.ticker` (e.g. scripts/getticker.py).
+        Each ticker is regarded as an execution at "ltp" quoted by "best_bid" and "best_ask",
+        so market orders are filled at the recorded quotes.
+        The clock starts at the first ticker unless `start` is given.
+        """
+        executions = np.empty(len(tickers), dtype=EXECUTION_DTYPE)
+        executions["id"] = np.arange(1, len(tickers) + 1)
+        executions["time"] = parse_timestamps([ticker["timestamp"] for ticker in tickers])
+        executions["price"] = [ticker["ltp"] for ticker in tickers]
+        executions["size"] = 0.
+        executions["side"] = 0
+        ltp = executions["price"]
+        quotes = np.column_stack([
+            [ticker.get("best_bid", p) for ticker, p in zip(tickers, ltp)],
+            [ticker.get("best_ask", p) for ticker, p in zip(tickers, ltp)],
+        ])
+        kwargs.setdefault("start", executions["time"][0] if len(tickers) != 0 else None)
+        if len(tickers) != 0:
+            kwargs.setdefault("product_code", tickers[0].get("product_code", "FX_BTC_JPY"))
+        return cls(executions, quotes=quotes, **kwargs)
+
+    def request(self, endpoint, method="GET", params=None):
+        """request(self, endpoint, method="GET", params=None) -> object
+
+        answer a request in the same format as bitFlyer.
+        Unknown endpoints are answered with an error message like bitFlyer.
+        """
+        params = dict(params or {})
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            latency = self.latency(self._rng) if callable(self.latency) else self.latency
+            is_error = self.error_rate > 0 and self._rng.rand() < self.error_rate
+        if latency > 0:
+            time.sleep(latency)
+        if is_error:
+            raise SimulatedError("simulated error @ {}".format(endpoint))
+        with self._lock:
+            self._advance(self.step)
+            handler = self._routes.get(endpoint)
+            if handler is None:
+                return {"status":-1, "error_message":"{} is not supported.".format(endpoint)}
+            if params.get("product_code", self._product_code) != self._product_code \
+                    and endpoint not in ("/v1/markets", "/v1/me/getpermissions", "/v1/me/getcollateral"):
+                return {"status":-2, "error_message":"unknown product_code."}
+            return handler(params)
+
+    def advance(self, seconds):
+        """advance(self, seconds) -> None
+
+        advance the clock of the exchange
+        """
+        with self._lock:
+            self._advance(seconds)
+
+    @property
+    def now(self):
+        """current unix time of the exchange"""
+        return self._now
+
+    @property
+    def fills(self):
+        """executions of the child orders from the oldest one"""
+        return [dict(fill) for fill in self._fills]
+
+    @property
+    def ltp(self):
+        """the price of the latest visible execution"""
+        return float(self._prices[max(self._visible - 1, 0)])
+
+    def serve(self, host="127.0.0.1", port=0):
+        """serve(self, host="127.0.0.1", port=0) -> (http.server.ThreadingHTTPServer, str)
+
+        start a local HTTP server answering requests by this simulator on a daemon thread.
+        Set the returned url to `api_url` of an API instance to use the server,
+        and call `shutdown` of the server to stop it.
+        """
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            wbufsize = -1 # send the header and the body at once
+
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                params = {key:_number(values[-1]) for key, values in urllib.parse.parse_qs(url.query).items()}
+                self._respond(url.path, "GET", params)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                params = json.loads(self.rfile.read(length).decode("utf-8") or "null")
+                self._respond(urllib.parse.urlparse(self.path).path, "POST", params)
+
+            def _respond(self, endpoint, method, params):
+                try:
+                    code, content = 200, simulator.request(endpoint, method, params)
+                except SimulatedError as ex:
+                    code, content = 500, {"status":-500, "error_message":str(ex)}
+                body = b"" if content == "" else json.dumps(content).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, "http://{}:{}".format(*server.server_address[:2])
+
+    def _advance(self, seconds):
+        if seconds == 0:
+            return
+        self._now += seconds
+        visible = int(np.searchsorted(self._times, self._now, "right"))
+        if visible > self._visible:
+            if len(self._active) != 0:
+                self._match(self._prices[self._visible:visible])
+            self._visible = visible
+        self._expire()
+
+    ## public API
+    def _markets(self, params):
+        return [{"product_code":self._product_code}]
+
+    def _board(self, params):
+        bid, ask = self._best()
+        return {
+            "mid_price":(bid + ask) / 2.,
+            "bids":[{"price":bid - ii, "size":1.} for ii in range(10)],
+            "asks":[{"price":ask + ii, "size":1.} for ii in range(10)],
+        }
+
+    def _ticker(self, params):
+        bid, ask = self._best()
+        k = int(np.searchsorted(self._times, self._now - 86400., "right"))
+        volume = self._cum_size[self._visible] - self._cum_size[min(k, self._visible)]
+        return {
+            "product_code":self._product_code, "state":"RUNNING",
+            "timestamp":_isoformat(self._now), "tick_id":self._visible,
+            "best_bid":bid, "best_ask":ask, "best_bid_size":1., "best_ask_size":1.,
+            "total_bid_depth":10., "total_ask_depth":10., "ltp":self.ltp,
+            "volume":volume, "volume_by_product":volume,
+        }
+
+    def _public_executions(self, params):
+        count = int(params.get("count", 100))
+        hi = self._visible
+        if params.get("before") is not None:
+            hi = min(hi, int(np.searchsorted(self._ids, int(params["before"]), "left")))
+        lo = 0
+        if params.get("after") is not None:
+            lo = int(np.searchsorted(self._ids, int(params["after"]), "right"))
+        lo = max(lo, hi - count)
+        sides = {1:"BUY", -1:"SELL", 0:""}
+        return [{
+            "id":int(ex["id"]), "side":sides[int(ex["side"])], "price":float(ex["price"]),
+            "size":float(ex["size"]), "exec_date":_isoformat(ex["time"]),
+            "buy_child_order_acceptance_id":"", "sell_child_order_acceptance_id":"",
+        } for ex in self._executions[lo:hi][::-1]]
+
+    def _boardstate(self, params):
+        return {"health":"NORMAL", "state":"RUNNING"}
+
+    def _health(self, params):
+        return {"status":"NORMAL"}
+
+    ## private API
+    def _permissions(self, params):
+        return sorted(self._routes)
+
+    def _collateral(self, params):
+        pnl = self._open_pnl()
+        require = sum(lot["price"] * lot["size"] for lot in self._lots) / self.leverage
+        collateral = self.collateral + self._realized
+        return {
+            "collateral":collateral, "open_position_pnl":pnl, "require_collateral":require,
+            "keep_rate":(collateral + pnl) / require if require > 0 else 0.,
+        }
+
+    def _sendchildorder(self, params):
+        side = str(params.get("side", "")).upper()
+        order_type = str(params.get("child_order_type", "")).upper()
+        size = float(params.get("size", 0.))
+        if side not in ("BUY", "SELL") or order_type not in ("MARKET", "LIMIT") or size <= 0:
+            return {"status":-110, "error_message":"invalid order."}
+        if order_type == "LIMIT" and float(params.get("price", 0.)) <= 0:
+            return {"status":-110, "error_message":"invalid price."}
+        self._n_orders += 1
+        order = {
+            "id":self._n_orders,
+            "child_order_id":"JOR{}-{:06d}".format(_datestamp(self._now), self._n_orders),
+            "child_order_acceptance_id":"JRF{}-{:06d}".format(_datestamp(self._now), self._n_orders),
+            "product_code":self._product_code, "side":side, "child_order_type":order_type,
+            "price":float(params.get("price", 0.)) if order_type == "LIMIT" else 0.,
+            "average_price":0., "size":size, "child_order_state":"ACTIVE",
+            "expire_date":_isoformat(self._now + 60. * float(params.get("minute_to_expire", 43200))),
+            "child_order_date":_isoformat(self._now), "outstanding_size":size,
+            "cancel_size":0., "executed_size":0., "total_commission":0.,
+        }
+        self._orders.append(order)
+        self._order_index[order["child_order_id"]] = order
+        self._order_index[order["child_order_acceptance_id"]] = order
+        bid, ask = self._best()
+        if order_type == "MARKET":
+            self._fill(order, ask if side == "BUY" else bid)
+        elif (side == "BUY" and order["price"] >= ask) or (side == "SELL" and order["price"] <= bid):
+            self._fill(order, ask if side == "BUY" else bid)
+        else:
+            self._active.append(order)
+        return {"child_order_acceptance_id":order["child_order_acceptance_id"]}
+
+    def _cancelchildorder(self, params):
+        for order in self._select_orders(params):
+            self._cancel(order)
+        return ""
+
+    def _cancelallchildorders(self, params):
+        for order in list(self._active):
+            self._cancel(order)
+        return ""
+
+    def _getchildorders(self, params):
+        orders = self._select_orders(params)
+        if params.get("child_order_state") is not None:
+            orders = [order for order in orders if order["child_order_state"] == params["child_order_state"]]
+        return [dict(order) for order in orders[::-1][:int(params.get("count", 100))]]
+
+    def _getexecutions(self, params):
+        fills = self._fills
+        for key in ("child_order_id", "child_order_acceptance_id"):
+            if params.get(key) is not None:
+                fills = [fill for fill in fills if fill[key] == params[key]]
+        return [dict(fill) for fill in fills[::-1][:int(params.get("count", 100))]]
+
+    def _getpositions(self, params):
+        ltp = self.ltp
+        return [{
+            "product_code":self._product_code, "side":lot["side"], "price":lot["price"],
+            "size":lot["size"], "commission":0., "swap_point_accumulate":0.,
+            "require_collateral":lot["price"] * lot["size"] / self.leverage,
+            "open_date":lot["open_date"], "leverage":self.leverage,
+            "pnl":(ltp - lot["price"]) * lot["size"] * (1 if lot["side"] == "BUY" else -1), "sfd":0.,
+        } for lot in self._lots]
+
+    ## matching
+    def _best(self):
+        if self._quotes is not None:
+            bid, ask = self._quotes[max(self._visible - 1, 0)]
+            return float(bid), float(ask)
+        return self.ltp - self.spread / 2., self.ltp + self.spread / 2.
+
+    def _match(self, prices):
+        """fill the active limit orders reached by the prices of new executions"""
+        for order in list(self._active):
+            if order["side"] == "BUY":
+                reached = prices <= order["price"]
+            else:
+                reached = prices >= order["price"]
+            if reached.any():
+                self._fill(order, order["price"])
+
+    def _expire(self):
+        if len(self._active) == 0:
+            return
+        now = _isoformat(self._now)
+        for order in list(self._active):
+            if order["expire_date"] <= now:
+                self._cancel(order, "EXPIRED")
+
+    def _cancel(self, order, state="CANCELED"):
+        if order["child_order_state"] == "ACTIVE":
+            order["child_order_state"] = state
+            order["cancel_size"], order["outstanding_size"] = order["outstanding_size"], 0.
+            self._active.remove(order)
+
+    def _select_orders(self, params):
+        selected = None
+        for key in ("child_order_id", "child_order_acceptance_id"):
+            if params.get(key) is not None:
+                order = self._order_index.get(params[key])
+                if order is None or order[key] != params[key] or (selected is not None and order is not selected):
+                    return []
+                selected = order
+        return self._orders if selected is None else [selected]
+
+    def _fill(self, order, price):
+        size = order["outstanding_size"]
+        order.update({
+            "average_price":price, "executed_size":order["size"],
+            "outstanding_size":0., "child_order_state":"COMPLETED",
+        })
+        if order in self._active:
+            self._active.remove(order)
+        self._fills.append({
+            "id":len(self._fills) + 1, "child_order_id":order["child_order_id"],
+            "side":order["side"], "price":price, "size":size, "commission":0.,
+            "exec_date":_isoformat(self._now),
+            "child_order_acceptance_id":order["child_order_acceptance_id"],
+        })
+
+        # close the opposite positions from the oldest one
+        while size > 1e-12 and len(self._lots) != 0 and self._lots[0]["side"] != order["side"]:
+            lot = self._lots[0]
+            closed = min(size, lot["size"])
+            sign = 1 if lot["side"] == "BUY" else -1
+            self._realized += sign * (price - lot["price"]) * closed
+            lot["size"] -= closed
+            size -= closed
+            if lot["size"] <= 1e-12:
+                self._lots.pop(0)
+        if size > 1e-12:
+            self._lots.append({
+                "side":order["side"], "price":price, "size":size, "open_date":_isoformat(self._now)
+            })
+
+    def _open_pnl(self):
+        ltp = self.ltp
+        return sum(
+            (ltp - lot["price"]) * lot["size"] * (1 if lot["side"] == "BUY" else -1) for lot in self._lots
+        )
+
+def _isoformat(t):
+    return (EPOCH + timedelta(seconds=float(t))).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+
+def _datestamp(t):
+    return (EPOCH + timedelta(seconds=float(t))).strftime("%Y%m%d")
+
+def _number(s):
+    for cast in (int, float):
+        try:
+            return cast(s)
+        except ValueError:
+            pass
+    return s
@@ -0,0 +1,197 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+ExecutionDownloader.py
+This file offers the following items:
+
+* ExecutionDownloader
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import glob
+import os
+import numpy as np
+
+try:
+    from .APIClient import as_client
+    from .bars import EXECUTION_DTYPE, parse_executions, executions_to_ohlcv
+except ImportError:
+    import sys
+    sys.path.append("../utils/")
+    from APIClient import as_client
+    from bars import EXECUTION_DTYPE, parse_executions, executions_to_ohlcv
+
+class ExecutionDownloader(object):
+    """ExecutionDownloader(object)
+
+    This class offers a concurrent and resumable downloader of executions.
+    An id range is split into segments, which are fetched concurrently by threads.
+    Each completed segment is saved to `fldr` as "executions_{first id}_{last id}.npy",
+    so the segments saved before a crash are not downloaded again.
+    A segment beyond the newest execution is saved as "partial_{first id}_{last id}.npy",
+    which is loaded as well but downloaded again by the next call.
+
+    Examples
+    --------
+    >>> downloader = ExecutionDownloader(api, "../data/executions", max_workers=4, rate=8.)
+    >>> executions = downloader.download(694426164, 694826163)
+    >>> ohlcv = downloader.to_ohlcv(694426164, 694826163)
+    """
+    def __init__(self, api, fldr, product_code="FX_BTC_JPY", count=500,
+                 segment_size=20000, max_workers=4, **kwargs):
+        """__init__(self, api, fldr, product_code="FX_BTC_JPY", count=500,
+                    segment_size=20000, max_workers=4, **kwargs) -> None
+
+        initialize this class
+
+        Parameters
+        ----------
+        api            : API class in pybitflyer or APIClient
+            an API instance
+        fldr           : str
+            folder to save the segments to
+        product_code   : str (default : "FX_BTC_JPY")
+            product code
+        count          : int (default : 500)
+            the number of executions per request
+        segment_size   : int (default : 20000)
+            the number of ids per segment
+        max_workers    : int (default : 4)
+            the number of threads
+        kwargs         : options
+            options of APIClient used if `api` is not an APIClient.
+            The request budget (rate) is shared by all the threads.
+        """
+        self._api = as_client(api, **kwargs)
+        self._fldr = fldr
+        self._product_code = product_code
+        self._count = count
+        self._segment_size = segment_size
+        self._max_workers = max_workers
+        os.makedirs(self._fldr, exist_ok=True)
+
+    def segments(self, id_start, id_end):
+        """segments(self, id_start, id_end) -> list
+
+        split the range of [id_start, id_end] into segments of (first id, last id)
+        """
+        heads = list(range(id_start, id_end + 1, self._segment_size))
+        return [(head, min(head + self._segment_size - 1, id_end)) for head in heads]
+
+    def download(self, id_start, id_end, callback=None):
+        """download(self, id_start, id_end, callback=None) -> numpy.ndarray
+
+        download the executions with ids in [id_start, id_end]
+
+        Parameters
+        ----------
+        id_start : int
+            the first id
+        id_end   : int
+            the last id
+        callback : callable (default : None)
+            function called with (the number of done segments, the number of segments)
+            whenever a segment is completed
+
+        Returns
+        -------
+        executions : numpy.ndarray with EXECUTION_DTYPE
+            executions sorted by id
+        """
+        segments = self.segments(id_start, id_end)
+        todo = [seg for seg in segments if not os.path.exists(self._segment_path(*seg))]
+        done = len(segments) - len(todo)
+        if callback is not None:
+            callback(done, len(segments))
+        if len(todo) != 0:
+            id_latest = self.latest_id()
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                futures = [executor.submit(self._download_segment, *seg, id_latest) for seg in todo]
+                for future in as_completed(futures):
+                    future.result()
+                    done += 1
+                    if callback is not None:
+                        callback(done, len(segments))
+        return self.load(id_start, id_end)
+
+    def load(self, id_start, id_end):
+        """load(self, id_start, id_end) -> numpy.ndarray
+
+        load the saved executions with ids in [id_start, id_end].
+        The executions saved in overlapping segments are loaded once.
+        """
+        parts = []
+        fpath_list = glob.glob(os.path.join(self._fldr, "executions_*_*.npy"))
+        fpath_list += glob.glob(os.path.join(self._fldr, "partial_*_*.npy"))
+        for fpath in fpath_list:
+            head, tail = [int(s) for s in os.path.splitext(os.path.basename(fpath))[0].split("_")[1:]]
+            if tail < id_start or head > id_end:
+                continue
+            parts.append(np.load(fpath))
+        if len(parts) == 0:
+            return np.empty(0, dtype=EXECUTION_DTYPE)
+        executions = np.concatenate(parts)
+        # sorted by id without the duplicates of overlapping segments
+        _, index = np.unique(executions["id"], return_index=True)
+        executions = executions[index]
+        return executions[(executions["id"] >= id_start) & (executions["id"] <= id_end)]
+
+    def to_ohlcv(self, id_start, id_end, bar_seconds=60, callback=None):
+        """to_ohlcv(self, id_start, id_end, bar_seconds=60, callback=None) -> pandas.DataFrame
+
+        download the executions with ids in [id_start, id_end] and make OHLCV bars
+        (see bars.executions_to_ohlcv, bar_seconds can be a bar size like "5m")
+        """
+        return executions_to_ohlcv(self.download(id_start, id_end, callback), bar_seconds)
+
+    def latest_id(self):
+        """latest_id(self) -> int
+
+        return the id of the newest execution
+        """
+        results = self._api.executions(product_code=self._product_code, count=1)
+        if not isinstance(results, list) or len(results) == 0:
+            raise ValueError("unexpected response: {}".format(results))
+        return int(results[0]["id"])
+
+    def _segment_path(self, head, tail, partial=False):
+        prefix = "partial" if partial else "executions"
+        return os.path.join(self._fldr, "{}_{}_{}.npy".format(prefix, head, tail))
+
+    def _download_segment(self, head, tail, id_latest):
+        """_download_segment(self, head, tail, id_latest) -> None
+
+        download the executions with ids in [head, tail] from the newest one
+        and save them to a file. The segment is saved as a partial one
+        if `tail` is beyond `id_latest`, the id of the newest execution.
+        """
+        pages = []
+        before = tail + 1
+        while before > head:
+            results = self._api.executions(
+                product_code=self._product_code, count=self._count,
+                before=before, after=head - 1
+            )
+            if not isinstance(results, list):
+                raise ValueError("unexpected response: {}".format(results))
+            if len(results) == 0:
+                break
+            pages.append(parse_executions(results))
+            before = int(pages[-1]["id"][0])
+            if len(results) < self._count:
+                break
+        if len(pages) == 0:
+            executions = np.empty(0, dtype=EXECUTION_DTYPE)
+        else:
+            executions = np.concatenate(pages[::-1])
+            executions = executions[executions["id"] >= head]
+
+        # save to a temporary file and rename it so that a broken file is never left
+        partial = tail > id_latest
+        fpath = self._segment_path(head, tail, partial)
+        with open(fpath + ".tmp", "wb") as ff:
+            np.save(ff, executions)
+        os.replace(fpath + ".tmp", fpath)
+        if not partial and os.path.exists(self._segment_path(head, tail, True)):
+            os.remove(self._segment_path(head, tail, True))
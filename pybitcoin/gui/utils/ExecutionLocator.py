@@ -0,0 +1,235 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+ExecutionLocator.py
+This file offers the following items:
+
+* ExecutionLocator
+"""
+
+from datetime import datetime
+import os
+import numpy as np
+
+try:
+    from .bars import parse_executions
+except ImportError:
+    import sys
+    sys.path.append("../utils/")
+    from bars import parse_executions
+
+class ExecutionLocator(object):
+    """ExecutionLocator(object)
+
+    This class locates the execution id corresponding to a datetime.
+    Since both ids and exec_date of executions are monotone,
+    the id is searched by interpolation over id space between two known (id, time) pairs,
+    which falls back to bisection when the bracket does not shrink by half.
+    Every fetched page is remembered in an index of (id, time) pairs,
+    which is saved to `index_path` and used as brackets of later searches.
+
+    Examples
+    --------
+    >>> locator = ExecutionLocator(api, "../data/executions/id_index.npy")
+    >>> id_ = locator.locate(datetime(2019, 1, 1)) # UTC
+    """
+    def __init__(self, api, index_path=None, product_code="FX_BTC_JPY", count=500):
+        """__init__(self, api, index_path=None, product_code="FX_BTC_JPY", count=500) -> None
+
+        initialize this class
+
+        Parameters
+        ----------
+        api          : API class in pybitflyer
+            an API instance
+        index_path   : str (default : None)
+            path of the index. if None, the index is not saved.
+        product_code : str (default : "FX_BTC_JPY")
+            product code
+        count        : int (default : 500)
+            the number of executions per request
+        """
+        self._api = api
+        self._index_path = index_path
+        self._product_code = product_code
+        self._count = count
+        self._index = {}
+        if index_path is not None and os.path.exists(index_path):
+            ids, times = np.load(index_path)
+            self._index = dict(zip(ids.astype(np.int64).tolist(), times.tolist()))
+        self.requests = 0 # the number of requests
+
+    def locate(self, t, guess=None):
+        """locate(self, t, guess=None) -> int
+
+        find the id which comes after and nearest to the datetime `t`,
+        i.e. (the last id executed before `t`) + 1, which is the same as `find_id`.
+
+        Parameters
+        ----------
+        t     : datetime or float
+            datetime in UTC (naive datetime) or unix time
+        guess : int (default : None)
+            an id near the target, which is used as the first probe
+
+        Returns
+        -------
+        id_ : int
+        """
+        t = self._seconds(t)
+        lo, hi = self._bracket(t)
+        if guess is not None:
+            result = self._probe(int(guess), t)
+            if result[0] is not None:
+                return self._finish(result[0])
+            lo, hi = self._update(lo, hi, result)
+        if hi is None:
+            result = self._probe(None, t) # the latest executions
+            if result[0] is not None:
+                return self._finish(result[0])
+            lo, hi = self._update(lo, hi, result)
+            if hi is None:
+                # no execution at or after t yet
+                return self._finish(lo[0] + 1)
+        step = None
+        while lo is None:
+            # gallop backward from hi until an execution before t is found
+            if step is None:
+                step = self._first_step(hi, t)
+            else:
+                step *= 4
+            result = self._probe(max(hi[0] - step, 0), t)
+            if result[0] is not None:
+                return self._finish(result[0])
+            lo, hi = self._update(lo, hi, result)
+
+        width = hi[0] - lo[0]
+        use_bisection = False
+        last = lo # the newest execution known before t, while lo may be raised over a gap of ids
+        while True:
+            if hi[0] - lo[0] <= self._count:
+                id_ = hi[0] - 1
+            elif use_bisection or not np.isfinite(lo[1]):
+                id_ = (lo[0] + hi[0]) // 2
+            else:
+                ratio = (t - lo[1]) / (hi[1] - lo[1])
+                # center the page on the estimate
+                id_ = int(lo[0] + ratio * (hi[0] - lo[0])) + self._count // 2
+            # keep the probe strictly inside the bracket
+            id_ = min(max(id_, lo[0] + 1), hi[0] - 1)
+            result = self._probe(id_, t, after=lo[0] if hi[0] - lo[0] <= self._count else None)
+            if result[0] is not None:
+                return self._finish(result[0])
+            lo_new, hi_new = self._update(lo, hi, result)
+            if hi[0] - lo[0] <= self._count and result[1] is None and result[2] is None:
+                # no execution in the bracket
+                return self._finish(last[0] + 1 if np.isfinite(lo[1]) else hi[0])
+            if lo_new is not lo:
+                last = lo_new
+            elif result[1] is not None and id_ > lo[0]:
+                # no execution in (lo, id_], so the bracket is narrowed over the gap of ids
+                lo_new = (id_, lo[1])
+            use_bisection = hi_new[0] - lo_new[0] > width / 2
+            width = hi_new[0] - lo_new[0]
+            lo, hi = lo_new, hi_new
+
+    def save(self):
+        """save(self) -> None
+
+        save the index to `index_path`
+        """
+        if self._index_path is None:
+            return
+        fldr = os.path.dirname(self._index_path)
+        if fldr != "":
+            os.makedirs(fldr, exist_ok=True)
+        ids = np.array(sorted(self._index), dtype=float)
+        times = np.array([self._index[id_] for id_ in sorted(self._index)], dtype=float)
+        with open(self._index_path + ".tmp", "wb") as ff:
+            np.save(ff, np.vstack((ids, times)))
+        os.replace(self._index_path + ".tmp", self._index_path)
+
+    @property
+    def index(self):
+        """known pairs of (id, time) sorted by id"""
+        return sorted(self._index.items())
+
+    def _finish(self, id_):
+        self.save()
+        return int(id_)
+
+    def _first_step(self, hi, t):
+        """_first_step(self, hi, t) -> int
+
+        estimate the distance in ids from `hi` back to `t`
+        by the execution rate around `hi`, with the margin of twice
+        """
+        newer = [(id_, time_) for id_, time_ in self.index if id_ > hi[0] and time_ > hi[1]]
+        if len(newer) == 0:
+            return self._count
+        rate = (newer[0][0] - hi[0]) / (newer[0][1] - hi[1])
+        return max(self._count, int(2 * rate * (hi[1] - t)))
+
+    def _seconds(self, t):
+        if isinstance(t, datetime):
+            if t.tzinfo is None:
+                return (t - datetime(1970, 1, 1)).total_seconds()
+            return t.timestamp()
+        return float(t)
+
+    def _bracket(self, t):
+        """_bracket(self, t) -> (id, time) or None, (id, time) or None
+
+        return the nearest known executions before `t` and at or after `t`
+        """
+        lo, hi = None, None
+        for id_, time_ in self.index:
+            if time_ < t:
+                lo = (id_, time_)
+            else:
+                hi = (id_, time_)
+                break
+        return lo, hi
+
+    def _update(self, lo, hi, result):
+        _, lo_new, hi_new = result
+        if lo_new is not None and (lo is None or lo_new[0] > lo[0]):
+            lo = lo_new
+        if hi_new is not None and (hi is None or hi_new[0] < hi[0]):
+            hi = hi_new
+        return lo, hi
+
+    def _probe(self, id_, t, after=None):
+        """_probe(self, id_, t, after=None) -> (int or None, (id, time) or None, (id, time) or None)
+
+        fetch the executions up to `id_` (the latest ones if None) and
+        return the answer if it is in the page, otherwise the newest execution before `t`
+        and the oldest execution at or after `t` in the page
+        """
+        params = {"product_code":self._product_code, "count":self._count}
+        if id_ is not None:
+            params["before"] = id_ + 1
+        if after is not None:
+            params["after"] = after
+        results = self._api.executions(**params)
+        self.requests += 1
+        if not isinstance(results, list):
+            raise ValueError("unexpected response: {}".format(results))
+        executions = parse_executions(results)
+        if len(executions) == 0:
+            if id_ is None:
+                raise ValueError("no executions of {}.".format(self._product_code))
+            if after is not None:
+                return None, None, None
+            # no execution up to id_, which is regarded as an execution before any time
+            return None, (id_, -np.inf), None
+        ids, times = executions["id"], executions["time"]
+        for ii in [0, -1]:
+            self._index[int(ids[ii])] = float(times[ii])
+        k = int(np.searchsorted(times, t, "left")) # the first execution at or after t
+        if 0 < k < len(ids):
+            return int(ids[k - 1]) + 1, None, None
+        if k == 0:
+            return None, None, (int(ids[0]), float(times[0]))
+        return None, (int(ids[-1]), float(times[-1])), None
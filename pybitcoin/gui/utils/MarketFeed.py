@@ -0,0 +1,226 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+MarketFeed.py
+This file offers the following items:
+
+* MarketFeed
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+import time
+import warnings
+import pandas as pd
+
+class MarketFeed(object):
+    """MarketFeed(object)
+
+    This class offers a feed of market data running an asyncio loop on a background thread.
+    On every tick, the requests of ticker, getcollateral, getboardstate
+    (and updateOHLCVData of an adapter if given) are issued concurrently,
+    so the latency of a tick is about the one of the slowest request.
+    The interval is at least the one spending `share` of the request budget of
+    an APIClient, so that the feed leaves the rest of the budget to orders.
+    The results are merged into a snapshot, which is put into a thread-safe queue.
+    Only the latest `maxsize` snapshots are kept if the consumer is slower than the feed,
+    and the bars of a dropped snapshot are carried over to the next one,
+    so the consumer receives every new bar once and appends it to the adapter.
+
+    Examples
+    --------
+    >>> feed = MarketFeed(api, adapter, interval=0.5)
+    >>> feed.start()
+    >>> snapshot = feed.get(timeout=1.0) # on the GUI thread
+    >>> snapshot["market_data"]["ltp"], snapshot["latency"]
+    >>> feed.stop()
+    """
+    MAX_REQUESTS = 4 # the number of requests on a tick with an adapter
+
+    def __init__(self, api, adapter=None, product_code="FX_BTC_JPY", interval=0.5, maxsize=1, share=0.5):
+        """__init__(self, api, adapter=None, product_code="FX_BTC_JPY", interval=0.5, maxsize=1, share=0.5) -> None
+
+        initialize this class
+
+        Parameters
+        ----------
+        api          : API class in pybitflyer or APIClient
+            an API instance, which is called from several threads
+        adapter      : DataAdapter (default : None)
+            adapter which makes the new bars on every tick (see DataAdapter.updateOHLCVData)
+        product_code : str (default : "FX_BTC_JPY")
+            product code
+        interval     : float (default : 0.5)
+            interval of ticks in seconds. if None, the shortest one within `share` of the budget.
+            A shorter interval than that is clamped with a warning.
+        maxsize      : int (default : 1)
+            the number of snapshots kept in the queue
+        share        : float (default : 0.5)
+            share of the request budget of `api` (see APIClient.rate) used by the feed
+        """
+        self._api = api
+        self.adapter = adapter
+        self._product_code = product_code
+        self._interval = interval
+        self._share = share
+        if interval is not None and interval < self.min_interval:
+            warnings.warn("interval of {} sec exceeds {:.0%} of the request budget. {:.2f} sec is used.".format(
+                interval, share, self.min_interval
+            ))
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._loop = None
+        self._stop_event = None
+        self.ticks = 0 # the number of snapshots made
+        self.dropped = 0 # the number of snapshots dropped before being taken
+
+    def requests(self):
+        """requests(self) -> dict
+
+        return the functions called on every tick with the keys of a snapshot
+        """
+        requests_ = {
+            "market_data":lambda: self._api.ticker(product_code=self._product_code),
+            "collateral":lambda: self._api.getcollateral(),
+            "health":lambda: self._api.getboardstate(),
+        }
+        if self.adapter is not None:
+            requests_["dataset"] = self.adapter.updateOHLCVData
+        return requests_
+
+    async def fetch(self, executor=None):
+        """fetch(self, executor=None) -> dict
+
+        issue the requests concurrently and merge the results into a snapshot
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor (default : None)
+            executor to run the blocking requests. if None, the default one of the loop.
+
+        Returns
+        -------
+        snapshot : dict
+            snapshot has the results of the requests (None for failed ones) and
+                time    : float, unix time at the beginning of the tick
+                latency : float, seconds taken by the tick
+                errors  : dict, exceptions of the failed requests
+        """
+        loop = asyncio.get_running_loop()
+        requests_ = self.requests()
+        st, t_start = time.monotonic(), time.time()
+        results = await asyncio.gather(
+            *[loop.run_in_executor(executor, func) for func in requests_.values()],
+            return_exceptions=True
+        )
+        snapshot = {"time":t_start, "latency":time.monotonic() - st, "errors":{}}
+        for key, result in zip(requests_, results):
+            if isinstance(result, Exception):
+                snapshot["errors"][key] = result
+                result = None
+            snapshot[key] = result
+        self.ticks += 1
+        return snapshot
+
+    def fetch_once(self):
+        """fetch_once(self) -> dict
+
+        make a snapshot on the current thread (see fetch)
+        """
+        with ThreadPoolExecutor(max_workers=self.MAX_REQUESTS) as executor:
+            return asyncio.run(self.fetch(executor))
+
+    async def run(self):
+        """run(self) -> None
+
+        make snapshots every `interval` until `stop` is called.
+        A slow tick delays the next one instead of overlapping it.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        with ThreadPoolExecutor(max_workers=self.MAX_REQUESTS) as executor:
+            next_time = self._loop.time()
+            while not self._stop_event.is_set():
+                self.put(await self.fetch(executor))
+                next_time = max(next_time + self.interval, self._loop.time())
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), next_time - self._loop.time())
+                except asyncio.TimeoutError:
+                    pass
+
+    @property
+    def min_interval(self):
+        """the shortest interval spending `share` of the request budget of `api`"""
+        rate = getattr(self._api, "rate", None)
+        if rate is None:
+            return 0.
+        # the adapter may be set later, so the requests with an adapter are counted
+        return self.MAX_REQUESTS / (rate * self._share)
+
+    @property
+    def interval(self):
+        """interval of ticks in seconds"""
+        if self._interval is None:
+            return self.min_interval
+        return max(self._interval, self.min_interval)
+
+    def start(self):
+        """start(self) -> None
+
+        start the feed on a background thread
+        """
+        if self.is_running():
+            return
+        self._loop, self._stop_event = None, None
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """stop(self, timeout=None) -> None
+
+        stop the feed after the current tick and wait for the thread
+        """
+        if not self.is_running():
+            return
+        while self._stop_event is None:
+            time.sleep(0.001) # the loop is starting
+        self._loop.call_soon_threadsafe(self._stop_event.set)
+        self._thread.join(timeout)
+
+    def is_running(self):
+        """is_running(self) -> bool"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def put(self, snapshot):
+        """put(self, snapshot) -> None
+
+        put a snapshot into the queue, dropping the oldest one if the queue is full.
+        The bars of the dropped snapshot are put before the ones of `snapshot`.
+        """
+        while True:
+            try:
+                self._queue.put_nowait(snapshot)
+                return
+            except queue.Full:
+                try:
+                    dropped = self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    continue
+                if dropped.get("dataset") is not None:
+                    bars = [dropped["dataset"], snapshot.get("dataset")]
+                    snapshot = dict(snapshot, dataset=pd.concat(bars, ignore_index=True))
+
+    def get(self, timeout=None):
+        """get(self, timeout=None) -> dict or None
+
+        take the oldest snapshot in the queue, waiting for `timeout` seconds at most.
+        None is returned if no snapshot comes.
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
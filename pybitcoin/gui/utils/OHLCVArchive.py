@@ -0,0 +1,179 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+OHLCVArchive.py
+This file offers the following items:
+
+* OHLCVArchive
+* RECORD_DTYPE
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# a record of a bar (64 bytes)
+RECORD_DTYPE = np.dtype([
+    ("time", "<i8"), ("id_start", "<i8"), ("id_end", "<i8"),
+    ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<f8"),
+])
+
+class OHLCVArchive(object):
+    """OHLCVArchive(object)
+
+    This class offers an append-only binary archive of OHLCV bars.
+    The file is a plain sequence of fixed-width records (see RECORD_DTYPE)
+    sorted by time, which is mapped with numpy.memmap.
+    A time range or an execution id is located by binary search,
+    so only the pages of the requested bars are read from the disk.
+
+    Examples
+    --------
+    >>> archive = OHLCVArchive("../data/ohlcv/OHLCV.bin")
+    >>> archive.import_csv(sorted(glob.glob("../data/ohlcv/OHLCV_*_to_*.csv")))
+    >>> df = archive.read(datetime(2019, 1, 1), datetime(2019, 1, 8))
+    >>> adapter = DataAdapter.from_archive(archive, datetime(2019, 1, 1), datetime(2019, 1, 8))
+    """
+    columns = RECORD_DTYPE.names
+
+    def __init__(self, fpath):
+        """__init__(self, fpath) -> None
+
+        initialize this class
+
+        Parameters
+        ----------
+        fpath : str
+            path of the archive. It is made when bars are appended first.
+        """
+        self._fpath = fpath
+        self._records = np.empty(0, dtype=RECORD_DTYPE)
+        self.reload()
+
+    def reload(self):
+        """reload(self) -> None
+
+        map the current records of the file
+        """
+        size = os.path.getsize(self._fpath) if os.path.exists(self._fpath) else 0
+        if size % RECORD_DTYPE.itemsize != 0:
+            raise ValueError("{} is not an archive of OHLCV or is broken.".format(self._fpath))
+        N = size // RECORD_DTYPE.itemsize
+        if N == 0:
+            self._records = np.empty(0, dtype=RECORD_DTYPE)
+        else:
+            self._records = np.memmap(self._fpath, dtype=RECORD_DTYPE, mode="r", shape=(N,))
+
+    def append(self, df):
+        """append(self, df) -> int
+
+        append bars to the end of the archive.
+        Bars not later than the last bar in the archive are skipped,
+        so the same dataset can be appended again safely.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            bars with the columns of RECORD_DTYPE sorted by time
+
+        Returns
+        -------
+        the number of appended bars
+        """
+        records = np.empty(len(df), dtype=RECORD_DTYPE)
+        for key in self.columns:
+            records[key] = df[key].values
+        if np.any(np.diff(records["time"]) <= 0):
+            raise ValueError("time of bars must be strictly increasing.")
+        if len(self._records) != 0:
+            records = records[records["time"] > self._records["time"][-1]]
+        if len(records) == 0:
+            return 0
+        with open(self._fpath, "ab") as ff:
+            records.tofile(ff)
+        self.reload()
+        return len(records)
+
+    def import_csv(self, fpath_list):
+        """import_csv(self, fpath_list) -> int
+
+        append CSV files of OHLCV made by get_ohlcv_from_executions.py in order
+        """
+        if isinstance(fpath_list, str):
+            fpath_list = [fpath_list]
+        return sum(self.append(pd.read_csv(fpath, index_col=0)) for fpath in fpath_list)
+
+    def search_time(self, t, side="left"):
+        """search_time(self, t, side="left") -> int
+
+        return the index of the first bar at or after `t` (side="left")
+        or after `t` (side="right") by binary search
+
+        Parameters
+        ----------
+        t    : datetime or float
+            time (unix time if float)
+        side : str (default : "left")
+            "left" or "right"
+        """
+        if hasattr(t, "timestamp"):
+            t = t.timestamp()
+        return int(np.searchsorted(self._records["time"], t, side))
+
+    def search_id(self, id_):
+        """search_id(self, id_) -> int
+
+        return the index of the bar including the execution `id_` by binary search.
+        If no bar includes it, the index of the first bar after it is returned.
+        """
+        return int(np.searchsorted(self._records["id_end"], id_, "left"))
+
+    def slice(self, start=None, end=None):
+        """slice(self, start=None, end=None) -> numpy.ndarray
+
+        return a copy of the records in the time range of [start, end)
+        """
+        ii = 0 if start is None else self.search_time(start)
+        jj = len(self._records) if end is None else self.search_time(end)
+        return np.array(self._records[ii:max(ii, jj)])
+
+    def read(self, start=None, end=None):
+        """read(self, start=None, end=None) -> pandas.DataFrame
+
+        read the bars in the time range of [start, end)
+
+        Parameters
+        ----------
+        start : datetime or float (default : None)
+            the first time (unix time if float). if None, from the first bar.
+        end   : datetime or float (default : None)
+            the end of time, which is excluded. if None, to the last bar.
+
+        Returns
+        -------
+        df : pandas.DataFrame
+            bars with the same columns as the CSV files of OHLCV
+        """
+        return pd.DataFrame(self.slice(start, end))
+
+    def read_ids(self, id_start, id_end):
+        """read_ids(self, id_start, id_end) -> pandas.DataFrame
+
+        read the bars including the executions from `id_start` to `id_end`
+        """
+        ii = self.search_id(id_start)
+        jj = int(np.searchsorted(self._records["id_start"], id_end, "right"))
+        return pd.DataFrame(np.array(self._records[ii:max(ii, jj)]))
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def fpath(self):
+        return self._fpath
+
+    @property
+    def records(self):
+        """memory-mapped records (read only)"""
+        return self._records
@@ -0,0 +1,174 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+OHLCVStore.py
+This file offers the following items:
+
+* OHLCVStore
+* OHLCVHandle
+"""
+
+from collections import namedtuple
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+class OHLCVHandle(namedtuple("OHLCVHandle", ["name", "length"])):
+    """OHLCVHandle(name, length)
+
+    a small picklable handle of an OHLCVStore.
+    Pass this handle to another process and call `attach` there.
+    """
+    __slots__ = ()
+
+    def attach(self):
+        """attach(self) -> OHLCVStore
+
+        attach the shared memory of the store without copying
+        """
+        return OHLCVStore(self.length, name=self.name)
+
+class OHLCVStore(object):
+    """OHLCVStore(object)
+
+    This class offers a columnar store of OHLCV data backed by shared memory.
+    The columns (timestamp, open, high, low, close, volume) are contiguous arrays
+    of float64 in one block of shared memory, so worker processes can read them
+    with no copy through `OHLCVHandle`.
+    """
+    columns = ("timestamp", "open", "high", "low", "close", "volume")
+
+    def __init__(self, length, name=None):
+        """__init__(self, length, name=None) -> None
+
+        initialize this class
+
+        Parameters
+        ----------
+        length : int
+            the number of bars
+        name   : str (default : None)
+            name of an existing block of shared memory.
+            if None, a new block is created and owned by this instance.
+        """
+        self._length = int(length)
+        size = max(len(self.columns) * self._length * 8, 1)
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self._array = np.ndarray(
+            (len(self.columns), self._length), dtype=np.float64, buffer=self._shm.buf
+        )
+
+    @classmethod
+    def from_arrays(cls, timestamp, open_, high, low, close, volume):
+        """from_arrays(cls, timestamp, open_, high, low, close, volume) -> OHLCVStore
+
+        make a store by copying the given arrays
+        """
+        obj = cls(len(close))
+        for ii, arr in enumerate([timestamp, open_, high, low, close, volume]):
+            obj._array[ii] = arr
+        return obj
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """from_dataframe(cls, df) -> OHLCVStore
+
+        make a store from an OHLCV dataset.
+        The "time" column is used as the timestamp if it exists,
+        otherwise the timestamp is 1, 2, ..., N.
+        """
+        if "time" in df:
+            timestamp = df["time"].values
+        else:
+            timestamp = np.arange(1, len(df) + 1)
+        return cls.from_arrays(
+            timestamp, df["open"].values, df["high"].values,
+            df["low"].values, df["close"].values, df["volume"].values
+        )
+
+    @classmethod
+    def from_csv(cls, fpath_list):
+        """from_csv(cls, fpath_list) -> OHLCVStore
+
+        make a store from CSV files of OHLCV made by get_ohlcv_from_executions.py
+        """
+        if isinstance(fpath_list, str):
+            fpath_list = [fpath_list]
+        df = pd.concat([pd.read_csv(fpath, index_col=0) for fpath in fpath_list])
+        return cls.from_dataframe(df)
+
+    def to_dataframe(self):
+        """to_dataframe(self) -> pandas.DataFrame
+
+        copy the data to a DataFrame whose "time" column is the timestamp
+        """
+        df = pd.DataFrame(self._array.T.copy(), columns=self.columns)
+        return df.rename(columns={"timestamp":"time"})
+
+    def close(self):
+        """close(self) -> None
+
+        release the shared memory. The block is removed if this instance owns it.
+        Views taken from this instance must be deleted beforehand.
+        """
+        if self._shm is None:
+            return
+        self._array = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, column):
+        return self._array[self.columns.index(column)]
+
+    def __getstate__(self):
+        # a pickled store carries its data and is restored to a new block
+        return {"array":self._array.copy()}
+
+    def __setstate__(self, state):
+        self.__init__(state["array"].shape[1])
+        self._array[...] = state["array"]
+
+    @property
+    def handle(self):
+        return OHLCVHandle(self._shm.name, self._length)
+
+    @property
+    def array(self):
+        """array with the shape of (6, N)"""
+        return self._array
+
+    @property
+    def timestamp(self):
+        return self._array[0]
+
+    @property
+    def ohlc(self):
+        """view with the shape of (N, 4)"""
+        return self._array[1:5].T
+
+    @property
+    def volume(self):
+        return self._array[5]
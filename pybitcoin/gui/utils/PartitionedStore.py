@@ -0,0 +1,201 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+PartitionedStore.py
+This file offers the following items:
+
+* PartitionedStore
+"""
+
+from datetime import datetime, timedelta
+import glob
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_DAY = 86400
+EPOCH = datetime(1970, 1, 1)
+
+class PartitionedStore(object):
+    """PartitionedStore(object)
+
+    This class offers a columnar on-disk storage of OHLCV data and indicators.
+    The rows are partitioned by their date (UTC) and each column of a partition
+    is saved as a typed binary file of numpy, as follows:
+
+        root/
+            20190101/
+                _columns.json
+                time.npy     (int64, unix time in seconds)
+                id_start.npy (int64)
+                open.npy     (float64)
+                ...
+
+    `read` opens only the partitions overlapping the requested range
+    and only the requested columns, whose rows are sliced by binary search on time.
+
+    Examples
+    --------
+    >>> store = PartitionedStore("./data/ohlcv")
+    >>> store.write(pd.read_csv("OHLCV_201901010900_to_201901020859.csv", index_col=0))
+    >>> df = store.read(["time", "close"], start=datetime(2019, 1, 1), end=datetime(2019, 1, 2))
+    """
+    int_columns = ("time", "id_start", "id_end", "oc_up_down", "dec")
+
+    def __init__(self, root):
+        """__init__(self, root) -> None
+
+        initialize this class
+
+        Parameters
+        ----------
+        root : str
+            path of the folder of the storage. It is made if it does not exist.
+        """
+        self._root = root
+        os.makedirs(self._root, exist_ok=True)
+
+    @property
+    def root(self):
+        return self._root
+
+    @property
+    def partitions(self):
+        """the dates of the partitions in the form of %Y%m%d"""
+        return sorted(
+            os.path.basename(os.path.dirname(fpath))
+            for fpath in glob.glob(os.path.join(self._root, "*", "_columns.json"))
+        )
+
+    @property
+    def columns(self):
+        partitions = self.partitions
+        if len(partitions) == 0:
+            return []
+        return self._load_columns(partitions[0])
+
+    def write(self, df):
+        """write(self, df) -> None
+
+        write a dataset with the "time" column to the partitions.
+        Rows are merged into the existing partitions,
+        where the rows of `df` replace the existing ones with the same time.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            dataset with the "time" column in unix time
+        """
+        if "time" not in df:
+            raise KeyError("df must have the 'time' column.")
+        df = self._typed(df).sort_values("time", kind="stable")
+        days = df["time"].values // SECONDS_PER_DAY
+        _, heads = np.unique(days, return_index=True)
+        for head, tail in zip(heads, np.append(heads[1:], len(df))):
+            part = df.iloc[head:tail]
+            date = self._date(days[head])
+            if os.path.exists(os.path.join(self._root, date, "_columns.json")):
+                old = pd.DataFrame(self._read_partition(date, None, -np.inf, np.inf))
+                if sorted(old.columns) != sorted(part.columns):
+                    raise ValueError("columns of df are different from the ones of {}.".format(date))
+                part = pd.concat([old, part[old.columns]], ignore_index=True)
+                part = part.drop_duplicates("time", keep="last").sort_values("time", kind="stable")
+            self._write_partition(date, part)
+
+    def read(self, columns=None, start=None, end=None):
+        """read(self, columns=None, start=None, end=None) -> pandas.DataFrame
+
+        read a dataset in the range of [start, end)
+
+        Parameters
+        ----------
+        columns : list of str (default : None)
+            columns to read. if None, all the columns are read.
+        start   : datetime or float (default : None)
+            the first time (unix time if float). if None, from the first row.
+        end     : datetime or float (default : None)
+            the end of time, which is excluded. if None, to the last row.
+
+        Returns
+        -------
+        df : pandas.DataFrame
+        """
+        start = -np.inf if start is None else self._seconds(start)
+        end = np.inf if end is None else self._seconds(end)
+        parts = []
+        for date in self.partitions:
+            day = (datetime.strptime(date, "%Y%m%d") - EPOCH).days
+            if day * SECONDS_PER_DAY >= end or (day + 1) * SECONDS_PER_DAY <= start:
+                continue
+            parts.append(self._read_partition(date, columns, start, end))
+        if len(parts) == 0:
+            return pd.DataFrame(columns=columns if columns is not None else self.columns)
+        return pd.DataFrame({key:np.concatenate([part[key] for part in parts]) for key in parts[0]})
+
+    def import_csv(self, fpath_list):
+        """import_csv(self, fpath_list) -> None
+
+        import CSV files of OHLCV made by get_ohlcv_from_executions.py
+        """
+        if isinstance(fpath_list, str):
+            fpath_list = [fpath_list]
+        for fpath in fpath_list:
+            self.write(pd.read_csv(fpath, index_col=0))
+
+    def _typed(self, df):
+        """_typed(self, df) -> pandas.DataFrame
+
+        convert the columns into int64 or float64
+        """
+        return pd.DataFrame({
+            key:df[key].values.astype(np.int64 if key in self.int_columns else np.float64)
+            for key in df.columns
+        })
+
+    def _date(self, day):
+        return (EPOCH + timedelta(days=int(day))).strftime("%Y%m%d")
+
+    def _seconds(self, t):
+        return t.timestamp() if isinstance(t, datetime) else float(t)
+
+    def _load_columns(self, date):
+        with open(os.path.join(self._root, date, "_columns.json"), "r") as ff:
+            return json.load(ff)
+
+    def _read_partition(self, date, columns, start, end):
+        """_read_partition(self, date, columns, start, end) -> dict
+
+        read the rows in [start, end) of a partition.
+        The columns are memory-mapped only if a part of the rows is requested.
+        """
+        fldr = os.path.join(self._root, date)
+        if columns is None:
+            columns = self._load_columns(date)
+        time = np.load(os.path.join(fldr, "time.npy"))
+        ii = np.searchsorted(time, start, "left")
+        jj = np.searchsorted(time, end, "left")
+        if ii == 0 and jj == len(time):
+            return {key:np.load(os.path.join(fldr, key + ".npy")) for key in columns}
+        return {
+            key:np.array(np.load(os.path.join(fldr, key + ".npy"), mmap_mode="r")[ii:jj])
+            for key in columns
+        }
+
+    def _write_partition(self, date, df):
+        """_write_partition(self, date, df) -> None
+
+        write a partition to a temporary folder and replace the old one with it
+        """
+        fldr = os.path.join(self._root, date)
+        fldr_tmp = fldr + ".tmp"
+        shutil.rmtree(fldr_tmp, ignore_errors=True)
+        os.makedirs(fldr_tmp)
+        for key in df.columns:
+            np.save(os.path.join(fldr_tmp, key + ".npy"), df[key].values)
+        with open(os.path.join(fldr_tmp, "_columns.json"), "w") as ff:
+            json.dump(list(df.columns), ff)
+        shutil.rmtree(fldr, ignore_errors=True)
+        os.rename(fldr_tmp, fldr)
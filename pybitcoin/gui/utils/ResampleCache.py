@@ -0,0 +1,149 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+ResampleCache.py
+This file offers the following items:
+
+* ResampleCache
+"""
+
+import glob
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    from .bars import parse_bar_size, resample_ohlcv
+except ImportError:
+    import sys
+    sys.path.append("../utils/")
+    from bars import parse_bar_size, resample_ohlcv
+
+class ResampleCache(object):
+    """ResampleCache(object)
+
+    This class offers an on-disk cache of bars resampled from 1-minute bars.
+    Each timeframe is saved to `fldr` as "ohlcv_{bar seconds}_{first time}_{last time}.npy",
+    where the times are those of the first and the last source bars.
+    When the source has grown since the cache was saved,
+    only the bars after the last cached one are resampled and the cache is replaced.
+
+    Examples
+    --------
+    >>> cache = ResampleCache("../data/resampled")
+    >>> ohlcv_5m = cache.get(ohlcv_1m, "5m")
+    >>> ohlcv_1h, ohlcv_1d = cache.get_many(ohlcv_1m, ["1h", "1d"])
+    """
+    int_columns = ("id_start", "id_end")
+
+    def __init__(self, fldr):
+        """__init__(self, fldr) -> None
+
+        initialize this class
+
+        Parameters
+        ----------
+        fldr : str
+            folder to save the resampled bars to. It is made if it does not exist.
+        """
+        self._fldr = fldr
+        os.makedirs(self._fldr, exist_ok=True)
+        self.hits = 0 # the number of bars reused from the cache
+
+    def get(self, ohlcv, bar):
+        """get(self, ohlcv, bar) -> pandas.DataFrame
+
+        return bars resampled from `ohlcv` (see bars.resample_ohlcv)
+
+        Parameters
+        ----------
+        ohlcv : pandas.DataFrame
+            source bars sorted by time
+        bar   : int or str
+            length of a resampled bar, e.g. "5m", "15m", "1h" and "1d"
+
+        Returns
+        -------
+        resampled : pandas.DataFrame
+        """
+        bar_seconds = parse_bar_size(bar)
+        if len(ohlcv) == 0:
+            return resample_ohlcv(ohlcv, bar_seconds)
+        time_ = ohlcv["time"].values
+        fpath, first, last = self._find(bar_seconds, time_)
+        if fpath is not None and last == time_[-1]:
+            self.hits += 1
+            return self._load(fpath)
+        if fpath is None:
+            resampled = resample_ohlcv(ohlcv, bar_seconds)
+        else:
+            # the last cached bar may lack the source bars arrived later
+            cached = self._load(fpath)
+            t_from = cached["time"].values[-1]
+            tail = resample_ohlcv(ohlcv.iloc[np.searchsorted(time_, t_from, "left"):], bar_seconds)
+            resampled = pd.concat([cached.iloc[:-1], tail], ignore_index=True)
+            self.hits += 1
+        self._save(bar_seconds, time_[0], time_[-1], resampled)
+        if fpath is not None:
+            os.remove(fpath)
+        return resampled
+
+    def get_many(self, ohlcv, bars):
+        """get_many(self, ohlcv, bars) -> list
+
+        return a list of bars resampled from `ohlcv` for each of `bars`
+        """
+        return [self.get(ohlcv, bar) for bar in bars]
+
+    def clear(self):
+        """clear(self) -> None
+
+        remove all the cached bars
+        """
+        for fpath in glob.glob(os.path.join(self._fldr, "ohlcv_*_*_*.npy")):
+            os.remove(fpath)
+
+    def _key(self, t):
+        return "{:.0f}".format(t)
+
+    def _find(self, bar_seconds, time_):
+        """_find(self, bar_seconds, time_) -> (str or None, float, float)
+
+        find the cache whose source is `time_` or its head
+        """
+        found, first_, last_ = None, None, None
+        pattern = os.path.join(self._fldr, "ohlcv_{}_*_*.npy".format(bar_seconds))
+        for fpath in glob.glob(pattern):
+            first, last = [float(s) for s in os.path.splitext(os.path.basename(fpath))[0].split("_")[2:]]
+            if self._key(first) != self._key(time_[0]) or last > time_[-1]:
+                continue
+            k = np.searchsorted(time_, last, "left")
+            if k == len(time_) or self._key(time_[k]) != self._key(last):
+                continue
+            if last_ is None or last > last_:
+                found, first_, last_ = fpath, first, last
+        if found is not None:
+            first_, last_ = time_[0], time_[np.searchsorted(time_, last_, "left")]
+        return found, first_, last_
+
+    def _load(self, fpath):
+        return pd.DataFrame(np.load(fpath))
+
+    def _save(self, bar_seconds, first, last, resampled):
+        """_save(self, bar_seconds, first, last, resampled) -> None
+
+        save resampled bars as a structured array via a temporary file
+        """
+        dtype = [
+            (col, np.int64 if col in self.int_columns else np.float64) for col in resampled.columns
+        ]
+        array = np.empty(len(resampled), dtype=dtype)
+        for col in resampled.columns:
+            array[col] = resampled[col].values
+        fpath = os.path.join(self._fldr, "ohlcv_{}_{}_{}.npy".format(
+            bar_seconds, self._key(first), self._key(last)
+        ))
+        with open(fpath + ".tmp", "wb") as ff:
+            np.save(ff, array)
+        os.replace(fpath + ".tmp", fpath)
@@ -0,0 +1,83 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+SessionAPI.py
+This file offers the following items:
+
+* SessionAPI
+"""
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+import urllib
+import pybitflyer
+import requests
+
+class SessionAPI(pybitflyer.API):
+    """SessionAPI(pybitflyer.API)
+
+    This class is the same as pybitflyer.API except that
+    HTTP connections are kept alive by a requests.Session per thread,
+    while pybitflyer.API opens a new session (and connection) for every request.
+    """
+    def __init__(self, api_key=None, api_secret=None, timeout=None):
+        super().__init__(api_key=api_key, api_secret=api_secret, timeout=timeout)
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        """requests.Session of the current thread"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def request(self, endpoint, method="GET", params=None):
+        url = self.api_url + endpoint
+        body = ""
+        headers = None
+
+        if method == "POST":
+            body = json.dumps(params)
+        else:
+            if params:
+                body = "?" + urllib.parse.urlencode(params)
+
+        if self.api_key and self.api_secret:
+            access_timestamp = str(time.time())
+            text = str.encode(access_timestamp + method + endpoint + body)
+            access_sign = hmac.new(str.encode(self.api_secret), text, hashlib.sha256).hexdigest()
+            headers = {
+                "ACCESS-KEY":self.api_key,
+                "ACCESS-TIMESTAMP":access_timestamp,
+                "ACCESS-SIGN":access_sign,
+                "Content-Type":"application/json"
+            }
+
+        try:
+            if method == "GET":
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            else: # method == "POST"
+                response = self.session.post(url, data=json.dumps(params), headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(e)
+            raise e
+
+        content = ""
+        if len(response.content) > 0:
+            content = json.loads(response.content.decode("utf-8"))
+        return content
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
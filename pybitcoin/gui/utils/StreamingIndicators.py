@@ -0,0 +1,322 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+StreamingIndicators.py
+This file offers the following items:
+
+* StreamingIndicator
+* RollingSum
+* RollingExtremum
+* SMA
+* EMA
+* RMSError
+* WPercentR
+* UltimateOscillator
+* AwesomeOscillator
+* IndicatorRegistry
+* register_indicator
+"""
+
+from collections import deque
+import numpy as np
+
+INDICATORS = {}
+
+def register_indicator(cls):
+    """register_indicator(cls) -> cls
+
+    register a subclass of StreamingIndicator by its class name,
+    which enables IndicatorRegistry to subscribe it by name.
+    """
+    INDICATORS[cls.__name__] = cls
+    return cls
+
+class RollingSum(object):
+    """RollingSum(object)
+
+    This class offers the sum of the latest N values updated in O(1).
+    The sum is recalculated from the window every N updates
+    in order not to accumulate rounding errors.
+    """
+    def __init__(self, N):
+        self.N = N
+        self._window = deque()
+        self._sum = 0.
+        self._count = 0
+
+    def update(self, x):
+        """update(self, x) -> float
+
+        add a new value and return the sum of the latest N values
+        """
+        self._window.append(x)
+        self._sum += x
+        if len(self._window) > self.N:
+            self._sum -= self._window.popleft()
+        self._count += 1
+        if self._count % self.N == 0:
+            self._sum = float(sum(self._window))
+        return self._sum
+
+    def __len__(self):
+        return len(self._window)
+
+    @property
+    def value(self):
+        return self._sum
+
+class RollingExtremum(object):
+    """RollingExtremum(object)
+
+    This class offers the maximum (or minimum) of the latest N values
+    with a monotonic deque, whose update costs amortized O(1).
+    """
+    def __init__(self, N, find_max=True):
+        self.N = N
+        self.find_max = find_max
+        self._deque = deque() # (index, value) with monotonic values
+        self._count = 0
+
+    def update(self, x):
+        """update(self, x) -> float
+
+        add a new value and return the extremum of the latest N values
+        """
+        if self.find_max:
+            while self._deque and self._deque[-1][1] <= x:
+                self._deque.pop()
+        else:
+            while self._deque and self._deque[-1][1] >= x:
+                self._deque.pop()
+        self._deque.append((self._count, x))
+        if self._deque[0][0] <= self._count - self.N:
+            self._deque.popleft()
+        self._count += 1
+        return self._deque[0][1]
+
+    @property
+    def value(self):
+        return self._deque[0][1] if self._deque else None
+
+class StreamingIndicator(object):
+    """StreamingIndicator(object)
+
+    This is the base class of indicators updated bar by bar.
+    `update` receives a bar of (timestamp, open, high, low, close)
+    and returns the new value of the indicator in O(1).
+    The values are the same as the ones of the corresponding function in TemporalAnalyzer.
+    """
+    def __init__(self):
+        self._value = None
+
+    def update(self, bar):
+        """update(self, bar) -> float
+
+        update the indicator with a new bar of (timestamp, open, high, low, close)
+        """
+        raise NotImplementedError
+
+    @property
+    def value(self):
+        return self._value
+
+@register_indicator
+class SMA(StreamingIndicator):
+    """SMA(StreamingIndicator)
+
+    simple moving average of a column (close by default)
+    """
+    def __init__(self, N, column=-1):
+        super().__init__()
+        self.column = column
+        self._sum = RollingSum(N)
+
+    def update(self, bar):
+        total = self._sum.update(bar[self.column])
+        self._value = total / len(self._sum)
+        return self._value
+
+@register_indicator
+class EMA(StreamingIndicator):
+    """EMA(StreamingIndicator)
+
+    exponential moving average of a column (close by default)
+    """
+    def __init__(self, alpha, column=-1):
+        super().__init__()
+        self.alpha = alpha
+        self.column = column
+
+    def update(self, bar):
+        if self._value is None:
+            self._value = 1 * bar[self.column]
+        else:
+            self._value = (1. - self.alpha) * self._value + self.alpha * bar[self.column]
+        return self._value
+
+@register_indicator
+class RMSError(StreamingIndicator):
+    """RMSError(StreamingIndicator)
+
+    rms of the error between close and a base indicator in the latest n bars.
+    The variance is updated with Welford's algorithm extended to a sliding window.
+    """
+    def __init__(self, n=1, base=None):
+        super().__init__()
+        self.n = n
+        self.base = base if base is not None else EMA(2. / (n + 1.))
+        self._window = deque()
+        self._mean = 0.
+        self._M2 = 0.
+
+    def update(self, bar):
+        x = bar[-1] - self.base.update(bar)
+        self._window.append(x)
+        delta = x - self._mean
+        self._mean += delta / len(self._window)
+        self._M2 += delta * (x - self._mean)
+        if len(self._window) > self.n:
+            y = self._window.popleft()
+            delta = y - self._mean
+            self._mean -= delta / len(self._window)
+            self._M2 -= delta * (y - self._mean)
+        self._value = np.sqrt(max(self._M2, 0.) / len(self._window))
+        return self._value
+
+@register_indicator
+class WPercentR(StreamingIndicator):
+    """WPercentR(StreamingIndicator)
+
+    William's %R in the latest n bars
+    """
+    def __init__(self, n=1):
+        super().__init__()
+        self.n = n
+        self._highest = RollingExtremum(n, True)
+        self._lowest = RollingExtremum(n, False)
+        self._count = 0
+
+    def update(self, bar):
+        highest = self._highest.update(bar[2])
+        lowest = self._lowest.update(bar[3])
+        self._count += 1
+        if self._count < self.n:
+            self._value = -50.
+        else:
+            self._value = (bar[-1] - highest) / (highest - lowest) * 100.
+        return self._value
+
+@register_indicator
+class UltimateOscillator(StreamingIndicator):
+    """UltimateOscillator(StreamingIndicator)
+
+    ultimate oscillator (UO) with the periods of N1, N2 and N3
+    """
+    def __init__(self, N1=7, N2=14, N3=28):
+        super().__init__()
+        self.periods = (N1, N2, N3)
+        self._bp = [RollingSum(N) for N in self.periods]
+        self._tr = [RollingSum(N) for N in self.periods]
+        self._close = None
+
+    def update(self, bar):
+        if self._close is None:
+            bp = bar[-1] - bar[3]
+            tr = bar[2] - bar[3]
+        else:
+            bp = bar[-1] - min(bar[3], self._close)
+            tr = max([bar[2] - bar[3], bar[2] - self._close, self._close - bar[3]])
+        self._close = bar[-1]
+        total = 0.
+        for N, sum_bp, sum_tr in zip(self.periods, self._bp, self._tr):
+            sum_bp.update(bp)
+            sum_tr.update(tr)
+            avg = 0.5 if len(sum_bp) < N else sum_bp.value / sum_tr.value
+            total += N * avg
+        self._value = total / sum(self.periods) * 100.
+        return self._value
+
+@register_indicator
+class AwesomeOscillator(StreamingIndicator):
+    """AwesomeOscillator(StreamingIndicator)
+
+    awesome oscillator (AO) with the periods of N1 and N2
+    """
+    def __init__(self, N1=5, N2=34):
+        super().__init__()
+        self._sum1 = RollingSum(N1)
+        self._sum2 = RollingSum(N2)
+
+    def update(self, bar):
+        median = (bar[2] + bar[3]) / 2.
+        sma1 = self._sum1.update(median) / len(self._sum1)
+        sma2 = self._sum2.update(median) / len(self._sum2)
+        self._value = sma1 - sma2
+        return self._value
+
+class IndicatorRegistry(object):
+    """IndicatorRegistry(object)
+
+    This class offers a set of streaming indicators subscribed by name.
+    Only the subscribed indicators are updated by a new bar.
+
+    Examples
+    --------
+    >>> registry = IndicatorRegistry()
+    >>> registry.subscribe("wpr", "WPercentR", n=14)
+    >>> registry.subscribe("uo", "UltimateOscillator")
+    >>> for bar in tohlc:
+    ...     values = registry.update(bar)
+    >>> values["wpr"], values["uo"]
+    """
+    def __init__(self):
+        self._indicators = {}
+
+    def subscribe(self, key, name, **params):
+        """subscribe(self, key, name, **params) -> StreamingIndicator
+
+        subscribe an indicator
+
+        Parameters
+        ----------
+        key    : str
+            key of the value returned by `update`
+        name   : str
+            class name of the indicator (see INDICATORS)
+        params : options
+            parameters of the indicator
+
+        Returns
+        -------
+        the subscribed indicator
+        """
+        if name not in INDICATORS:
+            raise KeyError("unknown indicator: {}".format(name))
+        self._indicators[key] = INDICATORS[name](**params)
+        return self._indicators[key]
+
+    def unsubscribe(self, key):
+        """unsubscribe(self, key) -> None
+
+        unsubscribe an indicator
+        """
+        self._indicators.pop(key, None)
+
+    def update(self, bar):
+        """update(self, bar) -> dict
+
+        update the subscribed indicators with a new bar of (timestamp, open, high, low, close)
+        and return their values
+        """
+        return {key: indicator.update(bar) for key, indicator in self._indicators.items()}
+
+    @property
+    def values(self):
+        return {key: indicator.value for key, indicator in self._indicators.items()}
+
+    def __contains__(self, key):
+        return key in self._indicators
+
+    def __len__(self):
+        return len(self._indicators)
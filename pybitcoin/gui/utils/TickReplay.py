@@ -0,0 +1,226 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+TickReplay.py
+This file offers the following items:
+
+* load_tickers : function
+* TickReplay
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
+import glob
+import inspect
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+try:
+    from .bars import parse_timestamps
+    from .ExchangeSimulator import ExchangeSimulator
+except ImportError:
+    sys.path.append("../utils/")
+    from bars import parse_timestamps
+    from ExchangeSimulator import ExchangeSimulator
+
+def load_tickers(paths):
+    """load_tickers(paths) -> list
+
+    load tickers saved by scripts/getticker.py
+
+    Parameters
+    ----------
+    paths : str or list of str
+        a glob pattern or paths of the JSON files
+
+    Returns
+    -------
+    tickers : list of dict
+        tickers sorted by "timestamp". Failed requests without "timestamp" are removed.
+    """
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(paths))
+    tickers = []
+    for fpath in paths:
+        with open(fpath, "r") as ff:
+            tickers.extend(json.load(ff)["tickers"])
+    tickers = [ticker for ticker in tickers if isinstance(ticker, dict) and "timestamp" in ticker]
+    if len(tickers) == 0:
+        return tickers
+    order = np.argsort(parse_timestamps([ticker["timestamp"] for ticker in tickers]), kind="stable")
+    return [tickers[ii] for ii in order]
+
+class TickReplay(object):
+    """TickReplay(object)
+
+    This class replays recorded tickers through bots of OrderBoard (subclasses of BotBase)
+    without Qt threads.
+    For every ticker, the clock of an ExchangeSimulator replaying the tickers is advanced,
+    and `_process` of the bot is called with the same `data` as `process_bot`,
+    i.e. the ticker as "market_data" and the collateral of the simulator as "collateral".
+    The orders of the bot are sent to the simulator, where market orders are filled
+    at the recorded best bid / ask, so the replay runs as fast as the bot can decide.
+
+    Examples
+    --------
+    >>> replay = TickReplay("../../../scripts/data/data_*.json")
+    >>> result = replay.run(Bot3, size=0.01, profit_taking=1000., loss_cutting=500.)
+    >>> results = replay.run_many(Bot2, [{"threshold":th} for th in range(0, 1000, 100)])
+    """
+    def __init__(self, tickers, quiet=True, **kwargs):
+        """__init__(self, tickers, quiet=True, **kwargs) -> None
+
+        initialize this class
+
+        Parameters
+        ----------
+        tickers : list of dict, str or list of str
+            tickers or a glob pattern / paths of the files saved by scripts/getticker.py
+        quiet   : bool (default : True)
+            if True, then outputs printed by bots are discarded
+        kwargs  : options
+            options of ExchangeSimulator (e.g. collateral, leverage)
+        """
+        if len(tickers) != 0 and not isinstance(tickers[0], dict):
+            tickers = load_tickers(tickers)
+        if len(tickers) == 0:
+            raise ValueError("no tickers to replay.")
+        self._tickers = tickers
+        self._quiet = quiet
+        self._simulator = ExchangeSimulator.from_tickers(tickers, **kwargs)
+        self._times = parse_timestamps([ticker["timestamp"] for ticker in tickers])
+
+    @property
+    def tickers(self):
+        """tickers to replay"""
+        return self._tickers
+
+    def run(self, bot_class, **params):
+        """run(self, bot_class, **params) -> dict
+
+        replay the tickers through a bot
+
+        Parameters
+        ----------
+        bot_class : class
+            a subclass of BotBase, which is made with `api` of the simulator
+        params    : options
+            arguments of `bot_class` (e.g. size, threshold, profit_taking, loss_cutting).
+            The other names are set to the private attributes of the bot
+            (e.g. tick_count_order=10 sets `_tick_count_order`).
+
+        Returns
+        -------
+        obj : dict
+            obj has the following key-value pairs:
+                params       : dict
+                time         : numpy.1darray (unix time of each ticker)
+                pnl_list     : numpy.1darray (profit and loss in JPY at each ticker)
+                pnl          : float (profit and loss at the end)
+                max_drawdown : float
+                trades       : pandas.DataFrame (executions of the orders)
+        """
+        simulator = self._simulator
+        simulator.reset()
+        bot = self._make_bot(bot_class, simulator, params)
+        pnl_list = np.zeros(len(self._tickers))
+        with open(os.devnull, "w") as devnull, \
+                contextlib.redirect_stdout(devnull if self._quiet else sys.stdout):
+            for ii, ticker in enumerate(self._tickers):
+                simulator.advance(self._times[ii] - simulator.now)
+                collateral = simulator.getcollateral()
+                pnl_list[ii] = collateral["collateral"] + collateral["open_position_pnl"] - simulator.collateral
+                bot.data = {"market_data":ticker, "collateral":collateral}
+                bot._process()
+        collateral = simulator.getcollateral()
+        pnl = collateral["collateral"] + collateral["open_position_pnl"] - simulator.collateral
+        trades = pd.DataFrame(simulator.fills, columns=[
+            "id", "child_order_id", "side", "price", "size", "commission", "exec_date", "child_order_acceptance_id"
+        ])
+        return {
+            "params":params,
+            "time":self._times.copy(),
+            "pnl_list":pnl_list,
+            "pnl":pnl,
+            "max_drawdown":_max_drawdown(pnl_list),
+            "trades":trades,
+        }
+
+    def run_many(self, bot_class, params_list, max_workers=None, callback=None):
+        """run_many(self, bot_class, params_list, max_workers=None, callback=None) -> list
+
+        replay the tickers through bots with each of `params_list` in parallel
+
+        Parameters
+        ----------
+        bot_class   : class
+            a subclass of BotBase defined at the top level of a module
+        params_list : list of dict
+            parameters of `run`
+        max_workers : int (default : None)
+            the number of worker processes. if None, os.cpu_count() is used.
+            if 1, the bots are run in the current process.
+        callback    : callable (default : None)
+            function called with (the number of done runs, the number of runs)
+
+        Returns
+        -------
+        results : list of dict
+            results of `run` in the order of `params_list`
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        results = [None] * len(params_list)
+        if max_workers <= 1 or len(params_list) <= 1:
+            for ii, params in enumerate(params_list):
+                results[ii] = self.run(bot_class, **params)
+                if callback is not None:
+                    callback(ii + 1, len(params_list))
+            return results
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            futures = {executor.submit(_run, bot_class, params): ii for ii, params in enumerate(params_list)}
+            for done, future in enumerate(as_completed(futures)):
+                results[futures[future]] = future.result()
+                if callback is not None:
+                    callback(done + 1, len(params_list))
+        return results
+
+    def _make_bot(self, bot_class, api, params):
+        """_make_bot(self, bot_class, api, params) -> BotBase
+
+        make a bot with the arguments in `params` and set the others to its attributes
+        """
+        arguments = inspect.signature(bot_class.__init__).parameters
+        kwargs = {key:value for key, value in params.items() if key in arguments}
+        bot = bot_class(api=api, **kwargs)
+        for key, value in params.items():
+            if key in arguments:
+                continue
+            if not hasattr(bot, "_" + key):
+                raise ValueError("{} has no parameter '{}'.".format(bot_class.__name__, key))
+            setattr(bot, "_" + key, value)
+        # the smoothing factors follow the numbers of EMA points
+        if hasattr(bot, "_ema_points"):
+            bot._alpha = 2.0 / (bot._ema_points + 1.0)
+        if hasattr(bot, "_ema2_points"):
+            bot._alpha2 = 2.0 / (bot._ema2_points + 1.0)
+        return bot
+
+## the replay shared by the worker processes of run_many
+_replay = None
+
+def _init_worker(replay):
+    global _replay
+    _replay = replay
+
+def _run(bot_class, params):
+    return _replay.run(bot_class, **params)
+
+def _max_drawdown(pnl_list):
+    pnl_list = np.append(0., pnl_list)
+    return float((np.maximum.accumulate(pnl_list) - pnl_list).max())
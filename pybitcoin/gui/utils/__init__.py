@@ -1,12 +1,29 @@
 #! /usr/bin/python3
 # -*- coding: utf-8 -*
 
-from .Analyzer import TemporalAnalyzer, Analyzer
+from .AnalysisResults import AnalysisResults
+from .Analyzer import TemporalAnalyzer, Analyzer, VectorizedAnalyzer
+from .APIClient import APIClient, TokenBucket, as_client
+from .backtest import run_backtest
+from .bars import parse_bar_size, parse_timestamps, parse_executions, executions_to_ohlcv, split_closed_bars, resample_ohlcv
+from .bot_sweep import BOT_DEFAULTS, entry_signals, run_bot_backtest, sweep_bot_params
 from .DataAdapter import DataAdapter
 from .decorators import dynamic_decorator
+from .ExchangeSimulator import ExchangeSimulator, SimulatedError
+from .ExecutionDownloader import ExecutionDownloader
+from .ExecutionLocator import ExecutionLocator
 from .footprint import footprint
 from .get_logger import get_logger
 from .init_api import init_api
-from .mathfunctions import calc_EMA, find_cross_points, symbolize, peakdet, dataset_for_boxplot
+from .MarketFeed import MarketFeed
+from .mathfunctions import calc_EMA, ema_kernel, ema_kernel_batch, find_cross_points, find_extreme_points, encode_patterns, roll_pattern, rolling_max, rolling_min, symbolize, peakdet, dataset_for_boxplot
+from .OHLCVArchive import OHLCVArchive
+from .OHLCVStore import OHLCVStore, OHLCVHandle
+from .PartitionedStore import PartitionedStore
+from .ResampleCache import ResampleCache
 from .rategetter import get_rate_via_crypto, to_dataFrame
+from .StreamingIndicators import IndicatorRegistry, StreamingIndicator, register_indicator
+from .SessionAPI import SessionAPI
+from .sweep import analyze_ema_pair, distribute_benefits, sweep_ema_pairs
+from .TickReplay import TickReplay, load_tickers
 from .widget_wrapper import make_groupbox_and_grid, make_label, make_pushbutton
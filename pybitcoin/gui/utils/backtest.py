@@ -0,0 +1,245 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+backtest.py
+This file offers the following items:
+
+* run_backtest : function
+"""
+
+from bisect import bisect_left
+import numpy as np
+
+try:
+    from .mathfunctions import find_cross_points
+except ImportError:
+    import sys
+    sys.path.append("../utils/")
+    from mathfunctions import find_cross_points
+
+def order_ltps(ohlc, benefit_timing="worst"):
+    """order_ltps(ohlc, benefit_timing="worst") -> numpy.1darray, numpy.1darray
+
+    calculate the ltps used by orders decided on each bar.
+    An order decided on the i-th bar is executed with the (i+1)-th bar.
+
+    Parameters
+    ----------
+    ohlc           : numpy.2darray
+        array of (open, high, low, close)
+    benefit_timing : str (default : "worst")
+        one of ["worst", "mean", "open"]
+
+    Returns
+    -------
+    ltp_max : numpy.1darray
+        ltps for orders of "sell" (the last value is NaN)
+    ltp_min : numpy.1darray
+        ltps for orders of "buy" (the last value is NaN)
+    """
+    open_ = np.append(ohlc[1:, 0], np.nan).astype(float)
+    close = np.append(ohlc[1:, -1], np.nan).astype(float)
+    if benefit_timing == "worst":
+        return np.maximum(open_, close), np.minimum(open_, close)
+    elif benefit_timing == "mean":
+        ltp_mean = np.trunc((open_ + close) / 2)
+        return ltp_mean, ltp_mean
+    elif benefit_timing == "open":
+        return open_, open_
+    else:
+        raise ValueError
+
+def run_backtest(ohlc, ema1, ema2, dec, delta, benefit_timing="worst",
+                 golden_patterns=None, dead_patterns=None):
+    """run_backtest(ohlc, ema1, ema2, dec, delta, benefit_timing="worst",
+                    golden_patterns=None, dead_patterns=None) -> dict
+
+    run the backtest of the EMA-cross strategy used in DataAdapter.
+    The result is the same as the one of calling `judgeCrossPoint`, `judgeExtremePoint`,
+    `updateExecutionState` and `orderProcess` of DataAdapter for every bar,
+    but the state machine jumps directly from an order to the next one:
+    an entry is searched among the precomputed cross points and
+    an exit is searched with a vectorized scan bounded by the next cross point.
+    The benefits are put on a sparse array and accumulated with numpy.cumsum.
+
+    Parameters
+    ----------
+    ohlc            : numpy.2darray
+        array of (open, high, low, close)
+    ema1            : numpy.1darray
+        the first EMA curve
+    ema2            : numpy.1darray
+        the second EMA curve
+    dec             : numpy.1darray
+        decimals corresponding to OHLC patterns
+    delta           : float
+        threshold for the extreme points
+    benefit_timing  : str (default : "worst")
+        one of ["worst", "mean", "open"]
+    golden_patterns : array-like (default : None)
+        patterns permitted to order at golden crosses. if None, all patterns are permitted.
+    dead_patterns   : array-like (default : None)
+        patterns permitted to order at dead crosses
+
+    Returns
+    -------
+    obj : dict
+        obj has the following key-value pairs:
+            cross_signal   : numpy.1darray
+            extreme_signal : numpy.1darray
+            benefit_list   : numpy.1darray
+            jpy_list       : numpy.1darray
+            current_state  : str
+            order_ltp      : float
+            current_max    : float
+            current_min    : float
+            look_for_max   : bool or None
+            stop_by_cross  : bool or int
+    """
+    ohlc = np.asarray(ohlc)
+    ema1 = np.asarray(ema1, dtype=float)
+    ema2 = np.asarray(ema2, dtype=float)
+    dec = np.asarray(dec, dtype=int)
+    N = len(ohlc)
+    last = N - 1
+    diff = ema1 - ema2
+    cross_signal = find_cross_points(ema1, ema2)
+    extreme_signal = np.zeros(N)
+    benefit_list = np.zeros(N)
+    ltp_max, ltp_min = order_ltps(ohlc, benefit_timing)
+
+    # candidates of entries and exits
+    if golden_patterns is None:
+        entries = np.flatnonzero(cross_signal != 0)
+    else:
+        entries = np.flatnonzero(
+            ((cross_signal == 1) & np.isin(dec, golden_patterns)) |
+            ((cross_signal == -1) & np.isin(dec, dead_patterns))
+        )
+    # the loop below jumps between events, so scalar lookups are done on lists
+    entries = entries.tolist()
+    exits = {
+        "sell":np.flatnonzero(cross_signal == -1).tolist(),
+        "buy":np.flatnonzero(cross_signal == 1).tolist()
+    }
+    cross_ = cross_signal.tolist()
+    ltp_max_, ltp_min_ = ltp_max.tolist(), ltp_min.tolist()
+
+    # running extrema of diff, which are accumulated lazily up to *_upto
+    current_max, max_upto = np.inf, 0
+    current_min, min_upto = -np.inf, 0
+
+    state = "wait"
+    look_for_max = None
+    order_ltp = 0
+    stop_by_cross = False
+    ii = 0
+    while ii < N:
+        if state == "wait":
+            p = bisect_left(entries, ii)
+            if p == len(entries):
+                break
+            ii = entries[p]
+            if ii == last:
+                state = "ask" if cross_[ii] == 1 else "bid"
+                break
+            if cross_[ii] == 1:
+                order_ltp = ltp_max_[ii]
+                state = "sell"
+            else:
+                order_ltp = ltp_min_[ii]
+                state = "buy"
+            ii += 1
+            continue
+
+        # in position: find the first exit at or after ii,
+        # which is the next cross point or the first extreme point before it
+        crosses = exits[state]
+        p = bisect_left(crosses, ii)
+        kk_cross = crosses[p] if p < len(crosses) else last
+        seg = diff[ii:kk_cross+1]
+        if state == "sell":
+            if max_upto < ii:
+                current_max = max(current_max, diff[max_upto:ii].max())
+            running = np.maximum(np.maximum.accumulate(seg), current_max)
+            hit = seg < running - delta
+        else:
+            if min_upto < ii:
+                current_min = min(current_min, diff[min_upto:ii].min())
+            running = np.minimum(np.minimum.accumulate(seg), current_min)
+            hit = seg > running + delta
+        jj = int(hit.argmax())
+        is_extreme = bool(hit[jj])
+        if not is_extreme:
+            jj = len(seg) - 1
+            if p == len(crosses):
+                # no exit until the last bar
+                if state == "sell":
+                    current_max, max_upto = running[-1], N
+                else:
+                    current_min, min_upto = running[-1], N
+                look_for_max = state == "sell"
+                break
+        kk = ii + jj
+        if state == "sell":
+            current_max, max_upto = running[jj], kk + 1
+        else:
+            current_min, min_upto = running[jj], kk + 1
+        if is_extreme and state == "sell":
+            extreme_signal[kk] = 1.
+            current_min, min_upto = diff[kk], kk + 1
+            look_for_max = False
+        elif is_extreme:
+            extreme_signal[kk] = -1.
+            current_max, max_upto = diff[kk], kk + 1
+            look_for_max = True
+        else:
+            look_for_max = state == "sell"
+        if kk == last:
+            state = "con"
+            break
+
+        # order
+        if cross_[kk] == -1.:
+            benefit_list[kk] += ltp_min_[kk] - order_ltp
+            stop_by_cross = 0
+            order_ltp = ltp_min_[kk]
+            state = "buy"
+            look_for_max = False
+        elif is_extreme and state == "sell":
+            benefit_list[kk] += ltp_min_[kk] - order_ltp
+            order_ltp = 0
+            state = "wait"
+            look_for_max = None
+        elif cross_[kk] == 1.:
+            benefit_list[kk] -= ltp_max_[kk] - order_ltp
+            stop_by_cross = 0
+            order_ltp = ltp_max_[kk]
+            state = "sell"
+            look_for_max = True
+        else:
+            benefit_list[kk] -= ltp_max_[kk] - order_ltp
+            order_ltp = 0
+            state = "wait"
+            look_for_max = None
+        ii = kk + 1
+
+    # accumulate the remaining values of the running extrema
+    if max_upto < N:
+        current_max = max(current_max, diff[max_upto:].max())
+    if min_upto < N:
+        current_min = min(current_min, diff[min_upto:].min())
+
+    return {
+        "cross_signal":cross_signal,
+        "extreme_signal":extreme_signal,
+        "benefit_list":benefit_list,
+        "jpy_list":np.cumsum(benefit_list),
+        "current_state":state,
+        "order_ltp":order_ltp,
+        "current_max":current_max,
+        "current_min":current_min,
+        "look_for_max":look_for_max,
+        "stop_by_cross":stop_by_cross,
+    }
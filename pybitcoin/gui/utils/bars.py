@@ -0,0 +1,196 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+bars.py
+This file offers the following items:
+
+* EXECUTION_DTYPE
+* parse_bar_size : function
+* parse_timestamps : function
+* parse_executions : function
+* executions_to_ohlcv : function
+* split_closed_bars : function
+* resample_ohlcv : function
+"""
+
+import numpy as np
+import pandas as pd
+
+# an execution of bitFlyer; side is 1 for "BUY", -1 for "SELL" and 0 otherwise
+EXECUTION_DTYPE = np.dtype([
+    ("id", "<i8"), ("time", "<f8"), ("price", "<f8"), ("size", "<f8"), ("side", "i1"),
+])
+
+OHLCV_COLUMNS = ["time", "id_start", "id_end", "open", "high", "low", "close", "volume"]
+
+# seconds per unit of bar sizes such as "10s", "5m" and "1h"
+BAR_UNITS = {"s":1, "m":60, "h":3600, "d":86400}
+
+def parse_bar_size(bar):
+    """parse_bar_size(bar) -> int
+
+    convert a bar size into seconds
+
+    Parameters
+    ----------
+    bar : int or str
+        seconds, or a number followed by a unit of "s", "m", "h" or "d" (e.g. "10s", "5m", "1h")
+
+    Returns
+    -------
+    bar_seconds : int
+    """
+    if isinstance(bar, str):
+        try:
+            bar_seconds = int(bar[:-1]) * BAR_UNITS[bar[-1]]
+        except (KeyError, ValueError):
+            raise ValueError("invalid bar size: {}".format(bar))
+    else:
+        bar_seconds = int(bar)
+    if bar_seconds <= 0:
+        raise ValueError("bar size must be positive: {}".format(bar))
+    return bar_seconds
+
+def parse_timestamps(timestamps):
+    """parse_timestamps(timestamps) -> numpy.1darray
+
+    convert timestamps of bitFlyer (e.g. "exec_date" of executions and "timestamp" of tickers)
+    into unix times in seconds.
+    The timestamps are "%Y-%m-%dT%H:%M:%S" with or without fractions in UTC.
+    """
+    try:
+        timestamps = np.array(timestamps, dtype="datetime64[ns]")
+    except ValueError:
+        timestamps = pd.to_datetime(timestamps, format="ISO8601", utc=True).values
+    return timestamps.astype("datetime64[ns]").astype(np.int64) / 1e9
+
+def parse_executions(results):
+    """parse_executions(results) -> numpy.ndarray
+
+    convert executions returned by `API.executions` into a structured array sorted by id
+
+    Parameters
+    ----------
+    results : list of dict
+        executions with the keys of "id", "exec_date", "price", "size" and "side"
+
+    Returns
+    -------
+    executions : numpy.ndarray with EXECUTION_DTYPE
+        "time" is the unix time of "exec_date" (UTC) in seconds
+    """
+    executions = np.empty(len(results), dtype=EXECUTION_DTYPE)
+    if len(results) == 0:
+        return executions
+    executions["id"] = [res["id"] for res in results]
+    executions["time"] = parse_timestamps([res["exec_date"] for res in results])
+    executions["price"] = [res["price"] for res in results]
+    executions["size"] = [res["size"] for res in results]
+    side = np.array([res["side"] for res in results])
+    executions["side"] = (side == "BUY").astype(int) - (side == "SELL").astype(int)
+    return executions[np.argsort(executions["id"], kind="stable")]
+
+def executions_to_ohlcv(executions, bar_seconds=60):
+    """executions_to_ohlcv(executions, bar_seconds=60) -> pandas.DataFrame
+
+    aggregate executions sorted by id into OHLCV bars.
+    Bars without executions are not made.
+
+    Parameters
+    ----------
+    executions  : numpy.ndarray with EXECUTION_DTYPE
+        executions sorted by id
+    bar_seconds : int or str (default : 60)
+        length of a bar in seconds or a bar size like "1s", "10s", "1m", "5m" and "1h"
+
+    Returns
+    -------
+    ohlcv : pandas.DataFrame
+        bars with the columns of (time, id_start, id_end, open, high, low, close, volume),
+        where time is the unix time of the beginning of each bar
+    """
+    bar_seconds = parse_bar_size(bar_seconds)
+    if len(executions) == 0:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    bucket = np.floor_divide(executions["time"], bar_seconds).astype(np.int64)
+    heads = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+    tails = np.append(heads[1:], len(bucket)) - 1
+    price = executions["price"]
+    return pd.DataFrame({
+        "time":bucket[heads] * bar_seconds,
+        "id_start":executions["id"][heads],
+        "id_end":executions["id"][tails],
+        "open":price[heads],
+        "high":np.maximum.reduceat(price, heads),
+        "low":np.minimum.reduceat(price, heads),
+        "close":price[tails],
+        "volume":np.add.reduceat(executions["size"], heads),
+    }, columns=OHLCV_COLUMNS)
+
+def split_closed_bars(executions, bar_seconds=60):
+    """split_closed_bars(executions, bar_seconds=60) -> (pandas.DataFrame, numpy.ndarray)
+
+    aggregate executions into the bars which are closed,
+    i.e. followed by an execution of a later bar, and return the rest.
+    This is used for building bars from pages of executions incrementally.
+
+    Parameters
+    ----------
+    executions  : numpy.ndarray with EXECUTION_DTYPE
+        executions sorted by id
+    bar_seconds : int or str (default : 60)
+        length of a bar (see executions_to_ohlcv)
+
+    Returns
+    -------
+    ohlcv   : pandas.DataFrame
+        closed bars (see executions_to_ohlcv)
+    pending : numpy.ndarray with EXECUTION_DTYPE
+        executions of the last bar which may not be closed yet
+    """
+    bar_seconds = parse_bar_size(bar_seconds)
+    if len(executions) == 0:
+        return executions_to_ohlcv(executions, bar_seconds), executions
+    bucket = np.floor_divide(executions["time"], bar_seconds)
+    k = int(np.searchsorted(bucket, bucket[-1], "left"))
+    return executions_to_ohlcv(executions[:k], bar_seconds), executions[k:]
+
+def resample_ohlcv(ohlcv, bar):
+    """resample_ohlcv(ohlcv, bar) -> pandas.DataFrame
+
+    aggregate OHLCV bars sorted by time into longer bars, e.g. 1m bars into 5m, 1h or 1d bars.
+    Each bar starts at a multiple of the bar size in unix time,
+    and bars without source bars are not made.
+
+    Parameters
+    ----------
+    ohlcv : pandas.DataFrame
+        bars with the columns of time, open, high, low, close and volume,
+        and optionally id_start and id_end
+    bar   : int or str
+        length of a new bar (see parse_bar_size)
+
+    Returns
+    -------
+    resampled : pandas.DataFrame
+        bars with the same columns as `ohlcv` among OHLCV_COLUMNS
+    """
+    bar_seconds = parse_bar_size(bar)
+    columns = [col for col in OHLCV_COLUMNS if col in ohlcv.columns]
+    if len(ohlcv) == 0:
+        return pd.DataFrame(columns=columns)
+    time_ = ohlcv["time"].values
+    bucket = np.floor_divide(time_, bar_seconds).astype(np.int64)
+    heads = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+    tails = np.append(heads[1:], len(bucket)) - 1
+    reductions = {
+        "id_start":lambda x: x[heads], "id_end":lambda x: x[tails],
+        "open":lambda x: x[heads], "high":lambda x: np.maximum.reduceat(x, heads),
+        "low":lambda x: np.minimum.reduceat(x, heads), "close":lambda x: x[tails],
+        "volume":lambda x: np.add.reduceat(x, heads),
+    }
+    resampled = {"time":(bucket[heads] * bar_seconds).astype(time_.dtype)}
+    for col in columns[1:]:
+        resampled[col] = reductions[col](ohlcv[col].values)
+    return pd.DataFrame(resampled, columns=columns)
@@ -0,0 +1,347 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+bot_sweep.py
+This file offers the following items:
+
+* BOT_DEFAULTS
+* entry_signals : function
+* run_bot_backtest : function
+* sweep_bot_params : function
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from .mathfunctions import ema_kernel
+except ImportError:
+    import sys
+    sys.path.append("../utils/")
+    from mathfunctions import ema_kernel
+
+# the parameters of the bots in workers/bots.py
+BOT_DEFAULTS = {
+    "Bot1":dict(threshold=0., tick_count_order=4, tick_count_stop=5, profit_taking=0., loss_cutting=0.,
+                ema_points=20, cutting_ratio=5.),
+    "Bot2":dict(threshold=0., tick_count_order=4, tick_count_stop=5, profit_taking=0., loss_cutting=0.,
+                ema_points=20, cutting_ratio=5.),
+    "Bot3":dict(threshold=0., tick_count_order=20, tick_count_stop=5, profit_taking=0., loss_cutting=0.,
+                ema_points=20, cutting_ratio=1.),
+}
+
+# the parameters which change the entry signals
+ENTRY_PARAMS = {"Bot1":("threshold", "tick_count_order"), "Bot2":("threshold", "tick_count_order"),
+                "Bot3":("ema_points",)}
+
+# the number of tickers kept by the bots (BotBase._nbr_of_tickers)
+NBR_OF_TICKERS = 100
+
+def _bot_name(bot):
+    name = bot if isinstance(bot, str) else bot.__name__
+    if name not in BOT_DEFAULTS:
+        raise ValueError("unknown bot: {}".format(name))
+    return name
+
+def entry_signals(ltp, bot, threshold=0., tick_count_order=4, ema_points=20, **kwargs):
+    """entry_signals(ltp, bot, threshold=0., tick_count_order=4, ema_points=20, **kwargs) -> numpy.1darray
+
+    evaluate `_judge_order_side` of a bot at every ticker at once
+
+    Parameters
+    ----------
+    ltp              : numpy.1darray
+        ltps of tickers
+    bot              : str or class
+        one of "Bot1", "Bot2" and "Bot3" (or the class)
+    threshold        : float (default : 0.0)
+        threshold of Bot1 and Bot2
+    tick_count_order : int (default : 4)
+        the number of tickers compared by Bot1 and Bot2
+    ema_points       : int (default : 20)
+        N number of the EMA used by Bot3
+    kwargs           : options
+        the other parameters, which are ignored
+
+    Returns
+    -------
+    side : numpy.1darray
+        1 for "BUY", -1 for "SELL" and 0 otherwise.
+        Tickers before `tick_count_order` tickers are available are 0.
+    """
+    name = _bot_name(bot)
+    ltp = np.asarray(ltp, dtype=float)
+    N = len(ltp)
+    side = np.zeros(N, dtype=np.int8)
+    if name == "Bot3":
+        # ltp crosses its EMA downward (buy orders are disabled in Bot3)
+        ema = ema_kernel(ltp, 2.0 / (ema_points + 1.0))
+        side[1:][(ltp[:-1] > ema[:-1]) & (ltp[1:] <= ema[1:])] = -1
+        return side
+
+    n = int(tick_count_order)
+    if name == "Bot1" and n >= NBR_OF_TICKERS + 1:
+        raise ValueError("tick_count_order of Bot1 must be less than {}.".format(NBR_OF_TICKERS + 1))
+    if n < 1 or n > min(N, NBR_OF_TICKERS + 1):
+        return side
+    t = np.arange(n - 1, N)
+    total = _window_sums(ltp, n, sequential=(name == "Bot2"))
+    first = ltp[t - n + 1] # ltp_list[-tick_count_order]
+    if name == "Bot1":
+        mean = total / n
+        sell = mean <= first - threshold
+        # Bot1 compares with ltp_list[tick_count_order], counted from the head of the kept tickers
+        head = t - np.minimum(t + 1, NBR_OF_TICKERS + 1) + 1
+        valid = head + n <= t
+        buy = ~sell & valid
+        buy[valid] = buy[valid] & (mean[valid] > ltp[(head + n)[valid]] + threshold)
+    else:
+        diff = total - n * first
+        buy = diff >= threshold
+        sell = ~buy & (diff <= -threshold)
+    side[t[buy]] = 1
+    side[t[sell]] = -1
+    return side
+
+def _window_sums(x, n, sequential=True):
+    """_window_sums(x, n, sequential=True) -> numpy.1darray
+
+    sum up every window of `n` values in the same order as the bots,
+    i.e. `sum` of a list (sequential) or `mean` of numpy, so that the comparisons are identical
+    """
+    if not sequential and n >= 8:
+        return sliding_window_view(x, n).sum(axis=-1)
+    m = len(x) - n + 1
+    total = x[:m].copy()
+    for k in range(1, n):
+        total += x[k:k + m]
+    return total
+
+def _find_stop(name, ltp, entry, sign, price, params, size):
+    """_find_stop(name, ltp, entry, sign, price, params, size) -> int or None
+
+    find the first ticker where `_judge_stop` of a bot holding a position from `entry` is True.
+    The tickers are scanned in chunks of doubling lengths.
+    """
+    N = len(ltp)
+    s = max(int(params["tick_count_stop"]), 1)
+    pt, lc, cr = params["profit_taking"], params["loss_cutting"], params["cutting_ratio"]
+    start = entry + s
+    chunk = 64
+    while start < N:
+        stop = min(N, start + chunk)
+        if name == "Bot3":
+            diff = ltp[start:stop] - price
+            if sign == 1:
+                hit = (diff > pt) | (diff < -lc)
+            else:
+                hit = (diff < -pt) | (diff > lc)
+        else:
+            # open_position_pnl of the tickers in the windows of tick_count_stop
+            pnl = sign * (ltp[start - s + 1:stop] - price) * size
+            total = _window_sums(pnl, s, sequential=(name == "Bot2"))
+            last = pnl[s - 1:]
+            if name == "Bot1":
+                mean = total / s
+                hit = (last > cr * pt) | ~((mean > -lc) & (mean < pt))
+            else:
+                hit = (total >= pt) | (total <= -lc) | (last > cr * pt)
+        index = np.flatnonzero(hit)
+        if len(index) != 0:
+            return start + int(index[0])
+        start = stop
+        chunk *= 2
+    return None
+
+def run_bot_backtest(ltp, bot, size=0.01, spread=0., side=None, **params):
+    """run_bot_backtest(ltp, bot, size=0.01, spread=0., side=None, **params) -> dict
+
+    run the backtest of a bot in workers/bots.py over tickers.
+    The result is the same as the one of replaying the tickers through the bot by TickReplay
+    with market orders filled at ltp -/+ spread / 2.
+    Instead of calling `_process` for every ticker,
+    the entries are searched among the precomputed entry signals and
+    the exits are searched with a vectorized scan of the stop condition.
+
+    Parameters
+    ----------
+    ltp    : numpy.1darray
+        ltps of tickers
+    bot    : str or class
+        one of "Bot1", "Bot2" and "Bot3" (or the class)
+    size   : float (default : 0.01)
+        size of orders
+    spread : float (default : 0.0)
+        difference between the best ask and the best bid
+    side   : numpy.1darray (default : None)
+        the result of `entry_signals`, which is calculated if None
+    params : options
+        parameters of the bot (see BOT_DEFAULTS)
+
+    Returns
+    -------
+    obj : dict
+        obj has the following key-value pairs:
+            entries      : numpy.1darray (indices of the tickers of entries)
+            exits        : numpy.1darray (indices of the tickers of exits, -1 if open)
+            sides        : numpy.1darray (1 for "BUY" and -1 for "SELL")
+            benefits     : numpy.1darray (profit and loss of each trade in JPY)
+            pnl          : float (sum of the benefits, where an open position is valued at the last ltp)
+            n_trades     : int
+            win_rate     : float
+            max_drawdown : float (of the cumulative benefits)
+    """
+    name = _bot_name(bot)
+    params = dict(BOT_DEFAULTS[name], **params)
+    ltp = np.asarray(ltp, dtype=float)
+    if side is None:
+        side = entry_signals(ltp, name, **params)
+    candidates = np.flatnonzero(side)
+    n = int(params["tick_count_order"])
+
+    entries, exits, sides, benefits = [], [], [], []
+    free = n - 1 # the first ticker where tick_count reaches tick_count_order
+    while True:
+        k = int(np.searchsorted(candidates, free))
+        if k == len(candidates):
+            break
+        entry = int(candidates[k])
+        sign = int(side[entry])
+        price = ltp[entry] + sign * spread / 2.
+        exit_ = _find_stop(name, ltp, entry, sign, price, params, size)
+        entries.append(entry)
+        sides.append(sign)
+        if exit_ is None:
+            exits.append(-1)
+            benefits.append(sign * (ltp[-1] - price) * size)
+            break
+        exits.append(exit_)
+        benefits.append(sign * (ltp[exit_] - sign * spread / 2. - price) * size)
+        free = exit_ + n
+
+    benefits = np.array(benefits, dtype=float)
+    closed = benefits[np.array(exits, dtype=int) >= 0]
+    cumsum = np.append(0., np.cumsum(benefits))
+    return {
+        "entries":np.array(entries, dtype=int),
+        "exits":np.array(exits, dtype=int),
+        "sides":np.array(sides, dtype=int),
+        "benefits":benefits,
+        "pnl":float(benefits.sum()),
+        "n_trades":len(benefits),
+        "win_rate":float((closed > 0).mean()) if len(closed) != 0 else np.nan,
+        "max_drawdown":float((np.maximum.accumulate(cumsum) - cumsum).max()),
+    }
+
+## the tickers shared by the worker processes of sweep_bot_params
+_shared = {}
+
+def _init_worker(ltp, name, size, spread):
+    _shared.update(ltp=ltp, name=name, size=size, spread=spread)
+
+def _run_group(entry_params, params_list):
+    """_run_group(entry_params, params_list) -> list
+
+    run the backtests of the parameters sharing the entry signals
+    """
+    ltp, name = _shared["ltp"], _shared["name"]
+    side = entry_signals(ltp, name, **dict(BOT_DEFAULTS[name], **entry_params))
+    return [
+        run_bot_backtest(ltp, name, _shared["size"], _shared["spread"], side, **dict(entry_params, **params))
+        for params in params_list
+    ]
+
+def sweep_bot_params(ltp, bot, grid, size=0.01, spread=0., max_workers=None, callback=None):
+    """sweep_bot_params(ltp, bot, grid, size=0.01, spread=0., max_workers=None, callback=None) -> dict
+
+    run the backtests of a bot for every combination of the parameters in `grid`.
+    The entry signals are calculated once for each combination of the parameters changing them
+    (threshold and tick_count_order of Bot1 and Bot2, ema_points of Bot3),
+    and the groups are distributed to a ProcessPoolExecutor.
+
+    Parameters
+    ----------
+    ltp         : numpy.1darray or list of dict
+        ltps of tickers or tickers (e.g. loaded by TickReplay.load_tickers)
+    bot         : str or class
+        one of "Bot1", "Bot2" and "Bot3" (or the class)
+    grid        : dict
+        values of parameters, e.g. {"threshold":[...], "tick_count_order":[...],
+        "ema_points":[...], "profit_taking":[...], "loss_cutting":[...]}.
+        The other parameters are the defaults of the bot (see BOT_DEFAULTS).
+    size        : float (default : 0.01)
+        size of orders
+    spread      : float (default : 0.0)
+        difference between the best ask and the best bid
+    max_workers : int (default : None)
+        the number of worker processes. if None, os.cpu_count() is used.
+        if 1, the backtests are run in the current process.
+    callback    : callable (default : None)
+        function called with (the number of done groups, the number of groups)
+
+    Returns
+    -------
+    obj : dict
+        obj has the following key-value pairs:
+            axes         : list of (name, values) in the order of the dimensions
+            pnl          : numpy.ndarray
+            n_trades     : numpy.ndarray
+            win_rate     : numpy.ndarray
+            max_drawdown : numpy.ndarray
+            best         : dict (the parameters with the maximum pnl)
+    """
+    name = _bot_name(bot)
+    if len(ltp) != 0 and isinstance(ltp[0], dict):
+        ltp = [ticker["ltp"] for ticker in ltp]
+    ltp = np.asarray(ltp, dtype=float)
+    unknown = set(grid) - set(BOT_DEFAULTS[name])
+    if len(unknown) != 0:
+        raise ValueError("unknown parameters of {}: {}".format(name, sorted(unknown)))
+    axes = [(key, list(values)) for key, values in grid.items()]
+    shape = tuple(len(values) for _, values in axes)
+    entry_keys = [key for key, _ in axes if key in ENTRY_PARAMS[name]]
+
+    # group the combinations by the parameters of the entry signals
+    groups = {}
+    for index in np.ndindex(*shape):
+        params = {key:values[ii] for (key, values), ii in zip(axes, index)}
+        entry_params = tuple((key, params[key]) for key in entry_keys)
+        groups.setdefault(entry_params, []).append((index, params))
+    cube = {key:np.full(shape, np.nan) for key in ["pnl", "n_trades", "win_rate", "max_drawdown"]}
+
+    def collect(members, results):
+        for (index, _), result in zip(members, results):
+            for key in cube:
+                cube[key][index] = result[key]
+
+    tasks = [(dict(entry_params), members) for entry_params, members in groups.items()]
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1 or len(tasks) <= 1:
+        _init_worker(ltp, name, size, spread)
+        for done, (entry_params, members) in enumerate(tasks):
+            collect(members, _run_group(entry_params, [params for _, params in members]))
+            if callback is not None:
+                callback(done + 1, len(tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(ltp, name, size, spread)) as executor:
+            futures = {
+                executor.submit(_run_group, entry_params, [params for _, params in members]):members
+                for entry_params, members in tasks
+            }
+            for done, future in enumerate(as_completed(futures)):
+                collect(futures[future], future.result())
+                if callback is not None:
+                    callback(done + 1, len(tasks))
+
+    cube["n_trades"] = cube["n_trades"].astype(int)
+    best = np.unravel_index(np.nanargmax(cube["pnl"]), shape) if cube["pnl"].size != 0 else ()
+    return dict(
+        axes=axes,
+        best={key:values[ii] for (key, values), ii in zip(axes, best)},
+        **cube
+    )
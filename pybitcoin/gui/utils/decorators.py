@@ -28,3 +28,20 @@ def dynamic_decorator(func0):
                 return functools.wraps(func)(func0(func, *args, **kwargs))
             return _wrapper
     return wrapper
+
+@dynamic_decorator
+def synchronized(func, lock="_lock"):
+    """synchronized(func, lock="_lock") -> function
+    return a method called while holding the lock of the instance
+
+    Parameters
+    ----------
+    func : callable
+        method to synchronize
+    lock : str (default : "_lock")
+        name of the attribute of the lock (e.g. threading.RLock)
+    """
+    def wrapper(self, *args, **kwargs):
+        with getattr(self, lock):
+            return func(self, *args, **kwargs)
+    return wrapper
@@ -10,26 +10,47 @@ This file offers the following items:
 
 import glob
 import os
-import pybitflyer
 
-def init_api(timeout=2.0, verbose=False):
-    """init_api(timeout=2.0) -> API
+try:
+    from .APIClient import as_client
+    from .ExchangeSimulator import ExchangeSimulator
+    from .SessionAPI import SessionAPI
+except ImportError:
+    import sys
+    sys.path.append("../utils/")
+    from APIClient import as_client
+    from ExchangeSimulator import ExchangeSimulator
+    from SessionAPI import SessionAPI
+
+def init_api(timeout=2.0, verbose=False, simulator=None, **kwargs):
+    """init_api(timeout=2.0, verbose=False, simulator=None, **kwargs) -> APIClient
     
     initialize the API of pybitflyer
 
     Parameters
     ----------
-    timeout : float
+    timeout   : float
         timeout of requests
-    verbose : bool
+    verbose   : bool
         if True, then try requests and print their results
+    simulator : ExchangeSimulator or str (default : None)
+        if given, the local exchange (or the one replaying the execution file) is used
+        instead of bitFlyer and no credential is loaded
+    kwargs    : options
+        options of APIClient (e.g. rate, max_retries)
 
     Returns
     -------
-    api : APi instance of pybitflyer
-        an API
+    api : APIClient
+        an API of pybitflyer keeping connections alive (SessionAPI),
+        which is wrapped with the request budget and retries
     """
     _api_timeout = 2.0
+    if simulator is not None:
+        if not isinstance(simulator, ExchangeSimulator):
+            simulator = ExchangeSimulator(simulator)
+        return _check(as_client(simulator, **kwargs), verbose)
+
     if os.name == "nt":
         fpath = glob.glob(os.path.join(os.environ["USERPROFILE"], ".prv", "*"))[0]
     else:
@@ -43,25 +64,23 @@ def init_api(timeout=2.0, verbose=False):
         except Exception as ex:
             raise Exception(ex)
 
-    api = pybitflyer.API(
+    api = as_client(SessionAPI(
         api_key=_api_key, 
         api_secret=_api_secret, 
         timeout=_api_timeout
-    )
+    ), **kwargs)
+    return _check(api, verbose)
 
+def _check(api, verbose):
+    """_check(api, verbose) -> APIClient
+
+    try requests and print their results if `verbose`
+    """
     if verbose:
         try:
             # check the markets
             endpoint = "/v1/markets"
-            is_success = False
-            while not is_success:
-                try:
-                    currencies = api.request(endpoint)
-                    is_success = True
-                except KeyboardInterrupt:
-                    raise KeyboardInterrupt
-                except:
-                    continue
+            currencies = api.request(endpoint)
             if isinstance(currencies, list):
                 print("Currency:")
                 print([currency["product_code"] for currency in currencies])
@@ -70,15 +89,7 @@ def init_api(timeout=2.0, verbose=False):
             
             # check the permissions of API
             endpoint = "/v1/me/getpermissions"
-            is_success = False
-            while not is_success:
-                try:
-                    permissions = api.request(endpoint)
-                    is_success = True
-                except KeyboardInterrupt:
-                    raise KeyboardInterrupt
-                except:
-                    continue
+            permissions = api.request(endpoint)
             if isinstance(permissions, list):
                 print("Permitted API:")
                 print(permissions)
@@ -86,17 +97,11 @@ def init_api(timeout=2.0, verbose=False):
                 print("No permitted APIs.")
             
             # check the latest executions
-            is_success = False
             params = {
                 "product_code":"FX_BTC_JPY",
                 "count":10,
             }
-            while not is_success:
-                try:
-                    executions = api.executions(**params)
-                    is_success = True
-                except:
-                    continue
+            executions = api.executions(**params)
             if isinstance(executions, list):
                 print("Latest executions:")
                 for _ in executions:
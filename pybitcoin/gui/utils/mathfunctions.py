@@ -15,9 +15,60 @@ def _calc_EMA(x, alpha):
     """ _calc_EMA(x, alpha) -> array-like
     Adopted from https://qiita.com/toyolab/items/6872b32d9fa1763345d8
     """
-    y,_ = lfilter([alpha], [1,alpha-1], x, zi=[x[0]*(1-alpha)])
+    return ema_kernel(x, alpha)
+
+def ema_kernel(x, alpha, ema_prev=None):
+    """ema_kernel(x, alpha, ema_prev=None) -> numpy.1darray
+    calculate EMA values with an IIR filter:
+        ema[n] = (1 - alpha) * ema[n-1] + alpha * x[n]
+    If ema_prev is None, then the first EMA value is x[0].
+    Otherwise the filter starts from the given state, 
+    which enables to extend an existing EMA with new values.
+    
+    Parameters
+    ----------
+    x        : array-like
+    alpha    : float
+        alpha parameter of EMA calculation
+    ema_prev : float (default : None)
+        the EMA value just before x[0]
+    
+    Returns
+    -------
+    ema : numpy.1darray
+    """
+    x = np.asarray(x, dtype=float)
+    if len(x) == 0:
+        return np.empty(0)
+    if ema_prev is None:
+        ema_prev = x[0]
+    y, _ = lfilter([alpha], [1., alpha - 1.], x, zi=[ema_prev * (1. - alpha)])
     return y
 
+def ema_kernel_batch(x, alphas, ema_prev=None):
+    """ema_kernel_batch(x, alphas, ema_prev=None) -> numpy.2darray
+    calculate EMA values of x for many alphas at once.
+    The i-th row of the result is equal to ema_kernel(x, alphas[i], ema_prev[i]).
+    
+    Parameters
+    ----------
+    x        : array-like
+    alphas   : array-like
+        alpha parameters of EMA calculation
+    ema_prev : array-like (default : None)
+        the EMA values just before x[0] for each alpha
+    
+    Returns
+    -------
+    ema : numpy.2darray with the shape of (len(alphas), len(x))
+    """
+    x = np.asarray(x, dtype=float)
+    alphas = np.asarray(alphas, dtype=float)
+    ema = np.empty((len(alphas), len(x)))
+    for ii, alpha in enumerate(alphas):
+        ema[ii] = ema_kernel(x, alpha, None if ema_prev is None else ema_prev[ii])
+    return ema
+
 def find_cross_points(y1, y2=None):
     """find_cross_points(y1, y2=None) -> numpy.1darray
     find cross points between two data sequences
@@ -38,14 +89,106 @@ def find_cross_points(y1, y2=None):
         y1 = np.array(y1)
     if isinstance(y2, list):
         y2 = np.array(y2)
+    above = np.asarray(y1) >= np.asarray(y2)
     cross_points = np.zeros(len(y1))
-    for ii in range(1, len(y1)):
-        if y1[ii - 1] >= y2[ii - 1] and y1[ii] < y2[ii]:
-            cross_points[ii] = -1
-        elif y1[ii - 1] < y2[ii - 1] and y1[ii] >= y2[ii]:
-            cross_points[ii] = 1
+    cross_points[1:][above[:-1] & ~above[1:]] = -1
+    cross_points[1:][~above[:-1] & above[1:]] = 1
     return cross_points
 
+def find_extreme_points(y, delta, look_for_max=True):
+    """find_extreme_points(y, delta, look_for_max=True) -> numpy.1darray
+    find extreme points of a data sequence with hysteresis.
+    An extreme maximum is signaled when y falls below its running maximum by more than delta, 
+    and then the search switches to an extreme minimum starting from that point, and vice versa.
+    The detection is sequential by nature, so it runs in a single pass 
+    over a list of floats with only scalar operations.
+    This is a standalone helper, which is not used for the signals of DataAdapter:
+    the search of DataAdapter.judgeExtremePoint (and backtest.run_backtest) is
+    reset by every order and signals only while a position is held,
+    so its extreme points differ from the ones of this function.
+    
+    Parameters
+    ----------
+    y            : list or numpy.1darray
+    delta        : float (>= 0)
+        hysteresis width
+    look_for_max : bool (default : True)
+        if True, then look for an extreme maximum first
+    
+    Returns
+    -------
+    extreme_points : numpy.1darray
+        +1 on extreme maxima, -1 on extreme minima and 0 otherwise
+    """
+    extreme_points = np.zeros(len(y))
+    current_max, current_min = -np.inf, np.inf
+    for ii, v in enumerate(np.asarray(y, dtype=float).tolist()):
+        if look_for_max:
+            if v > current_max:
+                current_max = v
+            elif v < current_max - delta:
+                extreme_points[ii] = 1.
+                current_min = v
+                look_for_max = False
+        else:
+            if v < current_min:
+                current_min = v
+            elif v > current_min + delta:
+                extreme_points[ii] = -1.
+                current_max = v
+                look_for_max = True
+    return extreme_points
+
+def encode_patterns(bits, N_dec):
+    """encode_patterns(bits, N_dec) -> numpy.1darray
+    convert each N_dec-length sequence of 0-or-1 values to a decimal.
+    The code of the ii-th value is
+        bits[ii-N_dec+1] * 2**(N_dec-1) + ... + bits[ii] * 2**0
+    and the first N_dec-1 codes are 0.
+    
+    Parameters
+    ----------
+    bits  : array-like
+        array of 0-or-1 values
+    N_dec : int
+        the number of values to convert altogether into a decimal (1 <= N_dec <= 62)
+    
+    Returns
+    -------
+    dec : numpy.1darray
+    """
+    if N_dec < 1 or N_dec > 62:
+        raise ValueError("N_dec must be in [1, 62].")
+    bits = np.asarray(bits).astype(np.int64)
+    dec = np.zeros(len(bits), dtype=np.int64)
+    N = len(bits) - N_dec + 1
+    if N <= 0:
+        return dec
+    # add the strided bits shifted by their weights
+    for kk in range(N_dec):
+        dec[N_dec-1:] |= bits[N_dec-1-kk:N_dec-1-kk+N] << kk
+    return dec
+
+def roll_pattern(dec, bit, N_dec):
+    """roll_pattern(dec, bit, N_dec) -> int
+    update a code made by `encode_patterns` with a new 0-or-1 value,
+    which drops the oldest value of the pattern.
+    
+    Parameters
+    ----------
+    dec   : int
+        the current code
+    bit   : int
+        the new value
+    N_dec : int
+        the length of the pattern
+    
+    Returns
+    -------
+    dec : int
+    """
+    return ((int(dec) << 1) | int(bit)) & ((1 << N_dec) - 1)
+
 def symbolize(dataFrame, k):
     """symbolize(dataFrame, k) -> numpy.1darray
     binalize a k-length OHLC dataset and then convert the binary to decimal number.  
@@ -65,12 +208,62 @@ def symbolize(dataFrame, k):
         var_ = (dataFrame["Close"] - dataFrame["Open"]).values
     except KeyError:
         var_ = (dataFrame["close"] - dataFrame["open"]).values
-    dec = np.zeros(len(var_), int)
+    return encode_patterns(var_ >= 0, k)
+
+def rolling_max(x, N):
+    """rolling_max(x, N) -> numpy.1darray
+    calculate the maximum of the latest N values at each point:
+        y[ii] = max(x[max(0, ii-N+1):ii+1])
+    The cost is O(len(x)) independently of N (van Herk / Gil-Werman algorithm).
+    For streaming use, see StreamingIndicators.RollingExtremum.
     
-    for ii in range(k-1, len(var_)):
-        ind_ = np.array(var_[ii-k+1:ii+1] >= 0, int)
-        dec[ii] = int("".join([str(i_) for i_ in ind_]), 2)
-    return dec
+    Parameters
+    ----------
+    x : array-like
+    N : int
+        window size
+    
+    Returns
+    -------
+    y : numpy.1darray
+    """
+    return _rolling_extremum(x, N, np.maximum, -np.inf)
+
+def rolling_min(x, N):
+    """rolling_min(x, N) -> numpy.1darray
+    calculate the minimum of the latest N values at each point:
+        y[ii] = min(x[max(0, ii-N+1):ii+1])
+    
+    Parameters
+    ----------
+    x : array-like
+    N : int
+        window size
+    
+    Returns
+    -------
+    y : numpy.1darray
+    """
+    return _rolling_extremum(x, N, np.minimum, np.inf)
+
+def _rolling_extremum(x, N, func, fill):
+    """_rolling_extremum(x, N, func, fill) -> numpy.1darray
+    The values are divided into blocks of N, and the extremum of a window is
+    the one of the suffix extremum in a block and the prefix extremum in the next block.
+    """
+    if N < 1:
+        raise ValueError("N must be >=1.")
+    x = np.asarray(x, dtype=float)
+    if len(x) == 0 or N == 1:
+        return x.copy()
+    # the window of y[ii] is buff[ii:ii+N]
+    N_blocks = -(-(len(x) + N - 1) // N)
+    buff = np.full(N_blocks * N, fill)
+    buff[N-1:N-1+len(x)] = x
+    blocks = buff.reshape(N_blocks, N)
+    prefix = func.accumulate(blocks, axis=1).ravel()
+    suffix = func.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return func(suffix[:len(x)], prefix[N-1:N-1+len(x)])
 
 def peakdet(v, delta, x=None):
     """peakdet(v, delta, x=None) -> numpy.2darray, numpy.2darray
@@ -115,29 +308,30 @@ def peakdet(v, delta, x=None):
         sys.exit('Input argument delta must be a scalar')
     if delta <= 0:
         sys.exit('Input argument delta must be positive')
-    mn, mx = np.Inf, -np.Inf
-    mnpos, mxpos = np.NaN, np.NaN
+    mn, mx = np.inf, -np.inf
+    mnpos, mxpos = np.nan, np.nan
     lookformax = True
 
-    for i in np.arange(len(v)):
-        this = v[i]
+    # the running extrema are updated on python scalars,
+    # which is much faster than indexing numpy arrays for each point
+    for xi, this in zip(np.asarray(x).tolist(), np.asarray(v).tolist()):
         if this > mx:
             mx = this
-            mxpos = x[i]
+            mxpos = xi
         if this < mn:
             mn = this
-            mnpos = x[i]
+            mnpos = xi
         if lookformax:
             if this < mx - delta:
                 maxtab.append((mxpos, mx))
                 mn = this
-                mnpos = x[i]
+                mnpos = xi
                 lookformax = False
         else:
             if this > mn + delta:
                 mintab.append((mnpos, mn))
                 mx = this
-                mxpos = x[i]
+                mxpos = xi
                 lookformax = True
 
     return np.array(maxtab), np.array(mintab)
@@ -0,0 +1,356 @@
+#! /usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+sweep.py
+This file offers the following items:
+
+* analyze_ema_pair    : function
+* distribute_benefits : function
+* sweep_ema_pairs     : function
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import combinations
+from multiprocessing import shared_memory
+import os
+import numpy as np
+
+try:
+    from .backtest import run_backtest
+    from .OHLCVStore import OHLCVStore
+except ImportError:
+    import sys
+    sys.path.append("../utils/")
+    from backtest import run_backtest
+    from OHLCVStore import OHLCVStore
+
+# arrays attached to the shared memory in each worker process
+_shared = {}
+
+def analyze_ema_pair(ohlc, ema1, ema2, dec, N_dec, delta, benefit_timing="worst",
+                     golden_patterns=None, dead_patterns=None):
+    """analyze_ema_pair(ohlc, ema1, ema2, dec, N_dec, delta, benefit_timing="worst",
+                        golden_patterns=None, dead_patterns=None) -> dict
+
+    run the backtest with a pair of EMA curves
+    and distribute the benefits to the OHLC patterns at cross points.
+
+    Parameters
+    ----------
+    ohlc            : numpy.2darray
+        array of (open, high, low, close)
+    ema1            : numpy.1darray
+        the first EMA curve
+    ema2            : numpy.1darray
+        the second EMA curve
+    dec             : numpy.1darray
+        decimals corresponding to OHLC patterns
+    N_dec           : int
+        the exponent of the decimal for OHLC patterns
+    delta           : float
+        threshold for the extreme points
+    benefit_timing  : str (default : "worst")
+        one of ["worst", "mean", "open"]
+    golden_patterns : array-like (default : None)
+        patterns permitted to order at golden crosses
+    dead_patterns   : array-like (default : None)
+        patterns permitted to order at dead crosses
+
+    Returns
+    -------
+    obj : dict
+        obj has the following key-value pairs:
+            benefit        : float
+            dec_dead       : list of numpy.1darray with the length of 2**N_dec
+            dec_golden     : list of numpy.1darray with the length of 2**N_dec
+            dec_dead_box   : list of tuples with the length of 2**N_dec
+            dec_golden_box : list of tuples with the length of 2**N_dec
+            stat_dead      : numpy.2darray with the shape of (2**N_dec, 5)
+            stat_golden    : numpy.2darray with the shape of (2**N_dec, 5)
+    """
+    results = run_backtest(
+        ohlc, ema1, ema2, dec, delta,
+        benefit_timing, golden_patterns, dead_patterns
+    )
+    cross_signal = results["cross_signal"]
+    benefit_list = results["benefit_list"]
+    dec = np.asarray(dec, dtype=int)
+
+    # the benefit of each cross point is the first non-zero benefit on or after it
+    nonzero = np.flatnonzero(benefit_list != 0)
+    golden = np.flatnonzero(cross_signal == 1)
+    dead = np.flatnonzero(cross_signal == -1)
+    dec_golden, dec_golden_box, stat_golden = distribute_benefits(
+        dec[golden], _next_benefits(benefit_list, nonzero, golden), N_dec
+    )
+    dec_dead, dec_dead_box, stat_dead = distribute_benefits(
+        dec[dead], _next_benefits(benefit_list, nonzero, dead), N_dec
+    )
+
+    return {
+        "benefit":results["jpy_list"][-1],
+        "dec_dead":dec_dead,
+        "dec_golden":dec_golden,
+        "dec_dead_box":dec_dead_box,
+        "dec_golden_box":dec_golden_box,
+        "stat_dead":stat_dead,
+        "stat_golden":stat_golden,
+    }
+
+def _next_benefits(benefit_list, nonzero, index):
+    """_next_benefits(benefit_list, nonzero, index) -> numpy.1darray
+
+    return the first non-zero benefit on or after each index (0 if not found)
+    """
+    pos = np.searchsorted(nonzero, index)
+    found = pos < len(nonzero)
+    values = np.zeros(len(index))
+    values[found] = benefit_list[nonzero[pos[found]]]
+    return values
+
+def distribute_benefits(dec, values, N_dec, limit=100000):
+    """distribute_benefits(dec, values, N_dec, limit=100000) -> list, list, numpy.2darray
+
+    group benefits by OHLC patterns and calculate statistics of each group.
+    The groups and the statistics are obtained with a stable sort by the patterns
+    instead of growing an array for each pattern.
+
+    Parameters
+    ----------
+    dec    : numpy.1darray
+        decimals corresponding to OHLC patterns
+    values : numpy.1darray
+        benefits
+    N_dec  : int
+        the exponent of the decimal for OHLC patterns
+    limit  : float (default : 100000)
+        benefits whose absolute values are larger than limit are ignored in the statistics
+
+    Returns
+    -------
+    dec_list : list of numpy.1darray with the length of 2**N_dec
+        benefits of each pattern within the limit, in the order of occurrence
+    box_list : list of tuples with the length of 2**N_dec
+        datasets for boxplot of each pattern (including the values out of the limit)
+    stat     : numpy.2darray with the shape of (2**N_dec, 5)
+        max, min, mean, std and median of each pattern
+    """
+    N_groups = 2**N_dec
+    dec = np.asarray(dec, dtype=int)
+    values = np.asarray(values, dtype=float)
+
+    # groups in the order of occurrence
+    order = np.argsort(dec, kind="stable")
+    counts = np.bincount(dec, minlength=N_groups)
+    groups = np.split(values[order], np.cumsum(counts)[:-1])
+    dec_list = [arr[np.abs(arr) <= limit] for arr in groups]
+    box_list = _grouped_boxplot(dec, values, counts, groups)
+
+    # statistics with sorted groups
+    ind = np.abs(values) <= limit
+    dec_, values_ = dec[ind], values[ind]
+    order = np.lexsort((values_, dec_))
+    values_ = values_[order]
+    counts = np.bincount(dec_[order], minlength=N_groups)
+    stat = np.zeros((N_groups, 5), dtype=float)
+    valid = counts != 0
+    if valid.any():
+        count = counts[valid]
+        start = (np.cumsum(counts) - counts)[valid]
+        mean = np.add.reduceat(values_, start) / count
+        dev = values_ - np.repeat(mean, count)
+        std = np.sqrt(np.add.reduceat(dev**2, start) / count)
+        stat[valid] = np.column_stack((
+            values_[start + count - 1], values_[start], mean, std,
+            _sorted_quantile(values_, start, count, 0.5)
+        ))
+    return dec_list, box_list, stat
+
+def _sorted_quantile(values, start, count, q):
+    """_sorted_quantile(values, start, count, q) -> numpy.1darray
+
+    calculate the q-quantile of each sorted group values[start:start+count]
+    in the same way as numpy.percentile (linear interpolation)
+    """
+    pos = (count - 1) * q
+    lower = np.floor(pos).astype(int)
+    t = pos - lower
+    a = values[start + lower]
+    b = values[start + np.minimum(lower + 1, count - 1)]
+    diff = b - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+def _grouped_boxplot(dec, values, counts, groups):
+    """_grouped_boxplot(dec, values, counts, groups) -> list
+
+    return the same datasets as `dataset_for_boxplot` for each group,
+    whose quartiles and whiskers are calculated on the sorted groups at once
+    """
+    box_list = [(jj, [], 0, 0, 0, 0, 0) for jj in range(len(counts))]
+    valid = counts != 0
+    if not valid.any():
+        return box_list
+    sorted_ = values[np.lexsort((values, dec))]
+    count = counts[valid]
+    start = (np.cumsum(counts) - counts)[valid]
+    q1 = _sorted_quantile(sorted_, start, count, 0.25)
+    q2 = (sorted_[start + (count - 1) // 2] + sorted_[start + count // 2]) / 2
+    q3 = _sorted_quantile(sorted_, start, count, 0.75)
+    IQR = q3 - q1
+    lower = np.repeat(q1 - 1.5 * IQR, count)
+    upper = np.repeat(q3 + 1.5 * IQR, count)
+    ind = (sorted_ >= lower) & (sorted_ <= upper)
+    lower_whisker = np.minimum.reduceat(np.where(ind, sorted_, np.inf), start)
+    upper_whisker = np.maximum.reduceat(np.where(ind, sorted_, -np.inf), start)
+    for ii, jj in enumerate(np.flatnonzero(valid)):
+        arr = groups[jj]
+        outliers = arr[(arr < q1[ii] - 1.5 * IQR[ii]) | (arr > q3[ii] + 1.5 * IQR[ii])]
+        box_list[jj] = (jj, outliers, lower_whisker[ii], q1[ii], q2[ii], q3[ii], upper_whisker[ii])
+    return box_list
+
+def _to_shared(arr):
+    """_to_shared(arr) -> SharedMemory, tuple
+
+    copy an array to a new block of shared memory.
+    The tuple of (name, shape, dtype) is used to attach the block in other processes.
+    """
+    arr = np.ascontiguousarray(arr)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm, (shm.name, arr.shape, arr.dtype.str)
+
+def _init_worker(descriptors, handle, params):
+    """_init_worker(descriptors, handle, params) -> None
+
+    attach the shared arrays and the OHLCVStore in a worker process
+    """
+    _shared.clear()
+    if handle is not None:
+        _shared["store"] = handle.attach()
+        _shared["ohlc"] = _shared["store"].ohlc
+    for key, (name, shape, dtype) in descriptors.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _shared[key + "_shm"] = shm
+        _shared[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _shared["params"] = params
+
+def _analyze_chunk(pairs):
+    """_analyze_chunk(pairs) -> list
+
+    analyze a chunk of pairs of row indices of the EMA matrix in a worker process
+    """
+    ema = _shared["ema"]
+    return [
+        (ii, kk, analyze_ema_pair(_shared["ohlc"], ema[ii], ema[kk], _shared["dec"], **_shared["params"]))
+        for ii, kk in pairs
+    ]
+
+def sweep_ema_pairs(ohlc, dec, ema_matrix, N_ema_min, N_dec, delta, benefit_timing="worst",
+                    golden_patterns=None, dead_patterns=None, max_workers=None, callback=None):
+    """sweep_ema_pairs(ohlc, dec, ema_matrix, N_ema_min, N_dec, delta, benefit_timing="worst",
+                       golden_patterns=None, dead_patterns=None, max_workers=None, callback=None) -> dict
+
+    analyze every pair of EMA curves in `ema_matrix`.
+    The pairs are sharded across a ProcessPoolExecutor,
+    whose workers read `ohlc`, `dec` and `ema_matrix` from shared memory.
+
+    Parameters
+    ----------
+    ohlc            : numpy.2darray or OHLCVStore
+        array of (open, high, low, close).
+        if an OHLCVStore is given, the workers attach it instead of a copy.
+    dec             : numpy.1darray
+        decimals corresponding to OHLC patterns
+    ema_matrix      : numpy.2darray
+        EMA curves whose N numbers are N_ema_min, N_ema_min + 1, ...
+    N_ema_min       : int
+        the minimum of N number for EMA lines
+    N_dec           : int
+        the exponent of the decimal for OHLC patterns
+    delta           : float
+        threshold for the extreme points
+    benefit_timing  : str (default : "worst")
+        one of ["worst", "mean", "open"]
+    golden_patterns : array-like (default : None)
+        patterns permitted to order at golden crosses
+    dead_patterns   : array-like (default : None)
+        patterns permitted to order at dead crosses
+    max_workers     : int (default : None)
+        the number of worker processes. if None, os.cpu_count() is used.
+        if 1, the pairs are analyzed in the current process.
+    callback        : callable (default : None)
+        function called with a dict of
+        {"done":int, "total":int, "benefit_map":numpy.2darray} every time a chunk is finished
+
+    Returns
+    -------
+    obj : dict
+        obj has the following key-value pairs:
+            benefit_map         : numpy.2darray
+            stat_dead_list      : list
+            stat_golden_list    : list
+            dec_dead_box_list   : list
+            dec_golden_box_list : list
+            dec_dead_list       : list
+            dec_golden_list     : list
+    """
+    store = ohlc if isinstance(ohlc, OHLCVStore) else None
+    ohlc = store.ohlc if store is not None else np.asarray(ohlc, dtype=float)
+    dec = np.asarray(dec, dtype=int)
+    ema_matrix = np.asarray(ema_matrix, dtype=float)
+    N_ema_max = N_ema_min + len(ema_matrix) - 1
+    pairs = list(combinations(range(len(ema_matrix)), 2))
+    params = {
+        "N_dec":N_dec, "delta":delta, "benefit_timing":benefit_timing,
+        "golden_patterns":golden_patterns, "dead_patterns":dead_patterns,
+    }
+    benefit_map = np.zeros((N_ema_max + 1, N_ema_max + 1), dtype=int)
+    results = [None] * len(pairs)
+    index = {pair: jj for jj, pair in enumerate(pairs)}
+
+    def collect(chunk_results):
+        for ii, kk, obj in chunk_results:
+            benefit_map[ii + 1, kk + 1] = 1*obj["benefit"]
+            results[index[(ii, kk)]] = obj
+        if callback is not None:
+            done = sum(obj is not None for obj in results)
+            callback({"done":done, "total":len(pairs), "benefit_map":benefit_map.copy()})
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers <= 1 or len(pairs) <= 1:
+        for ii, kk in pairs:
+            collect([(ii, kk, analyze_ema_pair(ohlc, ema_matrix[ii], ema_matrix[kk], dec, **params))])
+    else:
+        blocks = {}
+        try:
+            descriptors = {}
+            targets = [("dec", dec), ("ema", ema_matrix)]
+            if store is None:
+                targets.append(("ohlc", ohlc))
+            for key, arr in targets:
+                blocks[key], descriptors[key] = _to_shared(arr)
+            handle = store.handle if store is not None else None
+            # a few chunks per worker to balance the load and report the progress
+            N_chunks = min(len(pairs), 4 * max_workers)
+            chunks = [pairs[jj::N_chunks] for jj in range(N_chunks)]
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(descriptors, handle, params)) as executor:
+                futures = [executor.submit(_analyze_chunk, chunk) for chunk in chunks]
+                for future in as_completed(futures):
+                    collect(future.result())
+        finally:
+            for shm in blocks.values():
+                shm.close()
+                shm.unlink()
+
+    return {
+        "benefit_map":benefit_map,
+        "stat_dead_list":[obj["stat_dead"] for obj in results],
+        "stat_golden_list":[obj["stat_golden"] for obj in results],
+        "dec_dead_box_list":[obj["dec_dead_box"] for obj in results],
+        "dec_golden_box_list":[obj["dec_golden_box"] for obj in results],
+        "dec_dead_list":[obj["dec_dead"] for obj in results],
+        "dec_golden_list":[obj["dec_golden"] for obj in results],
+    }
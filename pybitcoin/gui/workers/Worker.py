@@ -7,6 +7,7 @@ This file offers the following items:
 
 * Worker
 * GetTickerWorker
+* FeedWorker
 * AnalysisWorker
 """
 
@@ -93,6 +94,24 @@ class GetTickerWorker(Worker):
             "dataset":dataset,
         }
 
+class FeedWorker(Worker):
+    """FeedWorker(Worker)
+
+    This class relays snapshots of a MarketFeed to the Qt side.
+    The requests are issued concurrently by the feed on its own thread,
+    so this worker only waits for the next snapshot.
+    """
+    def __init__(self, name = "", parent = None, feed=None, debug=False):
+        super().__init__(name=name, parent=parent, debug=debug)
+        self._feed = feed
+
+    def _process(self):
+        """_process(self) -> None
+
+        take the latest snapshot of the feed
+        """
+        self.data = self._feed.get(timeout=self.sleepInterval)
+
 # class AnalysisWorker(Worker):
 #     def __init__(self, name = "", parent = None, data_adapter = None):
 #         """__init__(self, name = "", parent = None, data_adapter = None) -> None
@@ -150,39 +169,37 @@ class GetTickerWorker(Worker):
 #         print("Elapsed time: {0:.2f} sec.".format(time.time() - st))
 
 class AnalysisWorker(Worker):
-    def __init__(self, name = "", parent = None, adapter = None):
-        """__init__(self, name = "", parent = None, adapter = None) -> None
+    progress = pyqtSignal(object)
+
+    def __init__(self, name = "", parent = None, adapter = None, max_workers = None):
+        """__init__(self, name = "", parent = None, adapter = None, max_workers = None) -> None
         
         initialize this class
 
         Parameters
         ----------
-        name    : str
+        name        : str
             name of an instance
-        parent  : instance of a class overtaking QtWidgets
+        parent      : instance of a class overtaking QtWidgets
             parent of the instance
-        adapter : DataAdapter
-            data adapter of OHLCV dataset
+        adapter     : DataAdapter or AnalysisSnapshot
+            data adapter of OHLCV dataset or its snapshot (see DataAdapter.snapshotAnalysisData)
+        max_workers : int (default : None)
+            the number of processes for the analysis
         """
         super().__init__(name=name, parent=parent, debug=False)
         self.adapter = adapter
+        self.max_workers = max_workers
 
     def _process(self):
         """_process(self) -> None
 
-        analyze OHLCV dataset
+        analyze OHLCV dataset.
+        The progress and the partial benefit map are emitted by `progress`.
         """
         print("AnalysisWorker.process(): start.")
         st = time.time()
-        self.adapter.ana_update = True
-        self.adapter.initAnalysisData()
-        self.data = {
-            "benefit_map":self.adapter.benefit_map, 
-            "stat_dead_list":self.adapter.stat_dead_list, 
-            "stat_golden_list":self.adapter.stat_golden_list, 
-            "dec_dead_box_list":self.adapter.dec_dead_box_list, 
-            "dec_golden_box_list":self.adapter.dec_golden_box_list, 
-            "dec_dead_list":self.adapter.dec_dead_list, 
-            "dec_golden_list":self.adapter.dec_golden_list, 
-        }
+        self.data = self.adapter.sweepAnalysisData(
+            max_workers=self.max_workers, callback=self.progress.emit
+        )
         print("AnalysisWorker.process(): finish. {0:.2f} sec.".format(time.time() - st))
\ No newline at end of file
@@ -1,5 +1,5 @@
 #! /usr/bin/python3
 # -*- coding: utf-8 -*-
 
-from .Worker import Worker, GetTickerWorker, AnalysisWorker
+from .Worker import Worker, GetTickerWorker, FeedWorker, AnalysisWorker
 from .bots import Bot1, Bot2, Bot3
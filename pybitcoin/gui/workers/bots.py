@@ -110,7 +110,10 @@ class BotBase(Worker):
                     "child_order_acceptance_id":self._accepted_id,
                     "result":results[0]
                 }
-                self._accepted_jpy = results[0]["price"]
+                # the price of a MARKET order is 0 and its fill is in average_price
+                price = results[0].get("average_price", 0.) or results[0]["price"]
+                if price > 0:
+                    self._accepted_jpy = price
                 if self._DEBUG:
                     print(results[0])
             else:
@@ -245,6 +248,7 @@ class BotBase(Worker):
         self._side = "WAIT"
         self._tmp_side = "WAIT"
         self._accepted_id = None
+        self._accepted_jpy = None # the price of the next position is got after its order
     
     def _post_process(self):
         if len(self._ltp_list) > self._nbr_of_tickers:
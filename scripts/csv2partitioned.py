@@ -0,0 +1,41 @@
+#! /usr/bin/python3
+#-*- coding: utf-8 -*-
+"""csv2partitioned.py
+This script aims to import CSV files of OHLCV made by 'get_ohlcv_from_executions.py'
+to a PartitionedStore, whose columns are loaded much faster than CSV files.
+Each CSV file has a format of name, 'OHLCV_%Y%m%d%H%M_to_%Y%m%d%H%M.csv'.
+
+This script requires the followng parameters:
+
+Parameters
+----------
+fldr : str
+    path of folder which containes files to import
+root : str
+    path of folder of the PartitionedStore
+"""
+
+import glob
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pybitcoin", "gui", "utils"))
+from PartitionedStore import PartitionedStore
+
+def main(fldr, root):
+    filelist = sorted(glob.glob(os.path.join(fldr, "OHLCV_*_to_*.csv")))
+    if len(filelist) == 0:
+        print("warning: No csv files are found.\nexit.")
+        sys.exit(-1)
+    print("import starts...")
+    st = time.time()
+    store = PartitionedStore(root)
+    for fpath in filelist:
+        print(fpath)
+        store.import_csv(fpath)
+    print("import was finished. Elapsed time:{0:.2f} sec".format(time.time()-st))
+    print("partitions: {} to {}".format(store.partitions[0], store.partitions[-1]))
+
+if __name__ == "__main__":
+    main(sys.argv[1], sys.argv[2])
@@ -3,13 +3,22 @@
 import copy
 from datetime import datetime, timedelta
 import glob
-import matplotlib.pyplot as plt
 import numpy as np
 import os
 import pandas as pd
 import pybitflyer
+import sys
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pybitcoin", "gui", "utils"))
+from APIClient import as_client
+from bars import parse_executions, split_closed_bars
+from ExecutionDownloader import ExecutionDownloader
+from ExecutionLocator import ExecutionLocator
+
+# (id, time) pairs of executions known by the past searches
+ID_INDEX_PATH = "../data/executions/id_index.npy"
+
 def initAPI():
     """self.initData() -> None
     initialize the API of pybitflyer.
@@ -28,23 +37,16 @@ def initAPI():
         except Exception as ex:
             raise Exception(ex)
 
-    api = pybitflyer.API(
+    # requests are retried with backoff in the budget of the API
+    api = as_client(pybitflyer.API(
         api_key=_api_key, 
         api_secret=_api_secret, 
         timeout=_api_timeout
-    )
+    ))
 
     try:
         endpoint = "/v1/markets"
-        is_success = False
-        while not is_success:
-            try:
-                currencies = api.request(endpoint)
-                is_success = True
-            except KeyboardInterrupt:
-                raise KeyboardInterrupt
-            except:
-                continue
+        currencies = api.request(endpoint)
         if isinstance(currencies, list):
             print("Currency:")
             print([currency["product_code"] for currency in currencies])
@@ -52,15 +54,7 @@ def initAPI():
             raise ValueError("No available currencies.")
 
         endpoint = "/v1/me/getpermissions"
-        is_success = False
-        while not is_success:
-            try:
-                permissions = api.request(endpoint)
-                is_success = True
-            except KeyboardInterrupt:
-                raise KeyboardInterrupt
-            except:
-                continue
+        permissions = api.request(endpoint)
         if isinstance(permissions, list):
             print("Permitted API:")
             print(permissions)
@@ -73,7 +67,8 @@ def initAPI():
 
 def find_id(t, api, guess=None, verbose=False):
     """find_id(t, api, guess=None, verbose=False) -> int
-    find an id which comes after and nearest to the datetime 't'.
+    find an id which comes after and nearest to the datetime 't'
+    by interpolation search with the index saved to ID_INDEX_PATH.
     
     Parameters
     ----------
@@ -87,50 +82,33 @@ def find_id(t, api, guess=None, verbose=False):
     -------
     id_ : int
     """
-    product_code = "FX_BTC_JPY"
-    fmt = "%Y-%m-%dT%H:%M:%S.%f"
-    fmt2 = "%Y-%m-%dT%H:%M:%S"
-    count = 500
-    params = {
-        "product_code":product_code,
-        "count":count
-    }
-    if guess is not None and isinstance(guess, int):
-        params["before"] = guess
-    
-    id_ = -1
-    datetime_ = t.strftime(fmt2)
-    while True:
-        if verbose:
-            print("current id:{}, datetime:{}".format(id_, datetime_))
-        results = api.executions(**params)[::-1]
-        id_list = np.array([_res["id"] for _res in results])
-        
-        datetime_list = []
-        for _res in results:
-            try:
-                datetime_list.append(datetime.strptime(_res["exec_date"], fmt))
-            except ValueError:
-                datetime_list.append(datetime.strptime(_res["exec_date"], fmt2))
-        datetime_list = np.array(datetime_list)
-        
-        index = datetime_list < t
-        if index.sum() == 0:
-            id_ = 1 * id_list[0]
-            params["before"] = id_
-            datetime_ = datetime_list[0].strftime(fmt2)
-        else:
-            id_ = (id_list[index])[-1] + 1
-            datetime_ = datetime_list[id_list==id_][0].strftime(fmt2)
-            break
+    if isinstance(guess, bool) or not isinstance(guess, int):
+        guess = None
     if verbose:
-        print("  found id:{}, datetime:{}".format(id_, datetime_))
+        print("search the id of datetime:{}".format(t.strftime("%Y-%m-%dT%H:%M:%S")))
+    locator = ExecutionLocator(api, index_path=ID_INDEX_PATH)
+    id_ = locator.locate(t, guess)
+    if verbose:
+        print("  found id:{} with {} requests".format(id_, locator.requests))
     
     return id_
 
+def latest_id(api, product_code="FX_BTC_JPY"):
+    """latest_id(api, product_code="FX_BTC_JPY") -> int
+    return the id of the newest execution
+    """
+    executions = parse_executions(api.executions(product_code=product_code, count=1))
+    if len(executions) == 0:
+        raise ValueError("no executions of {}.".format(product_code))
+    return int(executions["id"][-1])
+
 def get_ohlcv(ts, te, api, id_start=None, verbose=False):
     """get_ohlcv(ts, te, api, id_start=None, verbose=False) -> numpy.2darray
     
+    collect executions from `id_start` page by page and make 1-minute bars.
+    Empty pages are skipped only below the newest execution, 
+    and the loop stops with the bars closed so far when it reaches the newest one before `te`.
+    
     Parameters
     ----------
     ts       : datetime
@@ -148,13 +126,11 @@ def get_ohlcv(ts, te, api, id_start=None, verbose=False):
     ohlcv_list : numpy.2darray
         each row has [timestamp, open, high, low, close, volume].
     """
-    fmt = "%Y-%m-%dT%H:%M:%S.%f"
-    fmt2 = "%Y-%m-%dT%H:%M:%S"
     product_code = "FX_BTC_JPY"
-    columns = ["time", "id_start", "id_end", "open", "high", "low", "close", "volume"]
     count = 500
     t_start = ts - timedelta(hours=9)
     t_end = te - timedelta(hours=9)
+    epoch = datetime(1970, 1, 1)
     
     # processing for id_start
     id_start_ = id_start
@@ -165,79 +141,98 @@ def get_ohlcv(ts, te, api, id_start=None, verbose=False):
         if verbose:
             print("finish. start id: {}".format(id_start_))
     
-    # main loop
-    t_next = t_start + timedelta(minutes=1)
-    ohlcv_list = []
-    ltp_list = np.empty(0, dtype=int)
-    volume_list = np.empty(0, dtype=float)
+    # main loop: collect pages of executions until the bar of t_end is closed
+    seconds_end = (t_end - epoch).total_seconds() + 60
+    pages = []
     id_next = 1*id_start_
     if verbose:
         print("main loop starts.")
-    while t_start <= t_end:
-        try:
+    try:
+        while True:
+            results = api.executions(
+                product_code=product_code, count=count, before=id_next + count, after=id_next - 1
+            )
+            executions = parse_executions(results)
+            if len(executions) == 0:
+                id_latest = latest_id(api, product_code)
+                if id_latest < id_next:
+                    # no execution after id_next yet
+                    if verbose:
+                        print("reach the newest execution before the end time.")
+                    break
+                if id_latest >= id_next + count:
+                    # a gap of ids below the newest execution
+                    id_next += count
+                continue
+            pages.append(executions)
+            id_next = int(executions["id"][-1]) + 1
             if verbose:
-                print("start id:{}, datetime:{}".format(id_start_, t_start.strftime("%Y-%m-%dT%H:%M:%S")))
-            params = {
-                "product_code":product_code,
-                "count":count,
-                "before":id_next + count + 1,
-            }
-            ## get executions
-            is_success = False
-            fault_count = 0
-            while not is_success:
-                try:
-                    results = api.executions(**params)[::-1]
-                    is_success = True
-                except KeyboardInterrupt:
-                    return pd.DataFrame(ohlcv_list, columns=columns)
-                except:
-                    fault_count += 1
-                    continue
+                print("next id:{}, datetime:{}".format(
+                    id_next, (epoch + timedelta(seconds=float(executions["time"][-1]))).strftime("%Y-%m-%dT%H:%M:%S")
+                ))
+            if executions["time"][-1] >= seconds_end:
+                break
+    except KeyboardInterrupt:
+        pass
+    if verbose:
+        print("finish the main loop.")
 
-            ## extract
-            ids_ = np.array([_res["id"] for _res in results], dtype=int)
-            ltps_ = np.array([_res["price"] for _res in results], dtype=int)
-            volumes_ = np.array([_res["size"] for _res in results], dtype=float)
-            datetimes_ = []
-            for _res in results:
-                try:
-                    datetimes_.append(datetime.strptime(_res["exec_date"], fmt))
-                except ValueError:
-                    datetimes_.append(datetime.strptime(_res["exec_date"], fmt2))
-            datetimes_ = np.array(datetimes_)
-            
-            ## find valid indices & extract
-            ind_id = ids_ >= id_next
-            ind_now = (datetimes_ >= t_start) & (datetimes_ < t_next)
-            ind_next = datetimes_ >= t_next
-            ltp_list = np.hstack((ltp_list, ltps_[ind_id&ind_now]))
-            volume_list = np.hstack((volume_list, volumes_[ind_id&ind_now]))
-            
-            ## processing for next step
-            # if (ind_id&ind_now).sum() == 0:
-            #     id_start_ = 
-            #     continue
-            if ind_next.sum() == 0:
-                id_next = 1*(ids_[ind_id&ind_now])[-1]
-            else:
-                timestamp_ = t_start.timestamp()
-                id_end_ = 1*(ids_[ind_id&ind_next])[0] - 1
-                ohlcv_list.append([timestamp_, id_start_, id_end_, ltp_list[0], ltp_list.max(), ltp_list.min(), ltp_list[-1], volume_list.sum()])
-                id_start_ = id_end_ + 1
-                id_next = 1*(ids_[ind_id&ind_next])[-1]
-                ltp_list = np.empty(0, dtype=int)
-                ltp_list = np.hstack((ltp_list, ltps_[ind_id&ind_next]))
-                volume_list = np.empty(0, dtype=float)
-                volume_list = np.hstack((volume_list, volumes_[ind_id&ind_next]))
-                t_start += timedelta(minutes=1)
-                t_next += timedelta(minutes=1)
-                print("next id:{}, datetime:{}".format(id_start_, t_start.strftime("%Y-%m-%dT%H:%M:%S")))
-        except KeyboardInterrupt:
-            return pd.DataFrame(ohlcv_list, columns=columns)
+    # make the bars closed in [t_start, t_end] at once
+    executions = np.concatenate(pages) if len(pages) != 0 else parse_executions([])
+    ohlcv, _ = split_closed_bars(executions, 60)
+    seconds_ = ohlcv["time"].values.astype(float)
+    ohlcv = ohlcv[(seconds_ >= (t_start - epoch).total_seconds()) & (seconds_ < seconds_end)]
+    ohlcv = ohlcv.reset_index(drop=True)
+    ohlcv["time"] = [(epoch + timedelta(seconds=int(t))).timestamp() for t in ohlcv["time"].values]
+    return ohlcv
+
+def get_ohlcv_concurrently(ts, te, api, id_start=None, fldr="../data/executions",
+                           max_workers=4, verbose=False):
+    """get_ohlcv_concurrently(ts, te, api, id_start=None, fldr="../data/executions",
+                              max_workers=4, verbose=False) -> pandas.DataFrame
+    
+    the same as `get_ohlcv` except that executions are downloaded concurrently
+    by ExecutionDownloader, whose segments are saved to `fldr`.
+    If this function is interrupted, the next call resumes the download.
+
+    Parameters
+    ----------
+    ts          : datetime
+        start time in JST
+    te          : datetime
+        end time in JST
+    api         : API inscante of pybitflyer module
+    id_start    : int (default : None)
+        if None, then firstly find the corresponding id.
+    fldr        : str (default : "../data/executions")
+        folder to save the executions to
+    max_workers : int (default : 4)
+        the number of threads, which share the request budget of `api`
+    verbose     : bool (default : False)
+        if True, then call print functions to inform the current status
+    
+    Returns
+    -------
+    ohlcv_list : pandas.DataFrame
+        each row has [timestamp, id_start, id_end, open, high, low, close, volume].
+    """
+    t_start = ts - timedelta(hours=9)
+    t_end = te - timedelta(hours=9)
+    if id_start is None:
+        id_start = find_id(t_start, api, False)
+    id_end = find_id(t_end + timedelta(minutes=1), api, False) - 1
     if verbose:
-            print("finish the main loop.")
-    return pd.DataFrame(ohlcv_list, columns=columns)
+        print("download executions from {} to {}".format(id_start, id_end))
+
+    callback = (lambda done, total: print("segment: {}/{}".format(done, total))) if verbose else None
+    downloader = ExecutionDownloader(api, fldr, max_workers=max_workers)
+    ohlcv = downloader.to_ohlcv(id_start, id_end, callback=callback)
+
+    # the timestamp has the same meaning as the one of get_ohlcv, 
+    # i.e. datetime.timestamp() of the start time of each bar in UTC
+    epoch = datetime(1970, 1, 1)
+    ohlcv["time"] = [(epoch + timedelta(seconds=int(t))).timestamp() for t in ohlcv["time"].values]
+    return ohlcv
 
 if __name__ == "__main__":
     api = initAPI()
@@ -253,7 +248,7 @@ if __name__ == "__main__":
 
     print("start:", id_start, t_start, t_end)
     st = time.time()
-    ohlcv = get_ohlcv(t_start, t_end, api, id_start, verbose=False)
+    ohlcv = get_ohlcv_concurrently(t_start, t_end, api, id_start, verbose=False)
     t_last = datetime.fromtimestamp(ohlcv["time"].values[-1]) + timedelta(hours=9)
     print("Elapsed time:{0:.2f} sec".format(time.time()-st))
 
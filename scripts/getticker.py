@@ -6,9 +6,13 @@ import glob
 import json
 import os
 import pybitflyer
+import sys
 import time
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pybitcoin", "gui", "utils"))
+from APIClient import as_client
+
 _product_code = "FX_BTC_JPY"
 _api_dir = ".prv"
 
@@ -24,11 +28,11 @@ with open(fpath, "r", encoding="utf-8") as ff:
     except Exception as ex:
         print(ex)
 
-api = pybitflyer.API(
+api = as_client(pybitflyer.API(
     api_key=_api_key, 
     api_secret=_api_secret, 
     timeout=2.0
-)
+))
 try:
     endpoint = "/v1/markets"
     _ = api.request(endpoint)